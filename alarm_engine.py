@@ -0,0 +1,228 @@
+# γTicker alarm evaluation for classes.py
+# AlarmSet, RollingWindow, PercentAlarm, MovingAverageAlarm, VelocityAlarm, describe_alarm
+#
+# Alarm dictionaries in settings: {'enabled': True, 'inequality': '>', 'value': 120.0}
+# Alarms other than static thresholds add a type and a window of refreshes:
+#     {'enabled': True, 'inequality': '>', 'value': 5.0, 'type': 'percent', 'window': 10}
+#
+#     threshold -- value >= / <= a threshold. The default when there is no type.
+#     percent   -- value rose (>) or fell (<) by at least value percent within the window.
+#     ma_cross  -- value crossed above (>) or below (<) its moving average over the window.
+#     velocity  -- value rose (>) or fell (<) faster than value per second across the window.
+
+from array import array
+from bisect import bisect_left, bisect_right
+from threading import Lock
+from functions import print_thread
+
+ALARM_TYPES = ['threshold', 'percent', 'ma_cross', 'velocity']
+
+
+def describe_alarm(alarm):
+    """Short description of an alarm for AlarmRow and alarm notifications, e.g. ">= 120.0".
+    """
+    alarm_type = alarm.get('type', 'threshold')
+    inequality = alarm['inequality']
+    if alarm_type == 'percent':
+        return f"{'rose' if inequality == '>' else 'fell'} {alarm['value']}% within {alarm['window']} refreshes"
+    if alarm_type == 'ma_cross':
+        return f"crossed {'above' if inequality == '>' else 'below'} {alarm['window']}-refresh average"
+    if alarm_type == 'velocity':
+        direction = 'rising' if inequality == '>' else 'falling'
+        return f"{direction} faster than {alarm['value']}/s over {alarm['window']} refreshes"
+    return f"{inequality}= {alarm['value']}"
+
+
+class RollingWindow:
+    """The last size values and timestamps of a row in fixed ring buffers, with a running sum.
+
+    push(), oldest(), and mean() are all O(1), so no history is rescanned on a refresh.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.values = array('d', bytes(8 * size))
+        self.times = array('d', bytes(8 * size))
+        self.count = 0
+        self.index = 0
+        self.total = 0.0
+        self.previous_mean = None
+        self.previous_value = None
+
+    def full(self):
+        return self.count == self.size
+
+    def push(self, value, timestamp):
+        self.previous_mean = self.mean()
+        self.previous_value = self.latest()
+        if self.full():
+            self.total -= self.values[self.index]
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self.times[self.index] = timestamp
+        self.total += value
+        self.index = (self.index + 1) % self.size
+
+    def latest(self):
+        return self.values[self.index - 1] if self.count else None
+
+    def oldest(self):
+        """return (value, timestamp) of the oldest value held.
+        """
+        position = self.index if self.full() else 0
+        return self.values[position], self.times[position]
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class PercentAlarm:
+    """Value rose or fell by at least a percentage compared with the oldest value in the window.
+    """
+    def __init__(self, alarm):
+        self.alarm = alarm
+        self.percent = float(alarm['value'])
+        self.rising = alarm['inequality'] == '>'
+
+    def check(self, window):
+        oldest, _ = window.oldest()
+        if window.count < 2 or not oldest:
+            return False
+        change = (window.latest() - oldest) / abs(oldest) * 100
+        return change >= self.percent if self.rising else change <= -self.percent
+
+
+class MovingAverageAlarm:
+    """Value crossed above or below its moving average over a full window.
+    """
+    def __init__(self, alarm):
+        self.alarm = alarm
+        self.above = alarm['inequality'] == '>'
+
+    def check(self, window):
+        if not window.full() or window.previous_mean is None:
+            return False
+        value, mean = window.latest(), window.mean()
+        if self.above:
+            return window.previous_value <= window.previous_mean and value > mean
+        return window.previous_value >= window.previous_mean and value < mean
+
+
+class VelocityAlarm:
+    """Value changed faster than a rate per second between the oldest and newest values in the window.
+    """
+    def __init__(self, alarm):
+        self.alarm = alarm
+        self.rate = float(alarm['value'])
+        self.rising = alarm['inequality'] == '>'
+
+    def check(self, window):
+        oldest, oldest_time = window.oldest()
+        elapsed = window.times[window.index - 1] - oldest_time
+        if window.count < 2 or elapsed <= 0:
+            return False
+        rate = (window.latest() - oldest) / elapsed
+        return rate >= self.rate if self.rising else rate <= -self.rate
+
+
+WINDOWED_ALARMS = {'percent': PercentAlarm, 'ma_cross': MovingAverageAlarm, 'velocity': VelocityAlarm}
+
+
+class AlarmSet:
+    """The enabled alarms of one TickerRow, compiled into sorted threshold arrays.
+
+    Alarms are compiled when they are loaded, created, toggled, or deleted rather than on every
+    refresh, so checking a new value against any number of thresholds is two bisects:
+
+        ">" alarms trigger when value >= threshold: a prefix of the ascending above thresholds.
+        "<" alarms trigger when value <= threshold: a suffix of the ascending below thresholds.
+
+    Percent, moving-average cross, and velocity alarms are evaluated against a RollingWindow
+    per window size, updated once per value in O(1). Every observation is pushed, including
+    unchanged ones, and so are the windows of disabled alarms, so an alarm which is re-enabled
+    isn't checked against stale values. Windows survive recompiling, so editing alarms doesn't
+    lose history.
+
+    The alarm dictionaries from settings are kept by reference so triggered ones can be disabled.
+
+        alarm_set = AlarmSet(settings.dictionary['apis'][0]['alarms'])
+        for alarm in alarm_set.check(123.4, time()):
+            alarm['enabled'] = False
+    """
+    def __init__(self, alarms=None):
+        self.lock = Lock()
+        self.windows = {}
+        self.load(alarms if alarms is not None else [])
+
+    def load(self, alarms):
+        """Compile a list of alarm dictionaries from settings. Disabled alarms are left out.
+        """
+        above, below, windowed = [], [], []
+        sizes = set()
+        for alarm in alarms:
+            alarm_type = alarm.get('type', 'threshold')
+            if alarm_type in WINDOWED_ALARMS:
+                try:
+                    sizes.add(max(2, int(alarm['window'])))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            if not alarm['enabled']:
+                continue
+            try:
+                if alarm_type in WINDOWED_ALARMS:
+                    windowed.append((max(2, int(alarm['window'])), WINDOWED_ALARMS[alarm_type](alarm)))
+                    continue
+                threshold = float(alarm['value'])
+            except (KeyError, TypeError, ValueError):
+                print_thread(f'Alarm Error: Invalid alarm {alarm}')
+                continue
+            if alarm['inequality'] == '>':
+                above.append((threshold, alarm))
+            elif alarm['inequality'] == '<':
+                below.append((threshold, alarm))
+        above.sort(key=lambda item: item[0])
+        below.sort(key=lambda item: item[0])
+        with self.lock:
+            self.above = [threshold for threshold, _ in above]
+            self.above_alarms = [alarm for _, alarm in above]
+            self.below = [threshold for threshold, _ in below]
+            self.below_alarms = [alarm for _, alarm in below]
+            self.windowed = windowed
+            self.windows = {size: self.windows.get(size) or RollingWindow(size) for size in sizes}
+
+    def __len__(self):
+        return len(self.above) + len(self.below) + len(self.windowed)
+
+    def __bool__(self):
+        """True while there are alarms to check or windows to keep up to date.
+        """
+        return bool(len(self) or self.windows)
+
+    def check(self, value, timestamp=0.0):
+        """Return the alarm dictionaries triggered by a numeric value.
+
+        Triggered alarms are removed from the set, as they are disabled once triggered.
+        """
+        with self.lock:
+            triggered = []
+            for window in self.windows.values():
+                window.push(value, timestamp)
+            if self.windowed:
+                remaining = []
+                for size, predicate in self.windowed:
+                    if predicate.check(self.windows[size]):
+                        triggered.append(predicate.alarm)
+                    else:
+                        remaining.append((size, predicate))
+                self.windowed = remaining
+            above = bisect_right(self.above, value)
+            triggered += self.above_alarms[:above]
+            if above:
+                del self.above[:above]
+                del self.above_alarms[:above]
+            below = bisect_left(self.below, value)
+            if below < len(self.below):
+                triggered += self.below_alarms[below:]
+                del self.below[below:]
+                del self.below_alarms[below:]
+        return triggered
@@ -5,6 +5,7 @@ import tkinter as tk
 from tkinter import ttk
 from functions import is_float, print_thread
 from settings import settings
+from alarm_engine import ALARM_TYPES, describe_alarm
 
 
 class TickerAlarm:
@@ -45,14 +46,24 @@ class TickerAlarm:
         vcmd_none = (self.alarm_window.register(self.no_input))
 
         # Entry Boxes
-        # Inequality
+        # Alarm Type -- Names displayed for alarm_engine.ALARM_TYPES
+        self.type_names = ['Threshold', 'Percent', 'MA Cross', 'Velocity']
+        self.type_drop = ttk.Combobox(self.add_canvas, values=self.type_names,
+                                      validate='key', validatecommand=vcmd_none, width=9)
+        self.type_drop.grid(row=0, column=1, padx=self.padx, pady=self.pady, sticky='w')
+        self.type_drop.current(0)
+        # Inequality -- Direction for alarms other than thresholds.
         self.inequality_drop = ttk.Combobox(self.add_canvas, values=['>', '<'],
                                             validate='key', validatecommand=vcmd_none, width=4)
-        self.inequality_drop.grid(row=0, column=1, padx=self.padx, pady=self.pady, sticky='w')
+        self.inequality_drop.grid(row=0, column=2, padx=self.padx, pady=self.pady, sticky='w')
         self.inequality_drop.current(0)
-        # Value
+        # Value -- Threshold, percent, or rate per second. Unused by MA Cross.
         self.value_entry = tk.Entry(self.add_canvas, width=12)
-        self.value_entry.grid(row=0, column=2, padx=self.padx, pady=self.pady, sticky='w')
+        self.value_entry.grid(row=0, column=3, padx=self.padx, pady=self.pady, sticky='w')
+        # Window -- Number of refreshes for alarms other than thresholds.
+        self.window_entry = tk.Entry(self.add_canvas, width=4)
+        self.window_entry.grid(row=0, column=4, padx=self.padx, pady=self.pady, sticky='w')
+        self.window_entry.insert(0, '10')
 
         # Alarms Frame
         self.alarm_frame = tk.Frame(self.alarm_window)
@@ -68,13 +79,20 @@ class TickerAlarm:
     def create_alarms(self):
         """Load all alarms for a TickerRow API by creating AlarmRow objects.
         """
-        alarms = settings.dictionary['apis'][self.ticker_row.sequence]['alarms']
+        alarms = self.ticker_row.api_settings['alarms']
         row = 0
         for alarm in alarms:
             self.alarm_rows.append(AlarmRow(self, self.alarm_frame, row, alarm['enabled'],
-                                            alarm['inequality'], alarm['value']))
+                                            alarm['inequality'], alarm['value'], self.description(alarm)))
             row += 1
 
+    def description(self, alarm):
+        """Text for an AlarmRow's value label. Thresholds just show their value.
+        """
+        if alarm.get('type', 'threshold') == 'threshold':
+            return None
+        return describe_alarm(alarm)
+
     def new_alarm(self):
         """Create a new alarm for yTicker
 
@@ -84,6 +102,14 @@ class TickerAlarm:
         entries['enabled'] = True
         entries['inequality'] = self.inequality_drop.get()
         entries['value'] = self.value_entry.get()
+        # Thresholds keep the original settings schema without a type or window.
+        alarm_type = ALARM_TYPES[self.type_names.index(self.type_drop.get())]
+        if alarm_type != 'threshold':
+            entries['type'] = alarm_type
+            window = self.window_entry.get()
+            entries['window'] = max(2, min(int(window), 100000)) if window.isdigit() else 10
+            if alarm_type == 'ma_cross' and entries['value'] == '':
+                entries['value'] = 0
 
         if len(str(entries['value'])) > 20:
             entries['value'] = str(entries['value'])[:20]
@@ -91,11 +117,18 @@ class TickerAlarm:
             if float(entries['value']) >= 0:
                 entries['value'] = float(entries['value'])
                 # Don't create duplicate alarms.
-                if entries not in settings.dictionary['apis'][self.ticker_row.sequence]['alarms']:
+                if entries not in self.ticker_row.api_settings['alarms']:
                     self.alarm_rows.append(AlarmRow(self, self.alarm_frame, len(self.alarm_rows),
-                                                    entries['enabled'], entries['inequality'], entries['value']))
-                    settings.dictionary['apis'][self.ticker_row.sequence]['alarms'].append(entries)
-                    settings.save()
+                                                    entries['enabled'], entries['inequality'], entries['value'],
+                                                    self.description(entries)))
+                    self.ticker_row.api_settings['alarms'].append(entries)
+                    settings.mark_dirty()
+                    self.reload()
+
+    def reload(self):
+        """Recompile the TickerRow's alarms after one is added, toggled, or deleted.
+        """
+        self.ticker_row.alarm_set.load(self.ticker_row.api_settings['alarms'])
 
     def no_input(self):
         """Prevent any input into a tkinter entry or combobox.
@@ -106,9 +139,9 @@ class TickerAlarm:
 class AlarmRow:
     """An object to contain tkinter objects in a single row within TickerAlarm.
     """
-    def __init__(self, TickerAlarm, tk_frame, row, enabled, inequality, value):
+    def __init__(self, TickerAlarm, tk_frame, row, enabled, inequality, value, description=None):
         self.ticker_alarm = TickerAlarm
-        self.ticker_sequence = self.ticker_alarm.ticker_row.sequence
+        self.alarms = self.ticker_alarm.ticker_row.api_settings['alarms']
         self.row = row
         self.frame = tk_frame
         self.enabled = enabled
@@ -132,8 +165,8 @@ class AlarmRow:
         self.inequality_label.grid(row=row, column=1, padx=self.padx, pady=self.pady, sticky='w')
         self.tk_objects.append(self.inequality_label)
 
-        # Value Label
-        self.value_label = tk.Label(self.frame, text=value)
+        # Value Label -- Or a description of alarms other than thresholds.
+        self.value_label = tk.Label(self.frame, text=description if description else value)
         self.value_label.grid(row=row, column=2, padx=self.padx, pady=self.pady, sticky='w')
         self.tk_objects.append(self.value_label)
 
@@ -152,8 +185,9 @@ class AlarmRow:
         """
         enabled_state = self.enabled_var.get()
         print_thread(f'Alarm checkbox set to {enabled_state}')
-        settings.dictionary['apis'][self.ticker_sequence]['alarms'][self.row]['enabled'] = enabled_state
-        settings.save()
+        self.alarms[self.row]['enabled'] = enabled_state
+        settings.mark_dirty()
+        self.ticker_alarm.reload()
 
     def delete(self):
         """Delete an alarm. Adjust all AlarmRows. Save settings.
@@ -171,8 +205,9 @@ class AlarmRow:
             for obj in self.ticker_alarm.alarm_rows[i].tk_objects:
                 obj.grid(row=i)
 
-        settings.dictionary['apis'][self.ticker_sequence]['alarms'].pop(self.row)
-        settings.save()
+        self.alarms.pop(self.row)
+        settings.mark_dirty()
+        self.ticker_alarm.reload()
 
 
 class AlarmNotification:
@@ -0,0 +1,383 @@
+# γTicker benchmarks run against a local stub HTTP server.
+# QuietServer, StubServer, synthetic_payload, bench_requests, bench_stream, bench_pipeline, bench_startup
+#
+# Usage: python benchmark.py [requests|stream|pipeline|startup ...] [--rows 10,100,1000] [--items 200]
+#                            [--depth 3] [--cycles 3] [--count 500] [--repeat 5] [--json results.json]
+#
+# Everything runs by default. --json writes the results as JSON, or to stdout with "--json -".
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count as counter
+from threading import Thread
+from time import perf_counter, time
+from json import dumps, loads
+from os import chdir, getcwd, path
+from statistics import median
+from tempfile import TemporaryDirectory
+import argparse
+import platform
+import subprocess
+import tracemalloc
+import sys
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve the same JSON payload for every GET request over HTTP/1.1 keep-alive.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this Nagle's algorithm stalls keep-alive clients.
+    disable_nagle_algorithm = True
+    payload = b'{}'
+    # With a varying marker, e.g. b'"123.45"', each response replaces it with a new number so that
+    # bodies differ and are parsed in full instead of being skipped as unchanged.
+    varying = None
+    served = counter()
+
+    def do_GET(self):
+        payload = self.payload
+        if self.varying:
+            payload = payload.replace(self.varying, f'"{next(self.served)}.5"'.encode(), 1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Streaming clients hang up mid-response on purpose. Don't print those disconnects.
+    """
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class StubServer:
+    """Local HTTP server on a free port in a background thread.
+
+        with StubServer({'price': 1.0}) as server:
+            requests_get(server.url)
+    """
+    def __init__(self, payload, varying=None):
+        handler = type('Handler', (StubHandler,), {'payload': dumps(payload).encode(), 'varying': varying,
+                                                  'served': counter()})
+        self.server = QuietServer(('127.0.0.1', 0), handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def synthetic_payload(items=1000, depth=3, term='last_price', position=0.5):
+    """Build a JSON-like dictionary of items with nested stats to a given depth.
+
+    The term key is placed in the item at the given fraction of the way through the payload.
+    """
+    def nested(level):
+        if level == 0:
+            return {'open': '1.0', 'high': '2.0', 'low': '0.5', 'volume': '12345.678'}
+        return {'level': level, 'stats': nested(level - 1), 'tags': ['a', 'b', 'c']}
+
+    data = []
+    for i in range(items):
+        item = {'symbol': f'SYM{i}', 'info': nested(depth)}
+        if i == int(items * position):
+            item[term] = '123.45'
+        data.append(item)
+    return {'data': data}
+
+
+def percentiles(durations):
+    """Summarize a list of durations in seconds: count, mean, p50, p95, p99, and max.
+    """
+    durations = sorted(durations)
+    if not durations:
+        return {'count': 0}
+
+    def rank(fraction):
+        return durations[min(len(durations) - 1, int(fraction * len(durations)))]
+
+    return {'count': len(durations), 'mean': sum(durations) / len(durations), 'p50': rank(0.5),
+            'p95': rank(0.95), 'p99': rank(0.99), 'max': durations[-1]}
+
+
+def timed(function, repeat):
+    """Return the mean seconds per call and the peak traced memory of a single call.
+    """
+    start = perf_counter()
+    for _ in range(repeat):
+        function()
+    seconds = (perf_counter() - start) / repeat
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def bench_stream(items=20000, repeat=5, positions=(0.1, 0.5, 0.9)):
+    """Compare loads + dict_search against streamed extraction with stream_search on one large payload,
+    with the term placed at different fractions of the way through it.
+    """
+    from network import SessionPool
+    from functions import dict_search
+    from ticker_api import TickerAPI
+
+    results = {}
+    pool = SessionPool()
+    for position in positions:
+        payload = synthetic_payload(items, position=position)
+        with StubServer(payload) as server:
+            api_object = TickerAPI('bench', server.url, 'last_price', None, False, pool)
+            print(f'Payload: {len(dumps(payload)) / 1e6:.1f} MB, term at {position:.0%}')
+
+            def full():
+                return dict_search(loads(pool.get(server.url).text), 'last_price')
+
+            def streamed():
+                return api_object.stream_api(pool.get(server.url, stream=True))['last_price']
+
+            assert full() == streamed()
+            for name, function in [('loads+dict_search', full), ('stream_search', streamed)]:
+                seconds, peak = timed(function, repeat)
+                results[f'{name}@{position}'] = {'seconds': seconds, 'peak_bytes': peak}
+                print(f'  {name}: {seconds * 1000:.1f} ms, peak {peak / 1e6:.1f} MB')
+    pool.close()
+    return results
+
+
+def bench_pipeline(rows=(10, 100, 1000), items=200, depth=3, cycles=3, workers=8):
+    """Time every stage of a refresh, the way a TickerRow runs it, for a number of rows:
+
+        scrape_api -> match_value -> dict_search -> logger -> alarm_check (AlarmSet.check)
+
+    Each row requests its own URL from the stub server, whose bodies change on every response, so
+    nothing is served from the fetch cache or skipped as unchanged. Rows are refreshed by a pool of
+    workers like the Scheduler's. Logs are written to a temporary directory, and the per-host rate
+    limiter is lifted for the stub server.
+
+    return, for each number of rows, rows refreshed per second and the latency of every stage.
+    """
+    from network import SessionPool, rate_limiter
+    from functions import dict_search
+    from ticker_api import TickerAPI
+    from alarm_engine import AlarmSet
+    from logs import log_writer
+
+    rate_limiter.rate = rate_limiter.burst = 1e9
+    payload = synthetic_payload(items, depth)
+    results = {}
+    directory = getcwd()
+    with TemporaryDirectory() as temporary, StubServer(payload, varying=b'"123.45"') as server:
+        chdir(temporary)
+        try:
+            print(f'Payload: {len(dumps(payload)) / 1e3:.0f} KB, {items} items, depth {depth}')
+            for row_count in rows:
+                pool = SessionPool(pool_size=workers)
+                stages = {'scrape_api': [], 'match_value': [], 'dict_search': [], 'logger': [], 'alarm_check': []}
+                api_objects = [TickerAPI(f'bench{i}', f'{server.url}?row={i}', 'last_price', 2, False, pool)
+                               for i in range(row_count)]
+                alarm_sets = [AlarmSet([{'enabled': True, 'inequality': '>', 'value': 1e12},
+                                        {'enabled': True, 'inequality': '<', 'value': -1.0},
+                                        {'enabled': True, 'inequality': '>', 'value': 50.0, 'type': 'percent',
+                                         'window': 10}]) for _ in range(row_count)]
+
+                def refresh(i):
+                    api_object = api_objects[i]
+                    start = perf_counter()
+                    api_object.scrape_api(0)
+                    scraped = perf_counter()
+                    api_object.match_value()
+                    matched = perf_counter()
+                    dict_search(api_object.api_dict, 'last_price')
+                    searched = perf_counter()
+                    api_object.logger(api_object.value)
+                    logged = perf_counter()
+                    alarm_sets[i].check(float(api_object.value), api_object.timestamp)
+                    checked = perf_counter()
+                    return scraped - start, matched - scraped, searched - matched, logged - searched, checked - logged
+
+                start = perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for _ in range(cycles):
+                        for durations in executor.map(refresh, range(row_count)):
+                            for stage, duration in zip(stages, durations):
+                                stages[stage].append(duration)
+                seconds = perf_counter() - start
+                pool.close()
+                result = {'rows_per_second': row_count * cycles / seconds,
+                          'stages': {stage: percentiles(durations) for stage, durations in stages.items()}}
+                results[str(row_count)] = result
+                print(f'{row_count} rows: {result["rows_per_second"]:.0f} rows/s')
+                for stage, summary in result['stages'].items():
+                    print(f'  {stage}: p50 {summary["p50"] * 1000:.2f} ms, p95 {summary["p95"] * 1000:.2f} ms, '
+                          f'p99 {summary["p99"] * 1000:.2f} ms')
+            log_writer.close()
+        finally:
+            chdir(directory)
+    return results
+
+
+# Modules classes.py should only import on first use.
+LAZY_MODULES = ('requests', 'pyperclip', 'alarms', 'engine', 'asyncio')
+
+IMPORT_SCRIPT = """
+from time import perf_counter
+start = perf_counter()
+import {module}
+seconds = perf_counter() - start
+import sys, json
+print(json.dumps({{'seconds': seconds, 'loaded': [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+# Ticker() returns instead of entering the mainloop, and its rows aren't fetched.
+WINDOW_SCRIPT = """
+from time import perf_counter
+start = perf_counter()
+import tkinter
+painted = []
+tk_update = tkinter.Tk.update
+def update(self):
+    tk_update(self)
+    if not painted:
+        painted.append(perf_counter() - start)
+tkinter.Tk.update = update
+tkinter.Tk.mainloop = lambda self, n=0: None
+import classes
+classes.Ticker.start = lambda self: None
+ticker = classes.Ticker()
+ready = perf_counter() - start
+import json, os
+print(json.dumps({'first_paint': painted[0], 'ready': ready}), flush=True)
+os._exit(0)
+"""
+
+
+def run_script(script):
+    """Run Python code in a fresh interpreter within the γTicker directory, and return the JSON it printed last.
+    """
+    completed = subprocess.run([sys.executable, '-c', script], cwd=path.dirname(path.abspath(__file__)),
+                               capture_output=True, text=True, timeout=120)
+    if completed.returncode:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed')
+    return loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(rows=(10, 100, 1000), repeat=5):
+    """Cold start of γTicker:
+
+        imports -- Import time of classes.py and daemon.py in fresh interpreters, and which of
+                   LAZY_MODULES were loaded by importing them.
+        rows    -- Time to build rows from settings and index their URLs, headlessly with DaemonRow.
+        window  -- With a display, time from process start to the first paint of Ticker and until its
+                   rows from the current settings file are created.
+
+    return median seconds of each.
+    """
+    from daemon import DaemonRow
+    from functions import UrlIndex
+    from network import SessionPool
+
+    results = {'imports': {}, 'rows': {}}
+    for module in ('classes', 'daemon'):
+        runs = [run_script(IMPORT_SCRIPT.format(module=module, lazy=LAZY_MODULES)) for _ in range(repeat)]
+        seconds = median(run['seconds'] for run in runs)
+        results['imports'][module] = {'seconds': seconds, 'loaded': runs[-1]['loaded']}
+        print(f'import {module}: {seconds * 1000:.1f} ms, loaded {", ".join(runs[-1]["loaded"]) or "nothing"} '
+              f'of {", ".join(LAZY_MODULES)}')
+
+    pool = SessionPool()
+    for row_count in rows:
+        apis = [{'name': f'bench{i}', 'url': f'http://127.0.0.1:1/?row={i % 50}', 'term': 'last_price',
+                 'decimals': 2, 'log': False, 'refresh': 10, 'order': float(i + 1),
+                 'alarms': [{'enabled': True, 'inequality': '>', 'value': 100.0}]} for i in range(row_count)]
+        durations = []
+        for _ in range(repeat):
+            start = perf_counter()
+            url_index = UrlIndex()
+            for row in [DaemonRow(api, pool) for api in apis]:
+                url_index.add(row)
+            durations.append(perf_counter() - start)
+        results['rows'][str(row_count)] = median(durations)
+        print(f'{row_count} rows: {median(durations) * 1000:.1f} ms')
+
+    try:
+        runs = [run_script(WINDOW_SCRIPT) for _ in range(repeat)]
+    except Exception as error:
+        print(f'window: skipped -- {error}')
+        results['window'] = None
+    else:
+        results['window'] = {key: median(run[key] for run in runs) for key in ('first_paint', 'ready')}
+        print(f'window: first paint {results["window"]["first_paint"] * 1000:.0f} ms, '
+              f'rows ready {results["window"]["ready"] * 1000:.0f} ms')
+    return results
+
+
+def bench_requests(count=500):
+    """Compare requests per second of bare requests.get against the keep-alive SessionPool.
+    """
+    from requests import get as requests_get
+    from network import SessionPool
+
+    results = {}
+    with StubServer({'data': {'price': '123.45'}}) as server:
+        start = perf_counter()
+        for _ in range(count):
+            requests_get(server.url)
+        results['requests.get'] = count / (perf_counter() - start)
+
+        pool = SessionPool()
+        start = perf_counter()
+        for _ in range(count):
+            pool.get(server.url)
+        results['SessionPool.get'] = count / (perf_counter() - start)
+        pool.close()
+
+    for name, rate in results.items():
+        print(f'{name}: {rate:.1f} requests/s')
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='γTicker benchmarks against a local stub HTTP server.')
+    parser.add_argument('benchmarks', nargs='*', choices=['requests', 'stream', 'pipeline', 'startup'],
+                        default=['requests', 'stream', 'pipeline', 'startup'])
+    parser.add_argument('--rows', default='10,100,1000', help='Comma-separated row counts for pipeline.')
+    parser.add_argument('--items', type=int, default=200, help='Items in the pipeline payload.')
+    parser.add_argument('--depth', type=int, default=3, help='Nesting depth of each payload item.')
+    parser.add_argument('--cycles', type=int, default=3, help='Refreshes of every row in pipeline.')
+    parser.add_argument('--count', type=int, default=500, help='Requests made by requests.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of each startup measurement.')
+    parser.add_argument('--json', help='Write results as JSON to a file, or "-" for stdout.')
+    arguments = parser.parse_args()
+
+    results = {'meta': {'time': time(), 'python': platform.python_version(), 'platform': platform.platform(),
+                        'arguments': vars(arguments)}}
+    # Progress goes to stderr when the JSON goes to stdout.
+    if arguments.json == '-':
+        sys.stdout = sys.stderr
+    if 'requests' in arguments.benchmarks:
+        results['requests'] = bench_requests(arguments.count)
+    if 'stream' in arguments.benchmarks:
+        results['stream'] = bench_stream()
+    if 'pipeline' in arguments.benchmarks:
+        results['pipeline'] = bench_pipeline([int(rows) for rows in arguments.rows.split(',')],
+                                             arguments.items, arguments.depth, arguments.cycles)
+    if 'startup' in arguments.benchmarks:
+        results['startup'] = bench_startup([int(rows) for rows in arguments.rows.split(',')], arguments.repeat)
+    if arguments.json == '-':
+        sys.__stdout__.write(dumps(results, indent=2) + '\n')
+    elif arguments.json:
+        with open(arguments.json, 'w') as stream:
+            stream.write(dumps(results, indent=2))
@@ -1,14 +1,22 @@
 # γTicker interdependent classes
 # Ticker, TickerRow, TickerAPIProperties
+#
+# pyperclip, the alarm windows, and the asyncio FetchEngine are imported where they're first used,
+# and requests by network.py and ticker_api.py, so the window can be shown before they're loaded.
 
 import tkinter as tk
 from threading import Thread
+from time import monotonic
 from os import system, path, getcwd
 # from os import system, path, getcwd, startfile
-from pyperclip import copy as pyperclip_copy
-from classes_others import TickerAPI, TickerPreferences, Tooltip
-from alarms import TickerAlarm, AlarmNotification
-from functions import is_float, reorder_rows, manage_urls, print_thread, TimerThread
+from classes_others import TickerPreferences, VirtualRows, LogViewer, Tooltip
+from ticker_api import TickerAPI
+from network import SessionPool, fetch_cache, fetch_stats
+from metrics import MetricsServer, metrics
+from logs import log_writer, log_name
+from snapshot import snapshot
+from alarm_engine import AlarmSet, describe_alarm
+from functions import is_float, print_thread, Scheduler, UpdateQueue, RowOrder, UrlIndex
 from settings import settings
 from util import dir_path
 
@@ -23,19 +31,33 @@ class Ticker:
         self.ticker_rows = []
         self.ticker_preferences = None
         self.api_properties = None
+        # Keep-alive HTTP connections shared by every TickerAPI.
+        self.session_pool = SessionPool()
+        # Prometheus /metrics endpoint, only started with a "metrics_port".
+        self.metrics_server = MetricsServer()
+        # Optional asyncio fetch engine. Rows fall back to the threaded Scheduler without it.
+        self.engine = None
+        self.scheduler = None
+        if settings.dictionary['global'].get('engine') == 'asyncio':
+            from engine import FetchEngine
+            self.engine = FetchEngine(self.post)
+        else:
+            self.scheduler = Scheduler()
 
         # Main tkinter window
         self.window = tk.Tk()
         self.window.title('γTicker')
         # Call a function when main window is closed.
         self.window.protocol('WM_DELETE_WINDOW', self.on_close)
+        # Widget updates from worker threads are drawn from here by the mainloop.
+        self.ui_queue = UpdateQueue(self.window)
         # Geometry & Padding
         try:
             self.geometry = settings.dictionary['global']['geometry']
             self.window.geometry(self.geometry)
         except Exception as error:
             print_thread(f'Error -- Invalid geometry from settings: {error}')
-            self.geometry = '285x310'
+            self.geometry = '350x310'
             self.window.geometry(self.geometry)
             settings.dictionary['global']['geometry'] = self.geometry
             settings.save()
@@ -65,76 +87,119 @@ class Ticker:
         self.settings_button.grid(row=0, column=2, padx=4, pady=(8, 4))
         Tooltip(self.settings_button, 'Preferences')
 
-        # Frame for scrollbar and api_canvas -- There's another frame nested in the canvas which is nested here.
-        # Got a lot of help with the scrollbar from https://stackoverflow.com/a/3092341
+        # Up/Down/Neutral Arrow Images -- Indicates whether a value has risen/fallen/stayed the same.
+        # Shared by every row.
+        self.arrow_images = {'up': tk.PhotoImage(file=dir_path("assets/arrow_up.png")),
+                             'down': tk.PhotoImage(file=dir_path("assets/arrow_down.png")),
+                             'same': tk.PhotoImage(file=dir_path("assets/arrow_side.png"))}
+
+        # Frame for the scrollbar and rows.
         self.scroll_frame = tk.Frame(self.window)
         self.scroll_frame.pack(side="top", fill="both", expand=True)
-        self.scroll_frame.bind('<Configure>', self.frame_configure)
-
-        # Scrollbar for TickerRow objects
-        self.scrollbar = tk.Scrollbar(self.scroll_frame, orient='vertical')
-        self.scrollbar.pack(side="right", fill="y")
 
-        # API Canvas
-        self.api_canvas = tk.Canvas(self.scroll_frame, yscrollcommand=self.scrollbar.set)
-        self.api_canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.configure(command=self.api_canvas.yview)
-
-        # API Frame -- TickerRow objects are put here.
-        # For the scrollbar to function properly with a canvas, api_frame cannot be packed or gridded. I don't know why.
-        self.api_frame = tk.Frame(self.api_canvas)
-        self.api_canvas.create_window((0, 0), window=self.api_frame, anchor='nw')
+        # TickerRow objects are shown here. Only the rows which fit in the window have widgets.
+        self.rows_view = VirtualRows(self.scroll_frame, self.ticker_rows, self.arrow_images)
+        # Order of ticker_rows and settings. Changes are passed on to rows_view.
+        self.row_order = RowOrder(self.ticker_rows, settings.dictionary['apis'])
+        self.row_order.listeners.append(self.rows_view.row_changed)
+        # Rows by URL and batch group, for TickerAPI.shared and request_url.
+        # Responses to URLs no row requests anymore are dropped from the FetchCache.
+        self.url_index = UrlIndex()
+        self.url_index.listeners.append(fetch_cache.forget)
         try:
             self.window.iconbitmap(dir_path("assets/yTicker.ico"))
         except Exception as error:
             print_thread(f'Error -- yTicker.ico not found: {error}')
 
         self.foreground()
+        # Draw the window before rows are loaded and fetched.
+        self.window.update()
         self.create_rows()
-        self.update()
+        self.start()
         self.window.mainloop()
 
     def on_close(self):
         """Called when main window is closed.
 
         Cancel all outstanding threaded timers.
+        Close pooled HTTP connections and write out any buffered log records.
+        Save the last value of every row to the snapshot file.
         Save current window geometry to settings.
         """
         for row in self.ticker_rows:
             row.update_cancel()
+        if self.engine is not None:
+            self.engine.close()
+        else:
+            self.scheduler.close()
+        self.session_pool.close()
+        self.metrics_server.close()
+        log_writer.close()
+        snapshot.save(row.api_object for row in self.ticker_rows)
+        print_thread(f'Fetch stats: {fetch_stats.snapshot()}')
         settings.dictionary['global']['geometry'] = f'{self.window.winfo_width()}x{self.window.winfo_height()}'
         settings.save()
         self.window.destroy()
 
-    def frame_configure(self, event):
-        """"Reset the scroll region to encompass the inner frame."
-        https://stackoverflow.com/a/3092341
-        """
-        self.api_canvas.config(scrollregion=self.api_canvas.bbox('all'))
-
     def create_rows(self):
         """Create a list of TickerRow objects with nested TickerAPI objects.
 
-        Data is fetched from settings file.
+        Data is fetched from settings file, in the order of each API's order key.
+        Last-known values are restored from the snapshot file, which is read once for every row.
         """
+        self.row_order.sort()
+        snapshot.load()
+        rows = []
         for api in settings.dictionary['apis']:
             name = api['name']
             url = api['url']
             refresh = api['refresh']
             term = api['term']
             decimals = api['decimals']
-            sequence = api['sequence']
             log = api['log']
             try:
-                api_object = TickerAPI(name, url, term, decimals, log)
-                self.ticker_rows.append(TickerRow(self, api_object, sequence, refresh))
+                api_object = TickerAPI(name, url, term, decimals, log, self.session_pool, api.get('batch'))
+                snapshot.restore(api_object)
+                rows.append(TickerRow(self, api_object, api, refresh))
             except Exception as error:
                 print_thread('Error -- Failed to Load API Data From settings file. Check settings integrity.')
                 print_thread(f'Error: {error}')
-        manage_urls(self.ticker_rows)
+        self.row_order.load(rows)
+        for row in self.ticker_rows:
+            self.url_index.add(row)
+        self.rows_view.refresh()
+
+    def start(self):
+        """Commence auto-updating in all TickerRow objects with a refresh rate.
+
+        The first fetches are spread over "startup_stagger" seconds, in display order, so rows in
+        view are fetched first and requests don't all go out at once. The Scheduler's or FetchEngine's
+        jitter is added on top, so rows sharing a refresh rate don't fire together on later periods.
+
+        Called on initialization.
+        """
+        rows = [row for row in self.ticker_rows if row.refresh and row.api_object]
+        stagger = settings.dictionary['global'].get('startup_stagger', 2)
+        print_thread('Requesting all API URLs...')
+        for i, row in enumerate(rows):
+            row.update(delay=stagger * i / len(rows))
+        self.save_snapshot(first=True)
+
+    def save_snapshot(self, first=False):
+        """Save the last value of every row to the snapshot file every "snapshot_interval" seconds.
+
+        Values are collected on the mainloop and written from a thread.
+        """
+        interval = settings.dictionary['global'].get('snapshot_interval', 60)
+        if not interval:
+            return
+        if not first:
+            rows = snapshot.collect(row.api_object for row in self.ticker_rows)
+            Thread(target=snapshot.write, args=(rows,)).start()
+        self.window.after(int(interval * 1000), self.save_snapshot)
 
     def update(self):
-        """Update API information in all TickerRow objects.
+        """Update API information in all TickerRow objects once, without moving their refresh schedules.
 
         Called when the refresh button is pressed.
         """
@@ -143,8 +208,15 @@ class Ticker:
             # update_idletasks() will cause values in rows to update as they come,
             # instead of all at once at the end.
             # self.window.update_idletasks()
-            if row.refresh and row.api_object and not row.api_object.minion:
-                Thread(target=row.update).start()
+            if row.refresh and row.api_object:
+                row.fetch_now()
+
+    def post(self, function):
+        """Run a function on the tkinter mainloop through Ticker.ui_queue. Safe to call from any thread.
+
+        Repeated posts of the same function before the next redraw are coalesced into one call.
+        """
+        self.ui_queue.put(function)
 
     def new_api(self):
         """Create TickerAPIProperties to add a new API to monitor.
@@ -186,62 +258,58 @@ class Ticker:
 class TickerRow:
     """An object of a row containing API data to be displayed within γTicker.
 
-    Contains the TickerAPI object.
+    Contains the TickerAPI object and a reference to its API's dictionary in settings.
+    Widgets belong to the RowView in Ticker.rows_view the row is bound to while it's scrolled
+    into view, else view is None.
     """
-    def __init__(self, Ticker, TickerAPI, sequence, refresh_in_seconds):
+    def __init__(self, Ticker, TickerAPI, api_settings, refresh_in_seconds):
         self.ticker_object = Ticker
         self.api_object = TickerAPI
+        self.api_settings = api_settings
         self.ticker_rows = self.ticker_object.ticker_rows
         self.window = self.ticker_object.window
-        self.frame = self.ticker_object.api_frame
-        self.sequence = sequence
         self.refresh = refresh_in_seconds
         self.name = str(self.api_object.name)
-        self.labels = []
-        self.padx = 0
-        self.pady = 0
         self.truncated = False
-        self.tooltip_val = None
+        self.view = None
+        self.menu = None
         self.auto_update = None
         self.api_properties = None
         self.alarm_window = None
         self.delete_window = None
+        # Enabled alarms compiled for alarm_check(). Reloaded by TickerAlarm when alarms are edited.
+        self.alarm_set = AlarmSet(self.api_settings['alarms'])
+
+        self.rename()
 
-        # Truncate long names.
+    @property
+    def sequence(self):
+        """Position of the row within Ticker.ticker_rows, from its order key.
+        """
+        return self.ticker_object.row_order.index(self)
+
+    def rename(self):
+        """Set the displayed name from TickerAPI.name, truncating long names.
+
+        Called on initialization and when the properties of a row are saved.
+        """
+        self.name = str(self.api_object.name)
+        self.truncated = False
         if len(self.name) > 24:
-            self.name = self.api_object.name[:22].strip()+'...'
+            self.name = self.name[:22].strip()+'...'
             self.truncated = True
+        if self.view is not None:
+            self.view.attach(self)
 
-        # Name Label
-        self.name_label = tk.Label(self.frame, text=self.name, anchor='w')
-        self.name_label.grid(row=self.sequence, column=0, padx=self.padx, pady=self.pady, sticky='we')
-        self.labels.append(self.name_label)
-        if self.truncated:
-            Tooltip(self.name_label, self.api_object.name, .2)
-
-        # Value Label
-        self.value_label = tk.Label(self.frame, anchor='w')
-        self.value_label.grid(row=self.sequence, column=1, padx=self.padx, pady=self.pady, sticky='we')
-        self.labels.append(self.value_label)
-
-        # Up/Down/Neutral Arrow Image -- Indicates whether the value has risen/fallen/stayed the same.
-        self.arrow_side_img = tk.PhotoImage(dir_path("assets/arrow_side.png"))
-        self.arrow_up_img = tk.PhotoImage(dir_path("assets/arrow_up.png"))
-        self.arrow_down_img = tk.PhotoImage(dir_path("assets/arrow_down.png"))
-        self.arrow = tk.Label(self.frame, anchor='w')
-        self.arrow.grid(row=self.sequence, column=2, padx=self.padx, pady=self.pady, sticky='we')
-        self.labels.append(self.arrow)
-
-        # Time Label
-        self.time_label = tk.Label(self.frame, anchor='w')
-        self.time_label.grid(row=self.sequence, column=3, padx=self.padx, pady=self.pady, sticky='we')
-        self.labels.append(self.time_label)
-
-        # Right-click Menu
-        # Got help from https://www.geeksforgeeks.org/right-click-menu-using-tkinter/
-        self.menu = tk.Menu(self.frame, tearoff=0)
-        self.menu.add_command(label='Refresh', command=lambda: Thread(target=self.update).start())
+    def create_menu(self):
+        """Create the right-click menu. Called the first time it's opened.
+
+        Got help from https://www.geeksforgeeks.org/right-click-menu-using-tkinter/
+        """
+        self.menu = tk.Menu(self.window, tearoff=0)
+        self.menu.add_command(label='Refresh', command=self.fetch_now)
         self.menu.add_command(label='Open Log', command=self.open_log)
+        self.menu.add_command(label='Open Log File', command=self.open_log_file)
         self.menu.add_command(label='Alarms', command=self.open_alarms)
         self.menu.add_separator()
         self.menu.add_command(label='Copy', command=self.copy)
@@ -249,40 +317,31 @@ class TickerRow:
         self.menu.add_separator()
         self.menu.add_command(label='Properties', command=self.open_properties)
 
-        # Bind the right-click popup menu to all items in the row.
-        self.name_label.bind('<Button-3>', self.rclick_menu)
-        self.value_label.bind('<Button-3>', self.rclick_menu)
-        self.arrow.bind('<Button-3>', self.rclick_menu)
-        self.time_label.bind('<Button-3>', self.rclick_menu)
-
-        # Bind properties menu to doubleclicking.
-        self.name_label.bind('<Double-Button-1>', self.open_properties)
-        self.value_label.bind('<Double-Button-1>', self.open_properties)
-        self.arrow.bind('<Double-Button-1>', self.open_properties)
-        self.time_label.bind('<Double-Button-1>', self.open_properties)
-
-        self.change_font()
-
     def rclick_menu(self, event):
         """Bound popup menu to right click which brings up a menu at the position of the mouse cursor.
+
+        Right-clicks on a RowView are passed on here.
         """
+        if self.menu is None:
+            self.create_menu()
         try:
             self.menu.tk_popup(event.x_root, event.y_root)
         finally:
             self.menu.grab_release()
 
     def open_log(self):
-        """Attempt to open the associated log file in the default text editor.
+        """Open a LogViewer paging through the associated log.
+        """
+        print_thread(f'{self.name}: Opening Log')
+        LogViewer(self)
+
+    def open_log_file(self):
+        """Attempt to open the associated text log file in the default text editor.
 
         Tries for Windows, OSX, Linux.
         """
-        # Construct log name and try to read it to test if log exists.
-        log_name = self.api_object.name.replace(' ', '_')
-        for char in ['\\', '/', ':', '"', '*', '?', '<', '>', '|']:
-            log_name = log_name.replace(char, "")
-        try:
-            open(f'logs/{log_name}.txt', 'r').read()
-        except FileNotFoundError:
+        log_name = self.api_object.log_name
+        if not path.exists(f'logs/{log_name}.txt'):
             print_thread(f'{self.name}: No Log to Open')
         # Log exists:
         else:
@@ -310,6 +369,7 @@ class TickerRow:
             self.alarm_window = None
 
         if self.alarm_window is None:
+            from alarms import TickerAlarm
             print_thread(f'{self.name}: Opening Alarms')
             self.alarm_window = TickerAlarm(self)
             self.alarm_window.alarm_window.bind('<Escape>', on_close)
@@ -320,6 +380,7 @@ class TickerRow:
 
         Called when "Copy" is selected from right-click menu.
         """
+        from pyperclip import copy as pyperclip_copy
         if self.api_object.truncated:
             clipboard = str(self.api_object.value)
         else:
@@ -358,28 +419,100 @@ class TickerRow:
             self.api_properties = TickerAPIProperties(self, self.ticker_rows)
             self.api_properties.properties_window.protocol('WM_DELETE_WINDOW', on_close)
 
-    def update(self):
+    def update(self, delay=None):
         """Send request, check alarm triggers, and update value, arrow, and time.
 
-        Auto-updated with a threaded timer if there is a refresh value;
+        Auto-updated by Ticker.scheduler if there is a refresh value;
         Individual refresh rates are determined by values in settings.
+
+        With a delay, the first fetch is made by the scheduler after delay seconds plus the
+        scheduler's jitter, rather than now.
+        Rows in a batch group are lined up on the group's deadlines by UrlIndex.align() instead of
+        being jittered, so the group's combined URL is requested once per refresh.
+
+        With Ticker.engine, scheduling and fetching are handed to the FetchEngine instead.
+        Either way, tick() posts display() to the tkinter mainloop once the fetch is done.
         """
+        url_index = self.ticker_object.url_index
+        engine = self.ticker_object.engine
+        if engine is not None:
+            self.update_cancel()
+            if not self.refresh:
+                engine.schedule(None, self.tick, delay=delay or 0)
+                return
+            # The FetchEngine jitters the second deadline, so that's where the group's deadlines start.
+            deadline = url_index.align(self.api_object, self.refresh,
+                                       monotonic() + (delay or 0) + engine.offset(self.refresh))
+            if deadline is None:
+                self.auto_update = engine.schedule(self.refresh, self.tick, delay=delay or 0)
+                return
+            self.auto_update = engine.schedule(self.refresh, self.tick, delay=max(deadline - monotonic(), 0),
+                                               jitter=0.0)
+            if delay is None:
+                engine.schedule(None, self.tick)
+            return
+
         # Commence auto-update.
-        if self.refresh and not self.api_object.minion:
+        if self.refresh:
             self.update_cancel()
-            self.auto_update = TimerThread(self.refresh, self.update)
-            self.auto_update.start()
+            scheduler = self.ticker_object.scheduler
+            first = (delay if delay is not None else self.refresh) + scheduler.offset(self.refresh)
+            deadline = url_index.align(self.api_object, self.refresh, monotonic() + first)
+            if deadline is not None:
+                first = max(deadline - monotonic(), 0)
+            self.auto_update = scheduler.schedule(self.refresh, self.tick, delay=first)
+            if delay is not None:
+                return
+
+        self.tick()
+
+    def fetch_now(self):
+        """Fetch once now on a worker, leaving the row's refresh schedule where it is.
+        Called by the refresh button and the right-click menu.
+        """
+        engine = self.ticker_object.engine
+        if engine is not None:
+            engine.schedule(None, self.tick)
+        else:
+            self.ticker_object.scheduler.executor.submit(self.tick)
+
+    def tick(self):
+        """Fetch, then display on the mainloop. Called by Ticker.scheduler or Ticker.engine on every refresh.
 
-        # Send Request, Match Values
-        self.api_object.scrape_api()
-        self.api_object.match_value()
+        Whether to redraw is decided here, when the fetch finishes: a request skipped while backing off
+        posts nothing, so it can't cancel the redraw of a change posted before it. Unchanged responses
+        only post display_time(), which leaves the other widgets alone.
+
+        return the seconds after which to fetch again when the request is waiting for a rate limit token.
+        """
+        self.fetch()
+        if not self.api_object.throttled:
+            self.ticker_object.post(self.display_time if self.api_object.unchanged else self.display)
+        return self.api_object.retry
 
-        # Alarms
-        self.alarm_check()
+    def fetch(self):
+        """Send request, match values, and check alarm triggers. Runs on worker threads.
 
-        # Update Labels
+        Unchanged responses keep the value from last time, which is still checked against alarms
+        as another observation.
+        """
+        self.api_object.scrape_api(self.refresh)
+        if not self.api_object.unchanged:
+            self.api_object.match_value()
+        if not self.api_object.throttled:
+            self.alarm_check()
+
+    def display(self):
+        """Update value, arrow, and time. Runs on the tkinter mainloop, posted by tick().
+        """
         self.update_labels()
 
+    def display_time(self):
+        """Update the time label only. Runs on the tkinter mainloop, posted by tick() for unchanged responses.
+        """
+        if self.view is not None:
+            self.view.show_time()
+
     def update_cancel(self):
         """Cancel auto-updating.
         """
@@ -388,57 +521,39 @@ class TickerRow:
             self.auto_update = None
 
     def update_labels(self):
-        """Update value, arrow, and time labels.
+        """Update value, arrow, time labels, and sparkline if the row is scrolled into view.
 
-        Called after a TickerAPI scrape and when a TickerAPI
-        is acting as a "master" to other objects with the same URL.
-        """
-        # Update Value
-        self.value_label.configure(text=self.api_object.value_formatted)
-
-        # Display very long values which have been truncated in tooltip dialogue.
-        if self.api_object.truncated:
-            Tooltip(self.value_label, str(self.api_object.value), .2)
-        else:
-            self.value_label.unbind('<Enter>')
+        Rows out of view are drawn by RowView.attach() when they're scrolled into view.
 
-        # Update up/down arrow
-        if self.api_object.change == 'up':
-            self.arrow.configure(image=self.arrow_up_img)
-        elif self.api_object.change == 'down':
-            self.arrow.configure(image=self.arrow_down_img)
-        elif self.api_object.change == 'same':
-            self.arrow.configure(image=self.arrow_side_img)
-
-        # Update time -- Time is gotten just before api scrape.
-        self.time_label.configure(text=self.api_object.time)
+        Called after a TickerAPI scrape and when the properties of a row are saved.
+        """
+        if self.view is not None:
+            self.view.show()
 
     def alarm_check(self):
-        """Check if an alarm has been triggered, called in update()
+        """Check if an alarm has been triggered, called in fetch()
 
-        Create an AlarmNotification window and disable alarm when triggered.
+        Post an AlarmNotification window to the mainloop and disable alarm when triggered.
         """
         try:
-            alarms = settings.dictionary['apis'][self.sequence]['alarms']
-            if alarms and is_float(self.api_object.value):
-                for i in range(len(alarms)):
-                    if alarms[i]['enabled']:
-                        inequality_str = f"{self.api_object.value} {alarms[i]['inequality']+'='} {alarms[i]['value']}"
-                        if eval(inequality_str):
-                            text = f'{self.name}: {inequality_str}'
-                            print_thread(f'ALARM: {text}')
-                            print_thread(f'Disabing {self.name} Alarm')
-                            # Alarm Notification Window
-                            AlarmNotification(self.window, text)
-                            # Turn alarm off.
-                            settings.dictionary['apis'][self.sequence]['alarms'][i]['enabled'] = False
-                            settings.save()
+            if self.alarm_set and is_float(self.api_object.value):
+                for alarm in self.alarm_set.check(float(self.api_object.value), self.api_object.timestamp or 0.0):
+                    inequality_str = f"{self.api_object.value} {describe_alarm(alarm)}"
+                    text = f'{self.name}: {inequality_str}'
+                    print_thread(f'ALARM: {text}')
+                    print_thread(f'Disabing {self.name} Alarm')
+                    # Alarm Notification Window
+                    from alarms import AlarmNotification
+                    self.ticker_object.post(lambda text=text: AlarmNotification(self.window, text))
+                    # Turn alarm off.
+                    alarm['enabled'] = False
+                    settings.mark_dirty()
         except Exception as error:
             print_thread(f'Alarm Error: {error}')
 
     def delete(self):
-        """Delete a row within γTicker and remove corresponding entry from settings file.
-        Reorder all rows within Ticker.ticker_rows by calling reorder_rows(ticker_rows)
+        """Delete a row within γTicker and remove corresponding entry from settings file
+        through Ticker.row_order.
 
         Ask confirmation from a new window.
         """
@@ -450,15 +565,11 @@ class TickerRow:
             print_thread(f'Delete Confirmed: Deleting {self.name}')
             # Stop auto-updating.
             self.update_cancel()
-            # Remove self from tkinter Ticker.canvas
-            for item in self.frame.grid_slaves():
-                if int(item.grid_info()['row']) == self.sequence:
-                    item.grid_forget()
-            # Delete api_object and reorder rows to delete self from settings and ticker_rows.
+            # Remove self from settings, ticker_rows, Ticker.rows_view, Ticker.url_index, and metrics, and delete api_object.
+            self.ticker_object.row_order.remove(self)
+            self.ticker_object.url_index.remove(self)
+            metrics.forget(self.api_object.name, self.api_object.url)
             self.api_object = None
-            reorder_rows(self.ticker_rows)
-            # If there are other rows with the same URL, begin updating one if it isn't already.
-            manage_urls(self.ticker_rows, update=True)
             close()
 
         def close(event=True):
@@ -499,26 +610,6 @@ class TickerRow:
 
         print_thread(f'Delete {self.name}?')
 
-    def change_font(self):
-        """Changes font size within row based on global settings:
-
-        Small = 9, Medium = 12, Large = 16
-
-        Called at the end of initialization and from TickerPreferences with Ticker.ticker_rows list.
-        """
-        size = settings.dictionary['global']['text']
-        font = 'TkDefaultFont'
-        if size == 'Large':
-            row_font = (font, 16)
-        elif size == 'Medium':
-            row_font = (font, 12)
-        else:
-            row_font = (font, 9)
-
-        self.name_label.configure(font=row_font)
-        self.value_label.configure(font=row_font)
-        self.time_label.configure(font=row_font)
-
 
 class TickerAPIProperties:
     """Create/edit an API's properties for γTicker to monitor.
@@ -535,9 +626,10 @@ class TickerAPIProperties:
         self.parent_object = parent_object
         self.ticker_rows = ticker_rows
         self.new = new
+        self.ticker_object = parent_object if self.new else parent_object.ticker_object
         if not self.new:
             self.api_object = parent_object.api_object
-            self.sequence = parent_object.sequence
+            self.api_settings = parent_object.api_settings
 
         # Child Window
         self.properties_window = tk.Toplevel(parent_object.window)
@@ -586,7 +678,7 @@ class TickerAPIProperties:
         self.term_label.grid(row=3, column=0, padx=padx, pady=pady, sticky='w')
         self.term_entry = tk.Entry(self.entry_canvas)
         self.term_entry.grid(row=3, column=1, padx=padx, pady=pady, columnspan=2, sticky='w')
-        Tooltip(self.term_label, 'The Desired Value From the API')
+        Tooltip(self.term_label, 'The Desired Value From the API, e.g. price or data.0.price')
 
         # Decimal Places (for formatting) -- With Validation
         self.decimals_label = tk.Label(self.entry_canvas, text='Decimal Places')
@@ -677,13 +769,13 @@ class TickerAPIProperties:
         # When altering existing API properties, collect values from settings file and set the entry boxes accordingly.
         else:
             print_thread(f'{self.parent_object.name}: Opening Properties')
-            properties = settings.dictionary['apis'][self.sequence]
+            properties = self.api_settings
             self.name_entry.insert(0, str(properties['name']))
             if properties['url'] is not None:
                 self.url_entry.insert(0, str(properties['url']))
             self.refresh_entry.insert(0, str(properties['refresh']))
             self.decimals_entry.insert(0, str(properties['decimals']))
-            self.sequence_entry.insert(0, str(properties['sequence']+1))
+            self.sequence_entry.insert(0, str(self.parent_object.sequence+1))
             if properties['term'] is not None:
                 self.term_entry.insert(0, str(properties['term']))
             if properties['log']:
@@ -721,8 +813,8 @@ class TickerAPIProperties:
                 entries[key] = entries[key][:80]
             elif key == 'url' and val is not None and len(val) > 2048:
                 entries[key] = entries[key][:2048]
-            elif key == 'term' and val is not None and len(val) > 30:
-                entries[key] = entries[key][:30]
+            elif key == 'term' and val is not None and len(val) > 120:
+                entries[key] = entries[key][:120]
             elif key == 'refresh' and val == '0':
                 entries[key] = None
             elif key == 'refresh' and val is not None and len(val) > 7:
@@ -738,46 +830,47 @@ class TickerAPIProperties:
             elif key == 'sequence' and val == '0':
                 entries[key] = int(val)
 
+        # The order number is kept as the row's position rather than in settings.
+        sequence = entries.pop('sequence')
+
         if self.new:
             # Create new api entry in settings file.
             entries['alarms'] = []
-            settings.dictionary['apis'].append({})
-            for key in entries.keys():
-                settings.dictionary['apis'][-1][key] = entries[key]
             # Create new TickerAPI object
             new_api_object = TickerAPI(entries['name'], entries['url'], entries['term'],
-                                       entries['decimals'], entries['log'])
-            # Create new TickerRow object and append it to ticker_rows
-            new_row_object = TickerRow(self.parent_object, new_api_object, entries['sequence'], entries['refresh'])
-            self.ticker_rows.append(new_row_object)
+                                       entries['decimals'], entries['log'], self.parent_object.session_pool)
+            # Create new TickerRow object and insert it into ticker_rows and settings at its order number.
+            new_row_object = TickerRow(self.parent_object, new_api_object, entries, entries['refresh'])
+            self.ticker_object.row_order.insert(new_row_object, sequence)
             # Determine if a URL is shared between rows.
-            manage_urls(self.ticker_rows)
-            # Commence auto-updating if there is a refresh rate and its not a minion.
-            if new_row_object.refresh and not new_row_object.api_object.minion:
+            self.ticker_object.url_index.add(new_row_object)
+            # Commence auto-updating if there is a refresh rate.
+            if new_row_object.refresh:
                 new_row_object.update()
 
         # When altering existing properties:
         else:
             # Modify settings file.
             for key in entries.keys():
-                settings.dictionary['apis'][self.sequence][key] = entries[key]
+                self.api_settings[key] = entries[key]
 
-            # Modify the TickerAPI object.
+            # Modify the TickerAPI object. History of a different URL or term isn't comparable.
+            if entries['url'] != self.api_object.url or entries['term'] != self.api_object.term:
+                self.api_object.history.clear()
+            # The row's age is reported again under its new name and URL once it next succeeds.
+            metrics.forget(self.api_object.name, self.api_object.url)
             self.api_object.name = str(entries['name'])
+            self.api_object.log_name = log_name(self.api_object.name)
             self.api_object.url = entries['url']
             self.api_object.term = entries['term']
             self.api_object.decimals = entries['decimals']
             self.api_object.log = entries['log']
+            self.api_object.batch = self.api_settings.get('batch')
+            self.api_object.compile_term()
+            self.api_object.forget_response()
 
             # Modify the TickerRow object.
-            # Truncate long names
-            if len(str(entries['name'])) > 24:
-                entries['name'] = entries['name'][:22].strip()+'...'
-                Tooltip(self.parent_object.name_label, self.api_object.name, .2)
-            else:
-                self.parent_object.name_label.unbind('<Enter>')
-            self.parent_object.name_label.configure(text=str(entries['name']))
-            self.parent_object.sequence = entries['sequence']
+            self.parent_object.rename()
 
             # If the refresh rate has changed, call TickerRow.update() at the end.
             old_refresh = self.parent_object.refresh
@@ -787,22 +880,23 @@ class TickerAPIProperties:
             else:
                 self.parent_object.refresh = None
                 self.parent_object.update_cancel()
-                # If there is another object with the same URL and it has a refresh rate, start updating it.
-                manage_urls(self.ticker_rows, update=True)
-            # Sort master and minons for objects that share a URL.
-            manage_urls(self.ticker_rows)
-            # print(self.parent_object.api_object.minion)
-            # If refresh has changed, update object if it is not a URL minion.
-            if (old_refresh != self.parent_object.refresh and self.parent_object.refresh is not None
-                    and not self.parent_object.api_object.minion):
+            # Determine if a URL is shared between rows and recombine the URL of its batch group.
+            request_urls = {row: row.api_object.request_url for row in self.ticker_rows if row.api_object}
+            self.ticker_object.url_index.update(self.parent_object)
+            # Other rows joining or leaving a batch group with this one are lined up on its deadlines.
+            for row, request_url in request_urls.items():
+                if row is not self.parent_object and row.refresh and row.api_object.request_url != request_url:
+                    row.update(delay=0)
+            # If refresh or batch group has changed, update object.
+            regrouped = self.parent_object.api_object.request_url != request_urls.get(self.parent_object)
+            if self.parent_object.refresh is not None and (old_refresh != self.parent_object.refresh or regrouped):
                 Thread(target=self.parent_object.update).start()
-            # If it is a minion, check if another object has the same URL and start updating it.
-            elif self.parent_object.api_object.minion:
-                manage_urls(self.ticker_rows, update=True)
             # Else try to match a new value and update labels.
             else:
                 self.parent_object.api_object.match_value()
                 self.parent_object.update_labels()
 
-        # settings.save() is not needed as it will occur at the end of reorder_rows()
-        reorder_rows(self.ticker_rows)
+            # Move the row if its order number has changed.
+            self.ticker_object.row_order.move(self.parent_object, sequence)
+
+        settings.mark_dirty()
@@ -1,176 +1,17 @@
 # γTicker other classes for classes.py
-# TickerAPI, TickerPreferences, Tooltip
+# TickerPreferences, StatsWindow, VirtualRows, RowView, Sparkline, LogViewer, Tooltip
 
 import tkinter as tk
 from tkinter import ttk
-from requests import get as requests_get
-from json import loads
-from os import path, mkdir
+from collections import deque
+from itertools import islice
+from threading import Thread
+from time import time, localtime, strftime, mktime, strptime
 from settings import settings
-from functions import is_float, dict_search, get_time, print_thread
-
-
-class TickerAPI:
-    """Object to fetch, store, and log values from APIs.
-    """
-    def __init__(self, name, url, term, decimals, log):
-        self.name = name
-        self.url = url
-        self.term = term
-        self.decimals = decimals
-        self.log = log
-        self.log_name = None
-        self.value = None
-        self.value_old = None
-        self.value_formatted = None
-        self.change = None
-        self.time = None
-        self.date_time = None
-        self.truncated = False
-        self.api_dict = {}
-        self.master_list = []
-        self.minion = False
-
-    def get_times(self):
-        """Get the time and date+time. Called immediately before an API scrape.
-        """
-        self.time, self.date_time = get_time(), get_time(date=True)
-
-    def scrape_api(self):
-        """Retrieve and store a dictionary from an API URL.
-
-        Scraped with requests library.
-        String converted to dictionary with json.loads
-        """
-        self.get_times()
-        print_thread(f'{self.name}: Requesting at {self.time}')
-        try:
-            request_results = requests_get(self.url)
-        except Exception:
-            self.value = self.value_formatted = 'Invalid URL'
-            print_thread(f'{self.name}: Invalid URL')
-        else:
-            try:
-                self.api_dict = loads(request_results.text)
-            except Exception:
-                self.value = self.value_formatted = 'Invalid API'
-                print_thread(f'{self.name}: Invalid API')
-
-    def match_value(self):
-        """Retrieve and store a desired value from an API dictionary.
-
-        Attempt to match a value with a given term, otherwise
-        the value will be the entire json object.
-
-        Format and log value.
-        Determine if numeric value has changed for self.change (arrow).
-        """
-        # Reset truncation in the event that a long, truncated value is replaced by a short one
-        # so that there will be no tooltip dialogue.
-        self.truncated = False
-
-        # Get the old value before new value is retrieved to determine if it has risen/fallen.
-        if self.value is not None:
-            self.value_old = self.value
-        self.value = None
-
-        # Attempt to match the value with the given term.
-        if self.term is not None:
-            try:
-                self.value = dict_search(self.api_dict, self.term, recursion=False)
-                if self.value is None:
-                    self.value = dict_search(self.api_dict, self.term)
-            except Exception as error:
-                print_thread(f'Error -- Recursive API Value Matching Failed: {error}')
-                self.value = None
-        # If there isn't a given term, assign json dictionary to value.
-        elif self.term is None and self.api_dict:
-            self.value = self.api_dict
-
-        if self.value is not None:
-            if is_float(self.value):
-                self.value = float(self.value)
-                # Format value. Keep original and formatted value separate for precise alarm matching/inequalities.
-                if self.decimals is not None:
-                    try:
-                        self.value_formatted = format(self.value, f'.{self.decimals}f')
-                        if len(str(self.value_formatted)) > 32:
-                            self.value_formatted = str(self.value_formatted)[:29].strip()+'...'
-                            self.truncated = True
-                    except Exception as error:
-                        print_thread(f'Error -- Value Formatting Failed: {error}')
-                        self.value_formatted = str(self.value)
-                else:
-                    self.value_formatted = str(self.value)
-                print_thread(f'{self.name}: {self.value_formatted}')
-                # Determine if value has risen/fallen/stayed the same.
-                if is_float(self.value_old):
-                    try:
-                        if self.value > self.value_old:
-                            self.change = 'up'
-                        elif self.value < self.value_old:
-                            self.change = 'down'
-                        else:
-                            self.change = 'same'
-                    except Exception as error:
-                        print_thread(f'Error -- Change Arrow Not Determinable: {error}')
-            # If the value isn't floatable, format it as a string.
-            else:
-                self.value_formatted = str(self.value)
-                # Truncate long values.
-                if len(str(self.value)) > 32:
-                    self.value_formatted = str(self.value)[:29].strip()+'...'
-                    self.truncated = True
-                print_thread(f'{self.name}: {self.value_formatted}')
-            # Log data
-            if self.log:
-                self.logger(self.value)
-
-        # Pass api_dict to other items in master list if there is one.
-        if self.master_list:
-            self.distribute_api()
-
-    def distribute_api(self):
-        """Called when there is a master_list.
-
-        Distribute scraped api_dict to other objects with the same URL.
-        Match value, check alarms, and update TickerRow labels.
-        """
-        for row in self.master_list:
-            row.api_object.api_dict = self.api_dict
-            row.api_object.time = self.time
-            row.api_object.date_time = self.date_time
-            row.api_object.match_value()
-            row.alarm_check()
-            row.update_labels()
-
-    def logger(self, value):
-        """Log data as it is retrieved to the log directory.
-
-        Individual values are logged separately from one another and can be separated by days.
-
-        Values are appended to files.
-        """
-        try:
-            if not path.exists('logs'):
-                mkdir('logs')
-        except Exception as error:
-            print_thread(f'{self.name}: log directory could not be created -- {error}')
-        finally:
-            try:
-                # Filename: Replace spaces with underscores and remove problem characters.
-                log_name = self.name.replace(' ', '_')
-                for char in ['\\', '/', ':', '"', '*', '?', '<', '>', '|']:
-                    log_name = log_name.replace(char, "")
-                self.log_name = log_name
-                # with open(f'logs\\{name}_{date}.txt', 'a') as stream:
-                #     stream.write(f'[{time}]\n{value}\n\n')
-                with open(f'logs/{log_name}.txt', 'a') as stream:
-                    stream.write(f'[{self.date_time}]\n{value}\n\n')
-            except Exception as error:
-                print_thread(f'{self.name}: Logging Failed -- {error}')
-            else:
-                print_thread(f'{self.name}: Logging to logs\\{log_name}.txt')
+from logs import read_log
+from network import fetch_stats
+from metrics import metrics
+from functions import print_thread
 
 
 class TickerPreferences:
@@ -217,6 +58,11 @@ class TickerPreferences:
                                                command=self.toggle_fore, variable=self.fore_var)
         self.foreground_check.grid(row=1, column=0, padx=padx, pady=pady, columnspan=2, sticky='w')
 
+        # Fetch Stats Button -- Open a StatsWindow
+        self.stats_button = tk.Button(self.preferences_window, text='Fetch Stats',
+                                      command=lambda: StatsWindow(self.window))
+        self.stats_button.grid(row=2, column=0, padx=padx, pady=pady, columnspan=2, sticky='w')
+
         # OK Button -- Save settings and close window
         self.ok_button = tk.Button(self.preferences_window, text='OK', width=8, command=self.save_close)
         self.ok_button.grid(row=3, column=0, padx=padx, pady=pady, sticky='e')
@@ -296,8 +142,449 @@ class TickerPreferences:
         self.parent_object.foreground()
 
         # Change text size in each row.
-        for row in self.ticker_rows:
-            row.change_font()
+        self.parent_object.rows_view.change_font()
+
+
+class StatsWindow:
+    """Window showing fetch latency, errors, and bytes per URL, and how stale each row is,
+    from metrics.metrics. Refreshed every few seconds while open.
+
+    Opened from TickerPreferences.
+    """
+    def __init__(self, window, interval=2000):
+        self.interval = interval
+        x, y = window.winfo_rootx(), window.winfo_rooty()
+        self.stats_window = tk.Toplevel(window)
+        self.stats_window.geometry(f'+{x}+{y}')
+        self.stats_window.title('γTicker Fetch Stats')
+        self.stats_window.bind('<Escape>', lambda event: self.stats_window.destroy())
+
+        columns = ('requests', 'errors', 'mean', 'p95', 'bytes')
+        self.url_tree = ttk.Treeview(self.stats_window, columns=columns, height=8)
+        self.url_tree.heading('#0', text='URL')
+        self.url_tree.column('#0', width=280)
+        for column, text in zip(columns, ['Requests', 'Errors', 'Mean ms', 'p95 ms', 'KB']):
+            self.url_tree.heading(column, text=text)
+            self.url_tree.column(column, width=70, anchor='e')
+        self.url_tree.grid(row=0, column=0, padx=4, pady=2, sticky='nsew')
+
+        self.row_tree = ttk.Treeview(self.stats_window, columns=('url', 'age'), height=8)
+        self.row_tree.heading('#0', text='Row')
+        self.row_tree.heading('url', text='URL')
+        self.row_tree.column('url', width=210)
+        self.row_tree.heading('age', text='Seconds Since Update')
+        self.row_tree.column('age', width=140, anchor='e')
+        self.row_tree.grid(row=1, column=0, padx=4, pady=2, sticky='nsew')
+
+        self.totals_label = tk.Label(self.stats_window, anchor='w', justify='left')
+        self.totals_label.grid(row=2, column=0, padx=4, pady=2, sticky='we')
+        self.stats_window.grid_columnconfigure(0, weight=1)
+        self.stats_window.grid_rowconfigure(0, weight=1)
+        self.stats_window.grid_rowconfigure(1, weight=1)
+        self.refresh()
+
+    def refresh(self):
+        if not self.stats_window.winfo_exists():
+            return
+        urls, ages, drift = metrics.summary()
+        self.url_tree.delete(*self.url_tree.get_children())
+        for url, stats in sorted(urls.items(), key=lambda item: -item[1]['mean']):
+            self.url_tree.insert('', 'end', text=url, values=(stats['requests'], stats['errors'],
+                                                              f"{stats['mean'] * 1000:.0f}", f"{stats['p95'] * 1000:.0f}",
+                                                              f"{stats['bytes'] / 1000:.1f}"))
+        self.row_tree.delete(*self.row_tree.get_children())
+        for (row, url), age in sorted(ages.items(), key=lambda item: -item[1]):
+            self.row_tree.insert('', 'end', text=row, values=(url, f'{age:.0f}'))
+        counts = fetch_stats.snapshot()
+        self.totals_label.configure(text=f"Requests: {counts['requests']}   Cache hits: {counts['cache_hits']}   "
+                                         f"Hit rate: {counts['hit_rate']:.0%}\n"
+                                         f"Timer drift: {drift[0] * 1000:.0f} ms mean, {drift[1] * 1000:.0f} ms p95")
+        self.stats_window.after(self.interval, self.refresh)
+
+
+class VirtualRows:
+    """Scrollable list of Ticker.ticker_rows with widgets only for the lines which fit in the window.
+
+    A RowView is created for each visible line and rebound to another TickerRow when scrolling, so
+    startup and scrolling cost the same with 10 rows or 1000. refresh() only rebinds lines whose
+    TickerRow has changed, e.g. after rows are moved, added, or deleted through Ticker.row_order.
+    """
+    def __init__(self, tk_frame, ticker_rows, arrows):
+        self.ticker_rows = ticker_rows
+        self.arrows = arrows
+        self.views = []
+        self.first = 0
+        self.lines = 1
+        self.line_height = 1
+        self.font = None
+
+        # Scrollbar for TickerRow objects
+        self.scrollbar = tk.Scrollbar(tk_frame, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Lines are gridded here. The frame keeps its size rather than fitting the lines in it.
+        self.frame = tk.Frame(tk_frame)
+        self.frame.pack(side="left", fill="both", expand=True)
+        self.frame.grid_propagate(False)
+        self.frame.bind('<Configure>', self.resize)
+        self.bind_wheel(self.frame)
+        self.bind_wheel(self.scrollbar)
+
+        self.change_font()
+
+    def change_font(self):
+        """Changes font size within rows based on global settings:
+
+        Small = 9, Medium = 12, Large = 16
+
+        Called on initialization and from TickerPreferences.
+        """
+        size = settings.dictionary['global']['text']
+        font = 'TkDefaultFont'
+        if size == 'Large':
+            self.font = (font, 16)
+        elif size == 'Medium':
+            self.font = (font, 12)
+        else:
+            self.font = (font, 9)
+
+        probe = tk.Label(self.frame, text='0', font=self.font)
+        self.line_height = probe.winfo_reqheight()
+        probe.destroy()
+        for view in self.views:
+            view.change_font(self.font)
+        self.resize()
+
+    def resize(self, event=None):
+        """Create enough lines to fill the height of the frame. Bound to <Configure>.
+        """
+        self.lines = max(1, self.frame.winfo_height() // self.line_height)
+        # Plus one for a partly visible line at the bottom.
+        while len(self.views) < self.lines + 1:
+            view = RowView(self.frame, len(self.views), self.arrows)
+            view.change_font(self.font)
+            for widget in view.widgets:
+                self.bind_wheel(widget)
+            self.views.append(view)
+        self.refresh()
+
+    def refresh(self):
+        """Bind each line to the TickerRow scrolled into it, leaving lines with the same row alone.
+
+        Called when scrolling and by row_changed().
+        """
+        total = len(self.ticker_rows)
+        self.first = max(0, min(self.first, total - self.lines))
+        for i, view in enumerate(self.views):
+            index = self.first + i
+            row = self.ticker_rows[index] if i <= self.lines and index < total else None
+            if view.row is not row:
+                view.attach(row)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.lines) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def row_changed(self, change, index, new_index=None):
+        """Listener for RowOrder change events: ('insert', index), ('delete', index), or ('move', index, new_index).
+
+        Changes above the lines in view shift the first line so the same rows stay in view,
+        then only lines showing a different row are rebound.
+        """
+        if change == 'insert' and index < self.first:
+            self.first += 1
+        elif change == 'delete' and index < self.first:
+            self.first -= 1
+        elif change == 'move' and index < self.first <= new_index:
+            self.first -= 1
+        elif change == 'move' and new_index < self.first <= index:
+            self.first += 1
+        self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', number, 'units' or 'pages').
+        """
+        if args[0] == 'moveto':
+            self.first = round(float(args[1]) * len(self.ticker_rows))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self.first += step * self.lines if args[2] == 'pages' else step
+        self.refresh()
+
+    def bind_wheel(self, widget):
+        """Scroll with the mouse wheel over a widget. <MouseWheel> on Windows and OSX, <Button-4/5> on Linux.
+        """
+        widget.bind('<MouseWheel>', self.wheel)
+        widget.bind('<Button-4>', self.wheel)
+        widget.bind('<Button-5>', self.wheel)
+
+    def wheel(self, event):
+        self.yview('scroll', -1 if event.num == 4 or event.delta > 0 else 1, 'units')
+
+
+class RowView:
+    """Name, value, arrow, and time labels, and a sparkline, for one line of VirtualRows.
+
+    Shows whichever TickerRow is attached, and passes right-clicks and double-clicks on to it.
+    """
+    def __init__(self, tk_frame, line, arrows, padx=0, pady=0):
+        self.row = None
+        self.arrows = arrows
+        self.name_label = tk.Label(tk_frame, anchor='w')
+        self.value_label = tk.Label(tk_frame, anchor='w')
+        self.arrow = tk.Label(tk_frame, anchor='w')
+        self.time_label = tk.Label(tk_frame, anchor='w')
+        # Sparkline -- Recent values from TickerAPI.history.
+        self.sparkline = Sparkline(tk_frame, None)
+        self.widgets = [self.name_label, self.value_label, self.arrow, self.time_label, self.sparkline.canvas]
+        for column, widget in enumerate(self.widgets):
+            widget.grid(row=line, column=column, padx=padx, pady=pady, sticky='we')
+            widget.bind('<Button-3>', self.rclick_menu)
+            # Bind properties menu to doubleclicking.
+            if widget is not self.sparkline.canvas:
+                widget.bind('<Double-Button-1>', self.open_properties)
+
+    def rclick_menu(self, event):
+        if self.row is not None:
+            self.row.rclick_menu(event)
+
+    def open_properties(self, event=True):
+        if self.row is not None:
+            self.row.open_properties()
+
+    def change_font(self, font):
+        self.name_label.configure(font=font)
+        self.value_label.configure(font=font)
+        self.time_label.configure(font=font)
+
+    def attach(self, row):
+        """Show a TickerRow in this line, or nothing with None.
+        """
+        if self.row is not None and self.row.view is self:
+            self.row.view = None
+        self.row = row
+        if row is None:
+            self.name_label.configure(text='')
+            self.name_label.unbind('<Enter>')
+            self.value_label.configure(text='')
+            self.value_label.unbind('<Enter>')
+            self.arrow.configure(image='')
+            self.time_label.configure(text='')
+            self.sparkline.attach(None)
+            return
+        row.view = self
+        self.name_label.configure(text=row.name)
+        if row.truncated:
+            Tooltip(self.name_label, row.api_object.name, .2)
+        else:
+            self.name_label.unbind('<Enter>')
+        self.sparkline.attach(row.api_object.history)
+        self.show()
+
+    def show(self):
+        """Update value, arrow, time labels, and sparkline from the attached row's TickerAPI.
+
+        Called when attached and from TickerRow.update_labels().
+        """
+        api_object = self.row.api_object
+        self.value_label.configure(text=api_object.value_formatted or '')
+
+        # Display very long values which have been truncated in tooltip dialogue.
+        if api_object.truncated:
+            Tooltip(self.value_label, str(api_object.value), .2)
+        else:
+            self.value_label.unbind('<Enter>')
+
+        # Up/Down/Neutral Arrow -- Indicates whether the value has risen/fallen/stayed the same.
+        self.arrow.configure(image=self.arrows.get(api_object.change, ''))
+
+        # Time is gotten just before api scrape.
+        self.time_label.configure(text=api_object.time or '')
+
+        self.sparkline.update()
+
+    def show_time(self):
+        """Update only the time label, for a response which didn't change the value.
+        """
+        self.time_label.configure(text=self.row.api_object.time or '')
+
+
+class Sparkline:
+    """Small line chart of the latest values in a ValueHistory, drawn on a canvas within a TickerRow.
+
+    When a single value has been added and the visible range hasn't changed, the drawn segments are
+    shifted left by one step with Canvas.move() and only the new segment is drawn. Otherwise the
+    visible points are plotted again.
+    """
+    def __init__(self, tk_frame, history, width=60, height=16, step=3, color='#3c78d8'):
+        self.history = history
+        self.width = width
+        self.height = height
+        self.step = step
+        self.color = color
+        self.points = width // step + 1
+        self.canvas = tk.Canvas(tk_frame, width=width, height=height, highlightthickness=0, borderwidth=0,
+                                background=tk_frame.cget('background'))
+        self.segments = deque()
+        self.low = None
+        self.high = None
+        self.drawn = 0
+
+    def y(self, value):
+        if self.high == self.low:
+            return self.height / 2
+        return (self.height - 2) * (self.high - value) / (self.high - self.low) + 1
+
+    def attach(self, history):
+        """Draw a different ValueHistory, or nothing with None. Called when a RowView is rebound.
+        """
+        self.history = history
+        self.canvas.delete('all')
+        self.segments.clear()
+        self.low = None
+        self.high = None
+        self.drawn = 0
+
+    def update(self):
+        """Draw any new values. Called from RowView.show() on the mainloop.
+        """
+        if self.history is None:
+            return
+        values = self.history.last(self.points)
+        new = self.history.appended - self.drawn
+        self.drawn = self.history.appended
+        if len(values) < 2:
+            self.canvas.delete('all')
+            self.segments.clear()
+            return
+        low, high = min(values), max(values)
+        if new == 1 and low == self.low and high == self.high and self.segments:
+            self.canvas.move('all', -self.step, 0)
+            if len(self.segments) >= self.points - 1:
+                self.canvas.delete(self.segments.popleft())
+            x = self.width - 1
+            self.segments.append(self.canvas.create_line(x - self.step, self.y(values[-2]), x, self.y(values[-1]),
+                                                         fill=self.color))
+            return
+        self.low, self.high = low, high
+        self.canvas.delete('all')
+        self.segments.clear()
+        x = self.width - 1 - (len(values) - 1) * self.step
+        for i in range(1, len(values)):
+            self.segments.append(self.canvas.create_line(x, self.y(values[i - 1]), x + self.step, self.y(values[i]),
+                                                         fill=self.color))
+            x += self.step
+
+
+class LogViewer:
+    """Window paging through the log of a TickerRow from a given time.
+
+    Records are read lazily with logs.read_log(), a page at a time in a background thread, and the
+    next page is only read once the list is scrolled to its end. Large logs are never read whole.
+
+    Called when "Open Log" is selected from the right-click menu.
+    """
+    def __init__(self, ticker_row, page_size=200):
+        self.ticker_row = ticker_row
+        self.window = ticker_row.window
+        self.log_name = ticker_row.api_object.log_name
+        self.page_size = page_size
+        self.records = None
+        self.loading = False
+        padx = 4
+        pady = 2
+        x, y = self.window.winfo_rootx(), self.window.winfo_rooty()
+
+        self.log_window = tk.Toplevel(self.window)
+        self.log_window.geometry(f'+{x}+{y}')
+        self.log_window.title(f'{ticker_row.name} Log')
+        self.log_window.focus_set()
+        self.log_window.bind('<Escape>', lambda event: self.log_window.destroy())
+
+        # From -- Show records from this time onwards. Defaults to the last 24 hours.
+        self.from_label = tk.Label(self.log_window, text='From')
+        self.from_label.grid(row=0, column=0, padx=padx, pady=pady, sticky='w')
+        self.from_entry = tk.Entry(self.log_window, width=18)
+        self.from_entry.grid(row=0, column=1, padx=padx, pady=pady, sticky='w')
+        self.from_entry.insert(0, strftime('%m-%d-%Y %H:%M', localtime(time() - 86400)))
+        self.from_entry.bind('<Return>', self.go)
+        self.go_button = tk.Button(self.log_window, text='Go', width=6, command=self.go)
+        self.go_button.grid(row=0, column=2, padx=padx, pady=pady, sticky='w')
+        self.status_label = tk.Label(self.log_window, anchor='w')
+        self.status_label.grid(row=0, column=3, padx=padx, pady=pady, sticky='we')
+
+        # Records
+        self.tree = ttk.Treeview(self.log_window, columns=('time', 'value'), show='headings', height=20)
+        self.tree.heading('time', text='Time')
+        self.tree.heading('value', text='Value')
+        self.tree.column('time', width=150, stretch=False)
+        self.tree.column('value', width=250)
+        self.tree.grid(row=1, column=0, columnspan=4, padx=padx, pady=pady, sticky='nsew')
+        self.scrollbar = tk.Scrollbar(self.log_window, orient='vertical', command=self.tree.yview)
+        self.scrollbar.grid(row=1, column=4, pady=pady, sticky='ns')
+        self.tree.configure(yscrollcommand=self.scroll)
+        self.log_window.grid_rowconfigure(1, weight=1)
+        self.log_window.grid_columnconfigure(3, weight=1)
+
+        try:
+            self.log_window.iconbitmap('yTicker.ico')
+        except Exception as error:
+            print_thread(f'Error -- yTicker.ico not found: {error}')
+
+        self.go()
+
+    def go(self, event=True):
+        """Start reading the log from the time in the from entry.
+        """
+        try:
+            start = mktime(strptime(self.from_entry.get().strip(), '%m-%d-%Y %H:%M'))
+        except ValueError:
+            self.status_label.configure(text='Use MM-DD-YYYY HH:MM')
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.records = read_log(self.log_name, start)
+        self.loading = False
+        self.load_page()
+
+    def scroll(self, first, last):
+        """Treeview yscrollcommand. Read the next page once the end of the list is visible.
+        """
+        self.scrollbar.set(first, last)
+        if float(last) >= 1.0:
+            self.load_page()
+
+    def load_page(self):
+        if self.loading or self.records is None:
+            return
+        self.loading = True
+        self.status_label.configure(text='Reading...')
+        Thread(target=self.read_page, args=(self.records,), daemon=True).start()
+
+    def read_page(self, records):
+        """Read the next page of records. Runs on its own thread.
+        """
+        try:
+            page = list(islice(records, self.page_size))
+        except Exception as error:
+            print_thread(f'{self.log_name}: Reading Log Failed -- {error}')
+            page = []
+        self.ticker_row.ticker_object.post(lambda: self.show_page(records, page))
+
+    def show_page(self, records, page):
+        """Add a page of records to the list. Runs on the tkinter mainloop.
+        """
+        # Ignore pages from a previous go() or a closed window.
+        if records is not self.records or not self.log_window.winfo_exists():
+            return
+        for timestamp, value in page:
+            self.tree.insert('', 'end', values=(strftime('%m-%d-%Y %H:%M:%S', localtime(timestamp)), value))
+        count = len(self.tree.get_children())
+        if len(page) < self.page_size:
+            self.records = None
+            self.status_label.configure(text=f'{count} records' if count else 'No records')
+        else:
+            self.status_label.configure(text=f'{count}+ records')
+        self.loading = False
 
 
 class Tooltip:
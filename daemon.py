@@ -0,0 +1,132 @@
+# γTicker headless service: fetch, check alarms, and log without tkinter or a display.
+# Daemon, DaemonRow
+#
+# Usage: python daemon.py
+# Rows, refresh rates, alarms, and logging are read from the same settings file as γTicker.
+# Triggered alarms are printed and disabled. Stopped cleanly by SIGTERM or Ctrl+C.
+# Last values are kept in the same snapshot file as γTicker's, which the window starts from.
+
+import signal
+from threading import Event
+from time import monotonic
+from settings import settings
+from network import SessionPool, fetch_cache, fetch_stats
+from metrics import MetricsServer
+from logs import log_writer
+from snapshot import snapshot
+from ticker_api import TickerAPI
+from alarm_engine import AlarmSet, describe_alarm
+from functions import is_float, print_thread, Scheduler, UrlIndex
+
+
+class DaemonRow:
+    """Headless counterpart of TickerRow: one API from settings, refreshed by the Daemon's Scheduler.
+    """
+    def __init__(self, api, session_pool):
+        self.api_object = TickerAPI(api['name'], api['url'], api['term'], api['decimals'], api['log'],
+                                    session_pool, api.get('batch'))
+        self.name = str(self.api_object.name)
+        self.refresh = api['refresh']
+        self.alarm_set = AlarmSet(api['alarms'])
+        self.auto_update = None
+
+    def fetch(self):
+        """Send request, match value, and check alarm triggers. Runs on worker threads.
+
+        return the seconds after which to fetch again when the request is waiting for a rate limit token.
+        """
+        try:
+            self.api_object.scrape_api(self.refresh)
+            if not self.api_object.unchanged:
+                self.api_object.match_value()
+            if not self.api_object.throttled:
+                self.alarm_check()
+        except Exception as error:
+            print_thread(f'{self.name}: Fetch Failed -- {error}')
+        return self.api_object.retry
+
+    def alarm_check(self):
+        """Print and disable triggered alarms.
+        """
+        value = self.api_object.value
+        if self.alarm_set and is_float(value):
+            for alarm in self.alarm_set.check(float(value), self.api_object.timestamp or 0.0):
+                print_thread(f'ALARM: {self.name}: {value} {describe_alarm(alarm)}')
+                alarm['enabled'] = False
+                settings.mark_dirty()
+
+
+class Daemon:
+    """Fetch every API in settings on its refresh rate until stopped.
+
+        daemon = Daemon()
+        daemon.run()    # Blocks until SIGTERM/SIGINT or stop().
+    """
+    def __init__(self):
+        self.session_pool = SessionPool()
+        self.metrics_server = MetricsServer()
+        self.scheduler = Scheduler()
+        self.stopped = Event()
+        self.rows = [DaemonRow(api, self.session_pool) for api in settings.dictionary['apis']]
+        self.url_index = UrlIndex()
+        self.url_index.listeners.append(fetch_cache.forget)
+        snapshot.load()
+        for row in self.rows:
+            self.url_index.add(row)
+            snapshot.restore(row.api_object)
+        self.snapshot_update = None
+
+    def run(self):
+        """Schedule every row with a refresh rate and wait for a stop signal.
+
+        As in Ticker.start(), first fetches are spread over "startup_stagger" seconds plus the
+        Scheduler's jitter, so rows don't all fire at once on startup or on later periods.
+        Rows in a batch group are lined up on the group's deadlines by UrlIndex.align() instead.
+
+        Signal handlers can only be installed from the main thread.
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        rows = [row for row in self.rows if row.refresh]
+        stagger = settings.dictionary['global'].get('startup_stagger', 2)
+        for i, row in enumerate(rows):
+            delay = stagger * i / len(rows) + self.scheduler.offset(row.refresh)
+            deadline = self.url_index.align(row.api_object, row.refresh, monotonic() + delay)
+            if deadline is not None:
+                delay = max(deadline - monotonic(), 0)
+            row.auto_update = self.scheduler.schedule(row.refresh, row.fetch, delay=delay)
+        interval = settings.dictionary['global'].get('snapshot_interval', 60)
+        if interval:
+            self.snapshot_update = self.scheduler.schedule(interval, self.save_snapshot)
+        print_thread(f'γTicker daemon: Fetching {len(rows)} APIs')
+        # wait() with a timeout so signals are handled promptly on every platform.
+        while not self.stopped.wait(1):
+            pass
+        self.close()
+
+    def stop(self, signum=None, frame=None):
+        self.stopped.set()
+
+    def save_snapshot(self):
+        snapshot.save(row.api_object for row in self.rows)
+
+    def close(self):
+        """Cancel outstanding fetches, close pooled connections, write out logs, and save the snapshot and settings.
+        """
+        print_thread('γTicker daemon: Stopping')
+        for row in self.rows:
+            if row.auto_update:
+                row.auto_update.cancel()
+        if self.snapshot_update:
+            self.snapshot_update.cancel()
+        self.scheduler.close()
+        self.session_pool.close()
+        self.metrics_server.close()
+        log_writer.close()
+        self.save_snapshot()
+        print_thread(f'Fetch stats: {fetch_stats.snapshot()}')
+        settings.flush()
+
+
+if __name__ == '__main__':
+    Daemon().run()
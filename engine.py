@@ -0,0 +1,173 @@
+# γTicker asyncio fetch engine for classes.py
+# FetchEngine, FetchHandle
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from random import uniform
+from threading import Thread
+from settings import settings
+from functions import print_thread
+from metrics import metrics
+
+
+class FetchEngine:
+    """Optional replacement for the threaded Scheduler and its worker pool.
+
+    A single background asyncio event loop schedules every row's refresh. Blocking HTTP calls run
+    concurrently in a small executor, limited globally by an asyncio.Semaphore, and each finished
+    fetch hands its callback to post() so the UI work happens on the tkinter mainloop.
+
+    Enabled with the "engine": "asyncio" global setting; "concurrency" sets the global limit.
+    Like the Scheduler's, periodic calls are pushed back once by a random "jitter" fraction of their
+    period, so rows sharing a refresh rate don't all fire in the same second.
+
+        engine = FetchEngine(post)
+        handle = engine.schedule(60, fetch, display)    # fetch now, then every 60 seconds.
+        handle.cancel()
+        engine.close()
+    """
+    def __init__(self, post, concurrency=None, jitter=None):
+        global_settings = settings.dictionary['global']
+        self.post = post
+        self.concurrency = concurrency if concurrency else global_settings.get('concurrency', 8)
+        self.jitter = jitter if jitter is not None else global_settings.get('jitter', 0.1)
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='yTicker-fetch')
+        self.semaphore = None
+        self.handles = set()
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Event loop thread. The semaphore is created here so it belongs to this loop.
+        """
+        asyncio.set_event_loop(self.loop)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.loop.run_forever()
+
+    def offset(self, seconds):
+        """Random jitter for a periodic call: up to a fraction of the period, capped at 5 seconds.
+        """
+        return uniform(0, min(seconds * self.jitter, 5))
+
+    def schedule(self, seconds, function, callback=None, delay=0, jitter=None):
+        """Call function in the executor after delay seconds, then every given number of seconds,
+        the first of which is jittered by offset(), or by jitter seconds if given. callback is passed
+        to post() after every completed call.
+
+        seconds=None calls function once. function may return a number of seconds after which it
+        is called once more, e.g. when network.rate_limiter has given its request a later token.
+
+        Thread-safe; returns a FetchHandle which can be cancelled.
+        """
+        if jitter is None:
+            jitter = self.offset(seconds) if seconds else 0.0
+        handle = FetchHandle(self, seconds, function, callback, jitter)
+        self.loop.call_soon_threadsafe(handle.start, delay)
+        return handle
+
+    async def execute(self, handle, deadline):
+        """Run a handle's function under the global concurrency limit and post its callback.
+        """
+        handle.running = True
+        retry = None
+        try:
+            async with self.semaphore:
+                # How late the call started, including time waiting for the concurrency limit.
+                metrics.observe('yticker_timer_drift_seconds', self.loop.time() - deadline)
+                retry = await self.loop.run_in_executor(self.executor, handle.function)
+            if handle.callback is not None and not handle.cancelled:
+                self.post(handle.callback)
+        except Exception as error:
+            print_thread(f'Error -- Fetch Engine: {error}')
+        finally:
+            # Still running until the retry, so periodic calls don't stack up behind it.
+            if isinstance(retry, float) and not handle.cancelled:
+                handle.retry(retry)
+            else:
+                handle.running = False
+                if handle.seconds is None:
+                    self.handles.discard(handle)
+
+    def close(self):
+        """Cancel every scheduled call and stop the event loop. Thread-safe.
+
+        Handles are cancelled within the event loop, since that's the thread which adds and removes them.
+        """
+        def shutdown():
+            for handle in list(self.handles):
+                handle.cancelled = True
+                handle.stop()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(shutdown)
+        self.executor.shutdown(wait=False)
+
+
+class FetchHandle:
+    """A scheduled, possibly periodic, call within FetchEngine.
+
+    Periodic deadlines are advanced by a fixed interval from the previous deadline rather than from
+    when the call finished, so they don't drift. The first is pushed back by the handle's jitter. A call that is still running when its next deadline
+    arrives is skipped instead of stacking up.
+    """
+    def __init__(self, engine, seconds, function, callback, jitter=0.0):
+        self.engine = engine
+        self.seconds = seconds
+        self.jitter = jitter
+        self.function = function
+        self.callback = callback
+        self.deadline = None
+        self.timer = None
+        self.retry_timer = None
+        self.running = False
+        self.cancelled = False
+
+    def start(self, delay):
+        """Called within the event loop.
+        """
+        if self.cancelled:
+            return
+        self.engine.handles.add(self)
+        self.deadline = self.engine.loop.time() + delay
+        self.timer = self.engine.loop.call_at(self.deadline, self.fire)
+
+    def fire(self):
+        if self.cancelled:
+            return
+        deadline = self.deadline
+        if self.seconds:
+            # Skip any deadlines which were missed entirely, e.g. after the system slept.
+            now = self.engine.loop.time()
+            self.deadline += self.seconds + self.jitter
+            self.jitter = 0.0
+            while self.deadline <= now:
+                self.deadline += self.seconds
+            self.timer = self.engine.loop.call_at(self.deadline, self.fire)
+        if not self.running:
+            self.engine.loop.create_task(self.engine.execute(self, deadline))
+
+    def retry(self, seconds):
+        """Call the function once more after seconds. Called within the event loop.
+        """
+        deadline = self.engine.loop.time() + seconds
+        self.retry_timer = self.engine.loop.call_at(deadline, self.fire_retry, deadline)
+
+    def fire_retry(self, deadline):
+        self.retry_timer = None
+        if not self.cancelled:
+            self.engine.loop.create_task(self.engine.execute(self, deadline))
+
+    def cancel(self):
+        """Stop future calls. Thread-safe.
+        """
+        self.cancelled = True
+        self.engine.loop.call_soon_threadsafe(self.stop)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.retry_timer is not None:
+            self.retry_timer.cancel()
+            self.retry_timer = None
+        self.engine.handles.discard(self)
@@ -1,52 +1,223 @@
 # γTicker functions used in classes.py, classes_others.py, and alarms.py
-# TimerThread, print_thread, is_float, dict_search, get_time, reorder_rows, manage_urls
-
-from time import localtime, time, sleep
-from threading import Thread, Event
+# Scheduler, UpdateQueue, print_thread, is_float, dict_search, compile_path, path_get, stream_search, get_time,
+# RowOrder, UrlIndex, normalize_url, batch_url, batch_item
+
+from time import localtime, monotonic
+from threading import Thread, Condition, Lock
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappush, heappop, heapify
+from bisect import bisect_left
+from itertools import count
+from random import uniform
+from math import ceil
+from json import JSONDecoder, loads
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from settings import settings
+from metrics import metrics
+
 
-class TimerThread(Thread):
-    """Threaded timer very similar to threading.Timer
+class Scheduler(Thread):
+    """One timer thread for every TickerRow, backed by a heap of deadlines.
 
-    The difference is how it waits before calling the given function in an effort to prevent
-    it from getting out of sync. Whole seconds only.
+    Replaces a sleeping thread per row: the scheduler thread waits until the earliest deadline,
+    hands due calls to a small worker pool, and goes back to sleep, so thread count and wakeups
+    stay flat no matter how many rows there are.
 
-    Call a function after a specified number of seconds:
+    schedule() and cancel() are O(log n). Periodic deadlines advance from the previous deadline so
+    they don't drift, and the first deadline is jittered so rows sharing a refresh rate don't all
+    fire in the same second. A function may return a number of seconds after which it is called
+    once more, e.g. when network.rate_limiter has given its request a later token.
 
-        t = TimerThread(60, function)     # Call function after 60 seconds.
-        t.start()                         # Start timer.
-        t.cancel()                        # Cancel the timer's action if it's still waiting.
+        scheduler = Scheduler()
+        call = scheduler.schedule(60, function)     # Call function every 60 seconds.
+        call.cancel()                               # Stop calling function.
+        scheduler.close()
     """
-    def __init__(self, seconds, function, args=None, kwargs=None):
-        Thread.__init__(self)
-        self.seconds = int(seconds)
-        self.function = function
-        self.args = args if args is not None else []
-        self.kwargs = kwargs if kwargs is not None else {}
-        self.finished = Event()
+    def __init__(self, workers=None, jitter=None):
+        Thread.__init__(self, daemon=True)
+        global_settings = settings.dictionary['global']
+        self.workers = workers if workers else global_settings.get('workers', 8)
+        # Fraction of the refresh rate, capped at 5 seconds, that a first deadline can be pushed back.
+        self.jitter = jitter if jitter is not None else global_settings.get('jitter', 0.1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='yTicker-worker')
+        self.heap = []
+        self.cancelled = 0
+        self.counter = count()
+        self.condition = Condition()
+        self.closed = False
+        self.start()
+
+    def offset(self, seconds):
+        """Random jitter for a first deadline: up to a fraction of the refresh rate, capped at 5 seconds.
+
+        Added to an explicit delay, e.g. a startup stagger, so rows sharing a refresh rate stay spread out.
+        """
+        return uniform(0, min(seconds * self.jitter, 5))
+
+    def schedule(self, seconds, function, delay=None):
+        """Call function every given number of seconds, starting after delay seconds.
+
+        Without a delay, the first call is one jittered period away.
+        Returns a ScheduledCall which can be cancelled.
+        """
+        if delay is None:
+            delay = seconds + self.offset(seconds)
+        call = ScheduledCall(self, seconds, function, monotonic() + delay)
+        with self.condition:
+            self.push(call)
+            self.condition.notify()
+        return call
+
+    def push(self, call):
+        heappush(self.heap, (call.deadline, next(self.counter), call))
+
+    def retry(self, call, seconds):
+        """Call a ScheduledCall once more after seconds. Its periodic calls are skipped until then.
+        """
+        with self.condition:
+            if self.closed:
+                return
+            heappush(self.heap, (monotonic() + seconds, next(self.counter), RetryCall(call)))
+            self.condition.notify()
+
+    def cancel(self, call):
+        """Cancelled calls are left in the heap and skipped when they come due.
+        The heap is rebuilt once more than half of it is cancelled.
+        """
+        with self.condition:
+            if call.cancelled:
+                return
+            call.cancelled = True
+            self.cancelled += 1
+            if self.cancelled > len(self.heap) // 2:
+                self.heap = [entry for entry in self.heap if not entry[2].cancelled]
+                heapify(self.heap)
+                self.cancelled = 0
 
     def run(self):
-        self.wait()
-        if not self.finished.is_set():
-            self.function(*self.args, **self.kwargs)
-        self.finished.set()
+        with self.condition:
+            while not self.closed:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                deadline, _, call = self.heap[0]
+                if call.cancelled:
+                    heappop(self.heap)
+                    if not isinstance(call, RetryCall):
+                        self.cancelled -= 1
+                    continue
+                now = monotonic()
+                if deadline > now:
+                    self.condition.wait(deadline - now)
+                    continue
+                heappop(self.heap)
+                if isinstance(call, RetryCall):
+                    self.executor.submit(call.call.run, deadline)
+                    continue
+                # Next deadline comes from the previous one, skipping any missed entirely.
+                call.deadline += call.seconds
+                while call.deadline <= now:
+                    call.deadline += call.seconds
+                self.push(call)
+                # A call still running from its last deadline is skipped rather than stacked up.
+                if not call.running:
+                    call.running = True
+                    self.executor.submit(call.run, deadline)
+
+    def close(self):
+        """Stop the scheduler thread. Calls already running are allowed to finish.
+        """
+        with self.condition:
+            self.closed = True
+            self.heap = []
+            self.condition.notify()
+        self.executor.shutdown(wait=False)
+
+
+class ScheduledCall:
+    """A periodic call within Scheduler.
+    """
+    def __init__(self, scheduler, seconds, function, deadline):
+        self.scheduler = scheduler
+        self.seconds = seconds
+        self.function = function
+        self.deadline = deadline
+        self.running = False
+        self.cancelled = False
+
+    def run(self, deadline):
+        # How late the call started, including time waiting for a free worker.
+        metrics.observe('yticker_timer_drift_seconds', monotonic() - deadline)
+        retry = None
+        try:
+            retry = self.function()
+        except Exception as error:
+            print_thread(f'Error -- Scheduled Call Failed: {error}')
+        finally:
+            # Still running until the retry, so periodic calls don't stack up behind it.
+            if isinstance(retry, float) and not self.cancelled:
+                self.scheduler.retry(self, retry)
+            else:
+                self.running = False
 
     def cancel(self):
-        """Stop the timer if it hasn't finished yet.
+        """Stop future calls.
         """
-        self.finished.set()
+        self.scheduler.cancel(self)
+
+
+class RetryCall:
+    """A one-off call of a ScheduledCall within Scheduler, queued by Scheduler.retry().
+    """
+    def __init__(self, call):
+        self.call = call
+
+    @property
+    def cancelled(self):
+        return self.call.cancelled
+
+
+class UpdateQueue:
+    """Widget updates waiting to be run on the tkinter mainloop.
+
+    tkinter isn't thread-safe, so worker threads put() functions here instead of touching widgets.
+    The mainloop drains everything pending in one batch with window.after(), at most "redraws"
+    times per second, so a burst of results becomes a single repaint pass.
 
-    def wait(self):
-        """Will sleep up until the final two seconds before the function is called.
+    Putting the same function again before it has run replaces the earlier one, so a row which
+    refreshed several times between drains is only drawn once, with its latest value.
 
-        In the final two seconds, sleep in 0.4 second intervals until the expected time is reached.
+        queue = UpdateQueue(window)
+        queue.put(row.display)       # From any thread.
+    """
+    def __init__(self, window, redraws=None):
+        self.window = window
+        redraws = redraws if redraws else settings.dictionary['global'].get('redraws', 10)
+        self.interval = max(1, int(1000 / redraws))
+        # Insertion-ordered; keyed by function for coalescing.
+        self.pending = {}
+        self.lock = Lock()
+        self.window.after(self.interval, self.drain)
+
+    def put(self, function):
+        """Queue a function to be called on the mainloop. Thread-safe.
         """
-        wake_up = int(time() + self.seconds)
-        while wake_up > int(time()):
-            if wake_up == int(time() + self.seconds) and (self.seconds-2) > 0:
-                sleep(self.seconds-2)
-            else:
-                sleep(.4)
+        with self.lock:
+            self.pending.pop(function, None)
+            self.pending[function] = None
+
+    def drain(self):
+        """Run every pending function, then check again after the redraw interval.
+        """
+        with self.lock:
+            batch, self.pending = self.pending, {}
+        for function in batch:
+            try:
+                function()
+            except Exception as error:
+                print_thread(f'Error -- Queued Update Failed: {error}')
+        self.window.after(self.interval, self.drain)
 
 
 def print_thread(string):
@@ -71,48 +242,154 @@ def is_float(inputs):
         return True
 
 
-def dict_search(dictionary, desired_key, return_list=False, exact_match=False, recursion=True):
+def dict_search(dictionary, desired_key, return_list=False, exact_match=False, recursion=True, return_path=False):
     """Recursively search a nested dictionary for a key and return the first instance of its value.
     If lists occur in nested dictionaries, each item will be recusively called.
 
     return_list=True will yield the full list of matched values;
     exact_match=True will test desired_key against keys precisely;
     exact_match=False will detect a partial match, e.g. "price" in "prices"
+    return_path=True will yield the path to the match, e.g. ('data', 0, 'price'), for path_get()
     """
-    dict_search.desired_value = []
+    # Matches are kept local to each call so that searches from different threads can't mix.
+    desired_values = []
 
-    def nested_dict_search(dictionary, desired_key):
+    def nested_dict_search(dictionary, desired_key, path):
+        """Return True once searching can stop.
+        """
         if isinstance(dictionary, dict):
             for key, val in dictionary.items():
                 if exact_match:
-                    if desired_key == key:
-                        dict_search.desired_value.append(val)
+                    matched = desired_key == key
                 else:
-                    if desired_key in key:
-                        dict_search.desired_value.append(val)
-                if isinstance(val, dict):
-                    nested_dict_search(val, desired_key)
-                elif isinstance(val, list):
-                    for item in val:
-                        nested_dict_search(item, desired_key)
+                    matched = desired_key in key
+                if matched:
+                    desired_values.append(path + (key,) if return_path else val)
+                    if not return_list:
+                        return True
+                if isinstance(val, (dict, list)):
+                    if nested_dict_search(val, desired_key, path + (key,)):
+                        return True
         elif isinstance(dictionary, list):
-            for item in dictionary:
-                nested_dict_search(item, desired_key)
+            for i, item in enumerate(dictionary):
+                if nested_dict_search(item, desired_key, path + (i,)):
+                    return True
+        return False
 
     if recursion:
-        nested_dict_search(dictionary, desired_key)
+        nested_dict_search(dictionary, desired_key, ())
     else:
         return dictionary.get(desired_key)
 
-    if dict_search.desired_value:
+    if desired_values:
         if return_list:
-            return dict_search.desired_value
+            return desired_values
         else:
-            return dict_search.desired_value[0]
+            return desired_values[0]
     else:
         return None
 
 
+def compile_path(term):
+    """Compile a dotted term such as "data.0.price" into a path tuple for path_get().
+
+    return None for terms without a dot, which are matched with dict_search() instead.
+    """
+    if term is None or '.' not in term:
+        return None
+    return tuple(int(key) if key.lstrip('-').isdigit() else key for key in term.strip().split('.'))
+
+
+def path_get(data, path):
+    """Follow a path from compile_path() or dict_search(return_path=True) through nested
+    dictionaries and lists.
+
+    return None if any step of the path is missing.
+    """
+    try:
+        for key in path:
+            if isinstance(data, dict):
+                # Numeric keys, e.g. "data.0", may also be dictionary keys.
+                data = data[str(key)] if isinstance(key, int) else data[key]
+            else:
+                data = data[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return data
+
+
+# A complete JSON string token and, if it is a key, its colon.
+# Complete JSON strings, and runs of text outside of strings which can be skipped without missing a key.
+# A string is only skipped once the character after it has arrived, in case it is a key awaiting its colon.
+JSON_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+JSON_SKIP = re.compile(r'(?:[^"]+|"[^"\\]*(?:\\.[^"\\]*)*"(?=\s*\S))*')
+JSON_DECODER = JSONDecoder()
+
+
+def stream_search(chunks, desired_key, exact_match=False, top_level=False):
+    """Incrementally search JSON text as it arrives for a key and decode only its value.
+
+    chunks is an iterable of str pieces of a JSON document, e.g. from a streamed response.
+    Reading stops as soon as the first matching key's value is complete, so the rest of the
+    document is never received, stored, or parsed. Text between keys is skipped by a regular
+    expression instead of being parsed.
+
+    Keys are matched in document order like dict_search():
+    exact_match=False will detect a partial match, e.g. "price" in "prices"
+    top_level=True will only match keys of the outermost object.
+
+    Keys containing escape sequences are not matched.
+
+    return (key, value) or None
+    """
+    desired_key = str(desired_key)
+    key_pattern = re.escape(desired_key)
+    if not exact_match:
+        key_pattern = rf'[^"\\]*{key_pattern}[^"\\]*'
+    # Whole strings and other text are consumed lazily until the first matching key.
+    search = re.compile(rf'(?:[^"]|"[^"\\]*(?:\\.[^"\\]*)*")*?"({key_pattern})"\s*:\s*')
+    buffer = ''
+    depth = 0
+    match = None
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            # Values waiting to be decoded after a matched key.
+            if match is not None:
+                buffer = buffer.lstrip()
+                try:
+                    value, end = JSON_DECODER.raw_decode(buffer)
+                except ValueError:
+                    break
+                # A number ending with the buffer, e.g. "12." or "12", may continue in the next chunk.
+                if end == len(buffer) or buffer[end] not in ' \t\r\n,}]':
+                    break
+                return match, value
+            # Only run the full search once the key's text has arrived at all.
+            found = search.match(buffer) if desired_key in buffer else None
+            # Nothing yet: drop what can be skipped and wait for the next chunk.
+            if found is None:
+                end = JSON_SKIP.match(buffer).end()
+            else:
+                end = found.start(1) - 1
+            if top_level:
+                skipped = JSON_STRING.sub('', buffer[:end])
+                depth += skipped.count('{') + skipped.count('[') - skipped.count('}') - skipped.count(']')
+            if found is None:
+                buffer = buffer[end:]
+                break
+            if not top_level or depth == 1:
+                match = found.group(1)
+            buffer = buffer[found.end():]
+    # The document ended with a matched value.
+    if match is not None:
+        try:
+            return match, loads(buffer)
+        except ValueError:
+            return None
+    return None
+
+
 def get_time(seconds=True, time=True, date=False):
     """Return the current time as a string in format '14:01:12'
 
@@ -140,100 +417,293 @@ def get_time(seconds=True, time=True, date=False):
     return current_time
 
 
-def reorder_rows(ticker_rows):
-    """Fix order of TickerRow objects within ticker_rows list and settings and update label.grid rows.
-
-    Should be called when a TickerRow object is created, deleted, or is reassigned to a new row.
-    """
-    # Remove rows that have None for api_object. (Flag for TickerRow deletion)
-    for i in range(len(ticker_rows)):
-        if ticker_rows[i].api_object is None:
-            ticker_rows.pop(i)
-            settings.dictionary['apis'].pop(i)
-            # After a row is deleted, change the sequence in following rows.
-            for row in ticker_rows[i:]:
-                row.sequence = i
-                settings.dictionary['apis'][i]['sequence'] = i
-                i += 1
-            break
-
-    # If a TickerRow's sequence is out of order within ticker_rows, change its position within settings and ticker_rows.
-    sequence = 0
-    for row in ticker_rows:
-        if row.sequence != sequence:
-            # Change position in settings.
-            api_dict = settings.dictionary['apis'][sequence]
-            settings.dictionary['apis'].remove(api_dict)
-            settings.dictionary['apis'].insert(row.sequence, api_dict)
-            # Change position in ticker_rows
-            ticker_obj = row
-            ticker_rows.remove(row)
-            ticker_rows.insert(row.sequence, ticker_obj)
-            break
-        sequence += 1
-
-    # Update sequence number in each row and in settings.
-    sequence = 0
-    for row in ticker_rows:
-        row.sequence = sequence
-        settings.dictionary['apis'][sequence]['sequence'] = sequence
-        sequence += 1
-
-    # Update row number to new sequence in all labels.
-    for i in range(len(ticker_rows)):
-        for label in ticker_rows[i].labels:
-            label.grid(row=i)
-
-    settings.save()
-
-
-def manage_urls(ticker_rows, update=False):
-    """Determine whether there are TickerAPI objects with the same URL to prevent unnecessary requests.
-
-    Give the TickerAPI object with the lowest associated refresh rate a master_list with all other
-    TickerRow objects with the same URL. The object with this list will feed the api_dict
-    to the other objects and update their time and value labels.
-
-    Called after ticker_rows are created during initialization in Ticker.create_rows(),
-    when TickerAPIProperties.save() is called, or after a TickerRow is deleted.
-    """
-    # For sorting by refresh rate.
-    def refresh(row):
-        return row['refresh']
-
-    # Create a dictionary with {url: [{'row': TickerRow, 'refresh': TickerRow.refresh}]}
-    url_dict = {}
-    for row in ticker_rows:
-        # Reset all minions to False in the event that a master was deleted.
-        row.api_object.minion = False
-        url_dict[row.api_object.url] = []
-    for row in ticker_rows:
-        # Force None refreshes to be last for sorting.
-        if row.refresh is None:
-            url_dict[row.api_object.url].append({'row': row, 'refresh': 99999999})
+class RowOrder:
+    """Ticker.ticker_rows and settings.dictionary['apis'] kept in sync, in the order of each API's "order" key.
+
+    Order keys are floats in each API's settings. A row added or moved between two others gets the key
+    halfway between theirs, so only that row's settings change and nothing is renumbered. Positions are
+    found by bisecting the keys, so index(), insert(), remove(), and move() are O(log n) besides the
+    list shift. If repeated halving runs out of float precision, every key is respaced once.
+
+    Listeners, e.g. VirtualRows.row_changed, are called with one change event per operation:
+
+        ('insert', index), ('delete', index), or ('move', old_index, new_index)
+
+    Rows keep a reference to their API's settings dictionary as row.api_settings.
+    """
+    def __init__(self, ticker_rows, apis):
+        self.rows = ticker_rows
+        self.apis = apis
+        self.keys = []
+        self.listeners = []
+
+    def sort(self):
+        """Sort API settings by order key, giving keys to settings saved before there were any.
+
+        Settings saved with a "sequence" number instead are already in that order.
+        """
+        if any(not isinstance(api.get('order'), (int, float)) for api in self.apis):
+            for i, api in enumerate(self.apis):
+                api.pop('sequence', None)
+                api['order'] = float(i + 1)
+            settings.mark_dirty()
+        self.apis.sort(key=lambda api: api['order'])
+
+    def load(self, rows):
+        """Set the rows created from the sorted API settings.
+
+        API settings which failed to load are kept after those of the rows.
+        """
+        loaded = {id(row.api_settings) for row in rows}
+        failed = [api for api in self.apis if id(api) not in loaded]
+        self.rows[:] = rows
+        self.apis[:] = [row.api_settings for row in rows] + failed
+        self.keys = [row.api_settings['order'] for row in rows]
+        # Duplicate keys from an edited settings file.
+        if any(key >= next_key for key, next_key in zip(self.keys, self.keys[1:])):
+            self.respace()
+
+    def respace(self):
+        for i, row in enumerate(self.rows):
+            row.api_settings['order'] = self.keys[i] = float(i + 1)
+        settings.mark_dirty()
+
+    def index(self, row):
+        """Position of a row within ticker_rows.
+        """
+        return bisect_left(self.keys, row.api_settings['order'])
+
+    def key(self, index):
+        """An order key for a row inserted at index, between the keys either side of it.
+        """
+        before = self.keys[index - 1] if index > 0 else None
+        after = self.keys[index] if index < len(self.keys) else None
+        if before is None and after is None:
+            return 1.0
+        if before is None:
+            return after - 1.0
+        if after is None:
+            return before + 1.0
+        key = (before + after) / 2
+        if before < key < after:
+            return key
+        self.respace()
+        return self.key(index)
+
+    def insert(self, row, index=None):
+        """Add a row at an index, or at the end.
+        """
+        index = len(self.rows) if index is None else max(0, min(index, len(self.rows)))
+        self.place(row, index)
+        settings.mark_dirty()
+        self.notify('insert', index)
+
+    def remove(self, row):
+        index = self.index(row)
+        self.take(index)
+        settings.mark_dirty()
+        self.notify('delete', index)
+
+    def move(self, row, index):
+        """Move a row to an index. Nothing happens if it's already there.
+        """
+        old_index = self.index(row)
+        index = max(0, min(index, len(self.rows) - 1))
+        if index == old_index:
+            return
+        self.take(old_index)
+        self.place(row, index)
+        settings.mark_dirty()
+        self.notify('move', old_index, index)
+
+    def place(self, row, index):
+        key = self.key(index)
+        row.api_settings['order'] = key
+        self.keys.insert(index, key)
+        self.rows.insert(index, row)
+        self.apis.insert(index, row.api_settings)
+
+    def take(self, index):
+        del self.keys[index]
+        del self.rows[index]
+        del self.apis[index]
+
+    def notify(self, *change):
+        for listener in self.listeners:
+            listener(*change)
+
+
+def normalize_url(url):
+    """Normalize a URL for network.FetchCache, so equivalent URLs share one cached response.
+
+    Surrounding whitespace and the fragment are removed, the scheme and host are lowercased,
+    and query parameters are sorted:
+
+        " HTTPS://API.Example.com/price?b=2&a=1#top" -> "https://api.example.com/price?a=1&b=2"
+    """
+    parts = urlsplit(str(url).strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+def batch_url(url, param, values, separator=','):
+    """Combine the values of a batch group into one URL by adding them as a single parameter:
+
+        batch_url('https://api.example.com/price', 'symbols', ['ETH', 'BTC'])
+        -> "https://api.example.com/price?symbols=BTC,ETH"
+    """
+    parts = urlsplit(str(url).strip())
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query.append((param, separator.join(sorted(set(values)))))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query, safe=separator), ''))
+
+
+def batch_item(data, value, split=None, depth=3):
+    """Find one value's item within a batched response.
+
+    Either the key of a dictionary, e.g. {"BTC": {...}, "ETH": {...}}, or the item whose split key
+    holds the value, e.g. [{"symbol": "BTC", ...}, ...] with split="symbol". Responses wrapped in
+    other containers, e.g. {"data": [...]}, are searched up to a given depth.
+    """
+    if isinstance(data, dict):
+        if value in data:
+            return data[value]
+        items = list(data.values())
+    elif isinstance(data, list):
+        items = data
+    else:
+        return None
+    if split:
+        for item in items:
+            if isinstance(item, dict) and str(item.get(split)) == value:
+                return item
+    if depth:
+        for item in items:
+            if isinstance(item, (dict, list)):
+                found = batch_item(item, value, split, depth - 1)
+                if found is not None:
+                    return found
+    return None
+
+
+class UrlIndex:
+    """TickerAPI objects by normalized request URL and by batch group, updated one row at a time.
+
+    Every row refreshes on its own schedule and requests go through network.fetch_cache, which
+    shares responses between rows with the same normalized URL. Rows with a shared URL are
+    marked so that they fetch the whole response rather than streaming only their own term.
+
+    Rows with a "batch" in settings, {"url": ..., "param": "symbols", "value": "BTC", "split": "symbol"},
+    are grouped by URL and param. Each row of a group of at least 2 requests the same combined URL
+    from batch_url(), so one request per refresh serves every row, which then takes its own item with
+    batch_item(). Rows which leave a group, or are left alone in one, get their request_url reset to None.
+    align() lines up the deadlines of a group's rows, so rows of a group sharing a refresh rate fetch
+    together and one combined request per refresh serves them all.
+
+    add(), update(), and remove() only touch the URL and batch group a row leaves or joins, so they
+    are O(1) apart from combining the URL of a batch group that changed.
+
+    Listeners, e.g. network.fetch_cache.forget, are called with a normalized URL once no row requests it.
+
+        url_index.add(row)       # Row created.
+        url_index.update(row)    # Properties saved.
+        url_index.remove(row)    # Row deleted, before its api_object is removed.
+    """
+    def __init__(self):
+        self.urls = {}
+        self.groups = {}
+        self.indexed = {}
+        self.batched = {}
+        # First deadline of each batch group and refresh rate, on the monotonic clock.
+        self.anchors = {}
+        self.listeners = []
+
+    def add(self, row):
+        api_object = row.api_object
+        batch = api_object.batch
+        if batch:
+            group = (normalize_url(batch['url']), batch['param'], batch.get('separator', ','))
+            self.batched[api_object] = group
+            self.groups.setdefault(group, {})[api_object] = None
+            self.combine(group)
+        self.index_url(api_object)
+
+    def remove(self, row):
+        api_object = row.api_object
+        group = self.batched.pop(api_object, None)
+        if group is not None:
+            members = self.groups[group]
+            del members[api_object]
+            if members:
+                self.combine(group)
+            else:
+                del self.groups[group]
+                for anchor in [anchor for anchor in self.anchors if anchor[0] == group]:
+                    del self.anchors[anchor]
+        api_object.request_url = None
+        url = self.indexed.pop(api_object, None)
+        if url is not None:
+            self.leave_url(api_object, url)
+
+    def update(self, row):
+        """Reindex a row after its URL or batch has been edited or cleared, recombining the URL of
+        the batch groups it leaves and joins.
+        """
+        self.remove(row)
+        self.add(row)
+
+    def align(self, api_object, seconds, deadline):
+        """Line up the periodic deadlines of a row in a batch group with the rest of its group.
+
+        The first row of a group and refresh rate to be scheduled keeps the given deadline on the
+        monotonic clock. The others get the group's next deadline from now, every seconds after it.
+        return the deadline, or None for rows which aren't in a batch group.
+        """
+        group = self.batched.get(api_object)
+        if group is None or api_object.request_url is None or not seconds:
+            return None
+        anchor = self.anchors.setdefault((group, seconds), deadline)
+        return anchor + max(ceil((monotonic() - anchor) / seconds), 0) * seconds
+
+    def combine(self, group):
+        """Set the combined request_url of every row in a batch group, or None for a group of one.
+        """
+        url, param, separator = group
+        members = self.groups[group]
+        combined = None
+        if len(members) > 1:
+            combined = batch_url(url, param, [str(api_object.batch['value']) for api_object in members], separator)
+        for api_object in members:
+            if api_object.request_url != combined:
+                api_object.request_url = combined
+                if api_object in self.indexed:
+                    self.index_url(api_object)
+
+    def index_url(self, api_object):
+        url = normalize_url(api_object.request_url or api_object.url)
+        old_url = self.indexed.get(api_object)
+        if old_url == url:
+            return
+        if old_url is not None:
+            self.leave_url(api_object, old_url)
+        self.indexed[api_object] = url
+        api_objects = self.urls.setdefault(url, {})
+        api_objects[api_object] = None
+        # The first row to share a URL is marked as well.
+        if len(api_objects) == 2:
+            for shared in api_objects:
+                shared.shared = True
         else:
-            url_dict[row.api_object.url].append({'row': row, 'refresh': row.refresh})
-
-    # Sort by refresh rate and for cases where there are shared URLs give the first one the master_list.
-    # master_list: a list of all other TickerRow objects with the same url.
-    for val in url_dict.values():
-        val.sort(key=refresh)
-        if len(val) > 1 and not val[0]['row'].api_object.master_list:
-            master_list = []
-            # Turn slower items into minions which can't be auto-updated and append them to list.
-            for item in val[1:]:
-                item['row'].update_cancel()
-                item['row'].api_object.minion = True
-                item['row'].api_object.master_list = []
-                master_list.append(item['row'])
-            # Give the TickerAPI with the lowest refresh the master_list.
-            val[0]['row'].api_object.master_list = master_list
-            val[0]['row'].api_object.minion = False
-            # Start updating if update argument is true and it isn't already auto-updating.
-            if update:
-                if val[0]['row'].auto_update is None and val[0]['row'].refresh is not None:
-                    Thread(target=val[0]['row'].update).start()
-        # For cases where there were previously shared URLs but not anymore due to row deletions.
-        elif len(val) == 1:
-            val[0]['row'].api_object.master_list = []
-            val[0]['row'].api_object.minion = False
+            api_object.shared = len(api_objects) > 1
+
+    def leave_url(self, api_object, url):
+        api_objects = self.urls[url]
+        del api_objects[api_object]
+        api_object.shared = False
+        if len(api_objects) == 1:
+            for alone in api_objects:
+                alone.shared = False
+        elif not api_objects:
+            del self.urls[url]
+            for listener in self.listeners:
+                listener(url)
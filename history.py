@@ -0,0 +1,59 @@
+# γTicker value history for ticker_api.py and classes_others.py
+# ValueHistory
+
+from array import array
+from settings import settings
+
+
+class ValueHistory:
+    """Fixed-capacity ring buffer of the numeric values of a TickerAPI and their timestamps.
+
+    Values and timestamps are held in two preallocated array('d') buffers, 16 bytes per point, so
+    appending never allocates and tens of thousands of points stay small. The capacity is set with
+    the "history_size" global setting.
+
+        history = ValueHistory(1000)
+        history.append(1606935672.0, 19000.0)
+        history.last(20)    # array('d', [19000.0])
+    """
+    def __init__(self, capacity=None):
+        capacity = capacity if capacity else settings.dictionary['global'].get('history_size', 1000)
+        self.capacity = max(2, int(capacity))
+        self.values = array('d', bytes(8 * self.capacity))
+        self.times = array('d', bytes(8 * self.capacity))
+        self.count = 0
+        self.index = 0
+        # Total number of values appended, so readers can tell how many are new.
+        self.appended = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, value):
+        """Add a value, overwriting the oldest one when full.
+
+        A value with the same timestamp as the latest one replaces it, e.g. when a response is matched again.
+        """
+        if self.count and self.times[self.index - 1] == timestamp:
+            self.values[self.index - 1] = value
+            return
+        self.values[self.index] = value
+        self.times[self.index] = timestamp
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.appended += 1
+
+    def last(self, number):
+        """return an array of the last number of values, oldest first.
+        """
+        number = min(number, self.count)
+        start = self.index - number
+        if start >= 0:
+            return self.values[start:self.index]
+        return self.values[start:] + self.values[:self.index]
+
+    def clear(self):
+        """Forget every value. Called when the URL or term of a row is changed.
+        """
+        self.count = 0
+        self.index = 0
@@ -0,0 +1,456 @@
+# γTicker logging objects for classes.py, classes_others.py, and ticker_api.py
+# LogWriter, BinaryLogDay, LogIndex, log_name, log_days, read_log, merge_log_day, convert_text_log
+#
+# Text logs:   logs/<name>.txt                 [MM-DD-YYYY HH:MM:SS]\nvalue\n\n
+#              logs/<name>.idx                 JSON byte offsets of each hour within the text log
+#              logs/<name>.txt.converted       text log archived by convert_text_log
+# Binary logs: logs/<name>/<YYYY-MM-DD>.bin    fixed-width little-endian float64 pairs (epoch, value)
+#              logs/<name>/<YYYY-MM-DD>.str    epoch\tjson-encoded value, for values that aren't numbers
+#
+# Usage: python logs.py convert [name ...]      Convert text logs to binary logs.
+
+from queue import SimpleQueue, Empty
+from threading import Thread, Lock
+from time import monotonic, localtime, strftime, mktime, strptime
+from os import path, makedirs, listdir, replace, remove
+from struct import Struct
+from mmap import mmap, ACCESS_READ
+from json import dumps, loads
+from bisect import bisect_left, bisect_right
+from heapq import merge
+import re
+import sys
+from settings import settings
+from functions import print_thread, is_float
+
+RECORD = Struct('<dd')
+# Date line of a text log record, capturing the hour and the minutes and seconds.
+DATE_LINE = re.compile(rb'\[(\d\d-\d\d-\d{4} \d\d):(\d\d):(\d\d)\]\r?\n')
+DATE_LINES = re.compile(rb'^\[(\d\d-\d\d-\d{4} \d\d):\d\d:\d\d\]\r?$', re.MULTILINE)
+
+
+def log_name(name):
+    """Filename for an API's log: Replace spaces with underscores and remove problem characters.
+    """
+    name = str(name).replace(' ', '_')
+    for char in ['\\', '/', ':', '"', '*', '?', '<', '>', '|']:
+        name = name.replace(char, "")
+    return name
+
+
+class LogWriter:
+    """Background writer for the logs directory.
+
+    Fetch threads only enqueue records, which never blocks. A single writer thread keeps each log
+    file open, batches records, and writes them once "log_flush_bytes" are waiting or
+    "log_flush_seconds" have passed, whichever comes first.
+
+    The thread is started by the first record. close() writes everything still queued. Records from
+    fetches still running after close() are appended straight away by the calling thread instead.
+
+        log_writer.write('Bitcoin.txt', '[12-02-2020 14:01:12]\\n19000.0\\n\\n')
+        log_writer.write_value('Bitcoin', 1606935672.0, 19000.0)
+        log_writer.close()
+    """
+    def __init__(self, directory='logs', flush_bytes=None, flush_seconds=None, max_open=256):
+        global_settings = settings.dictionary['global']
+        self.directory = directory
+        self.flush_bytes = flush_bytes if flush_bytes else global_settings.get('log_flush_bytes', 65536)
+        self.flush_seconds = flush_seconds if flush_seconds else global_settings.get('log_flush_seconds', 2)
+        # Files which weren't written in the last flush are closed past this many, e.g. old days.
+        self.max_open = max_open
+        self.queue = SimpleQueue()
+        self.files = {}
+        self.buffers = {}
+        self.buffered = 0
+        self.thread = None
+        self.closed = False
+        self.lock = Lock()
+        self.write_lock = Lock()
+
+    def write(self, filename, data):
+        """Queue str or bytes to be appended to a file within the logs directory.
+        Thread-safe and non-blocking until close(), after which records are written synchronously.
+        """
+        with self.lock:
+            if not self.closed:
+                if self.thread is None:
+                    self.thread = Thread(target=self.run, daemon=True)
+                    self.thread.start()
+                self.queue.put((filename, data))
+                return
+        self.write_now(filename, data)
+
+    def write_now(self, filename, data):
+        """Append a record to its file from the calling thread. Used once the writer thread has been closed.
+        """
+        with self.write_lock:
+            try:
+                file_path = path.join(self.directory, filename)
+                makedirs(path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'ab' if isinstance(data, bytes) else 'a') as stream:
+                    stream.write(data)
+            except Exception as error:
+                print_thread(f'{filename}: Logging Failed -- {error}')
+
+    def write_value(self, name, timestamp, value):
+        """Queue a value for the binary log of the day the timestamp falls on.
+
+        Numbers are stored as a fixed-width (epoch, float64) record; anything else in the
+        day's .str file.
+        """
+        day = strftime('%Y-%m-%d', localtime(timestamp))
+        if is_float(value):
+            self.write(f'{name}/{day}.bin', RECORD.pack(timestamp, float(value)))
+        else:
+            self.write(f'{name}/{day}.str', f'{timestamp!r}\t{dumps(value)}\n')
+
+    def run(self):
+        last_flush = monotonic()
+        while True:
+            timeout = max(0, self.flush_seconds - (monotonic() - last_flush))
+            try:
+                record = self.queue.get(timeout=timeout)
+            except Empty:
+                record = ()
+            # None is queued by close().
+            if record is None:
+                self.flush()
+                break
+            if record:
+                filename, data = record
+                self.buffers.setdefault(filename, []).append(data)
+                self.buffered += len(data)
+            if self.buffered >= self.flush_bytes or monotonic() - last_flush >= self.flush_seconds:
+                self.flush()
+                last_flush = monotonic()
+        for stream in self.files.values():
+            stream.close()
+        self.files = {}
+
+    def flush(self):
+        """Write all buffered records to their files. Called from the writer thread.
+        """
+        for filename, pieces in self.buffers.items():
+            try:
+                stream = self.files.get(filename)
+                if stream is None:
+                    file_path = path.join(self.directory, filename)
+                    makedirs(path.dirname(file_path), exist_ok=True)
+                    binary = isinstance(pieces[0], bytes)
+                    stream = self.files[filename] = open(file_path, 'ab' if binary else 'a')
+                stream.write(pieces[0][:0].join(pieces))
+                stream.flush()
+            except Exception as error:
+                print_thread(f'{filename}: Logging Failed -- {error}')
+        if len(self.files) > self.max_open:
+            for filename in [filename for filename in self.files if filename not in self.buffers]:
+                self.files.pop(filename).close()
+        self.buffers = {}
+        self.buffered = 0
+
+    def close(self):
+        """Write everything queued so far, close the log files, and stop the writer thread.
+
+        Called from Ticker.on_close() and Daemon.close(), after the scheduler has been closed.
+        """
+        with self.lock:
+            self.closed = True
+            thread, self.thread = self.thread, None
+            if thread is not None:
+                self.queue.put(None)
+        if thread is not None:
+            thread.join()
+
+
+log_writer = LogWriter()
+
+
+class BinaryLogDay:
+    """One day of a binary log, memory-mapped rather than read and parsed.
+
+    timestamps and values are zero-copy float64 views into the file, so millions of points load
+    instantly. Values which aren't numbers are read from the day's .str file into strings.
+
+        day = BinaryLogDay('Bitcoin', '2020-12-02')
+        day.values[-1]
+        day.close()
+    """
+    def __init__(self, name, day, directory='logs'):
+        self.file_path = path.join(directory, name, f'{day}.bin')
+        self.stream = None
+        self.map = None
+        self.timestamps = self.values = memoryview(b'').cast('d')
+        if path.exists(self.file_path) and path.getsize(self.file_path) >= RECORD.size:
+            self.stream = open(self.file_path, 'rb')
+            self.map = mmap(self.stream.fileno(), 0, access=ACCESS_READ)
+            # Ignore a partially written last record.
+            records = memoryview(self.map)[:len(self.map) - len(self.map) % RECORD.size].cast('d')
+            self.timestamps = records[0::2]
+            self.values = records[1::2]
+        self.strings = []
+        strings_path = path.join(directory, name, f'{day}.str')
+        if path.exists(strings_path):
+            with open(strings_path, 'r') as stream:
+                for line in stream:
+                    timestamp, value = line.rstrip('\n').split('\t', 1)
+                    self.strings.append((float(timestamp), loads(value)))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def close(self):
+        """Release the memory map. Views into it can't be used afterwards.
+        """
+        if self.map is not None:
+            self.timestamps.release()
+            self.values.release()
+            self.timestamps = self.values = memoryview(b'').cast('d')
+            self.map.close()
+            self.stream.close()
+            self.map = self.stream = None
+
+
+def log_days(name, directory='logs'):
+    """return the sorted days, e.g. ['2020-12-01', '2020-12-02'], with a binary log.
+    """
+    log_path = path.join(directory, name)
+    if not path.isdir(log_path):
+        return []
+    return sorted({filename.rsplit('.', 1)[0] for filename in listdir(log_path)
+                   if filename.endswith('.bin') or filename.endswith('.str')})
+
+
+class LogIndex:
+    """Byte offsets of the first record of every hour in a text log, so reads can seek straight to
+    a time instead of scanning the whole file.
+
+    Saved as logs/<name>.idx and brought up to date incrementally by update(): only what was
+    appended to the log since the last update is scanned.
+
+        index = LogIndex('Bitcoin')
+        index.update()
+        index.offset(1606935672.0)
+    """
+    def __init__(self, name, directory='logs'):
+        self.log_path = path.join(directory, f'{name}.txt')
+        self.index_path = path.join(directory, f'{name}.idx')
+        self.size = 0
+        self.hours = []
+        self.offsets = []
+        try:
+            with open(self.index_path, 'r') as stream:
+                index = loads(stream.read())
+            self.size, self.hours, self.offsets = index['size'], index['hours'], index['offsets']
+        except FileNotFoundError:
+            pass
+        except Exception as error:
+            print_thread(f'{name}: Rebuilding Log Index -- {error}')
+
+    def update(self):
+        """Index records appended since the last update and save the index if anything changed.
+        """
+        try:
+            size = path.getsize(self.log_path)
+        except OSError:
+            return
+        # The log was replaced or truncated.
+        if size < self.size:
+            self.size, self.hours, self.offsets = 0, [], []
+        if size == self.size:
+            return
+        hour_epochs = {}
+        with open(self.log_path, 'rb') as stream, mmap(stream.fileno(), 0, access=ACCESS_READ) as log_map:
+            # Stop before a line which is still being written.
+            end = log_map.rfind(b'\n', self.size, size) + 1
+            if not end:
+                return
+            # Date lines are found by the regex engine across the whole map rather than line by line.
+            last_hour = None
+            for match in DATE_LINES.finditer(log_map, self.size, end):
+                if match[1] == last_hour:
+                    continue
+                last_hour = match[1]
+                hour = hour_epochs.get(last_hour)
+                if hour is None:
+                    hour = hour_epochs[last_hour] = hour_epoch(last_hour)
+                # Hours repeated by clock changes keep their first offset.
+                if hour is not None and (not self.hours or hour > self.hours[-1]):
+                    self.hours.append(hour)
+                    self.offsets.append(match.start())
+        self.size = end
+        try:
+            with open(f'{self.index_path}.tmp', 'w') as stream:
+                stream.write(dumps({'size': self.size, 'hours': self.hours, 'offsets': self.offsets}))
+            replace(f'{self.index_path}.tmp', self.index_path)
+        except Exception as error:
+            print_thread(f'{self.index_path}: Saving Log Index Failed -- {error}')
+
+    def offset(self, timestamp):
+        """return the byte offset to start reading from for records at or after a timestamp.
+        """
+        position = bisect_right(self.hours, timestamp) - 1
+        return self.offsets[position] if position >= 0 else 0
+
+
+def hour_epoch(hour):
+    """Epoch of a local b'MM-DD-YYYY HH' hour from a text log, or None if invalid.
+    """
+    try:
+        return mktime(strptime(hour.decode(), '%m-%d-%Y %H'))
+    except ValueError:
+        return None
+
+
+def read_text_log(name, start, end, directory='logs'):
+    """Yield (timestamp, value) records from a text log between two timestamps, seeking with a LogIndex.
+    """
+    index = LogIndex(name, directory)
+    index.update()
+    hour_epochs = {}
+    with open(index.log_path, 'rb') as stream:
+        stream.seek(index.offset(start))
+        timestamp, lines = None, []
+        for line in stream:
+            match = DATE_LINE.fullmatch(line)
+            if match and timestamp is None:
+                hour = hour_epochs.get(match[1])
+                if hour is None:
+                    hour = hour_epochs[match[1]] = hour_epoch(match[1])
+                if hour is not None:
+                    timestamp = hour + int(match[2]) * 60 + int(match[3])
+                    if timestamp > end:
+                        return
+                continue
+            if timestamp is None:
+                continue
+            line = line.rstrip(b'\r\n')
+            if line:
+                lines.append(line.decode(errors='replace'))
+                continue
+            # A blank line ends the record.
+            if timestamp >= start:
+                value = '\n'.join(lines)
+                yield timestamp, float(value) if is_float(value) else value
+            timestamp, lines = None, []
+
+
+def read_binary_log(name, start, end, directory='logs'):
+    """Yield (timestamp, value) records from the days of a binary log between two timestamps.
+    """
+    first = strftime('%Y-%m-%d', localtime(start))
+    last = strftime('%Y-%m-%d', localtime(end)) if end != float('inf') else '9999-12-31'
+    for day in log_days(name, directory):
+        if not first <= day <= last:
+            continue
+        log_day = BinaryLogDay(name, day, directory)
+        try:
+            timestamps, values = log_day.timestamps, log_day.values
+            numbers = ((timestamps[i], values[i]) for i in range(bisect_left(timestamps, start), len(timestamps)))
+            strings = (record for record in log_day.strings if record[0] >= start)
+            for record in merge(numbers, strings, key=lambda record: record[0]):
+                if record[0] > end:
+                    return
+                yield record
+        finally:
+            log_day.close()
+
+
+def read_log(name, start=None, end=None, directory='logs'):
+    """Lazily yield (timestamp, value) records of a log between two epoch timestamps, oldest first.
+
+    Reads both the text log and the binary log of a name, whichever exist, without reading the
+    rest of either: text logs seek with a LogIndex and binary logs bisect their days.
+
+        for timestamp, value in read_log('Bitcoin', time() - 3600):
+            ...
+    """
+    start = start if start is not None else 0.0
+    end = end if end is not None else float('inf')
+    sources = []
+    if path.exists(path.join(directory, f'{name}.txt')):
+        sources.append(read_text_log(name, start, end, directory))
+    if log_days(name, directory):
+        sources.append(read_binary_log(name, start, end, directory))
+    return merge(*sources, key=lambda record: record[0])
+
+
+def merge_log_day(name, day, numbers, strings, directory='logs'):
+    """Merge (timestamp, value) records into a day of a binary log, keeping its files sorted by
+    timestamp as read_binary_log() expects. numbers are floats for the .bin file; strings go to the
+    .str file. Each file is rewritten to a temporary file which then replaces it.
+    """
+    log_day = BinaryLogDay(name, day, directory)
+    try:
+        numbers = sorted(list(zip(log_day.timestamps, log_day.values)) + numbers, key=lambda record: record[0])
+        strings = sorted(log_day.strings + strings, key=lambda record: record[0])
+    finally:
+        log_day.close()
+    makedirs(path.join(directory, name), exist_ok=True)
+    day_path = path.join(directory, name, day)
+    if numbers:
+        with open(f'{day_path}.bin.tmp', 'wb') as stream:
+            stream.write(b''.join(RECORD.pack(timestamp, value) for timestamp, value in numbers))
+        replace(f'{day_path}.bin.tmp', f'{day_path}.bin')
+    if strings:
+        with open(f'{day_path}.str.tmp', 'w') as stream:
+            stream.write(''.join(f'{timestamp!r}\t{dumps(value)}\n' for timestamp, value in strings))
+        replace(f'{day_path}.str.tmp', f'{day_path}.str')
+
+
+def convert_text_log(name, directory='logs'):
+    """Convert logs/<name>.txt written by TickerAPI.logger into binary logs.
+
+    Records are merged into the binary log's day files with merge_log_day(), so days which already
+    have binary records, e.g. after switching "log_format" partway through a day, stay in timestamp
+    order. The text log is then archived as logs/<name>.txt.converted and its LogIndex removed,
+    so read_log() doesn't read its records twice. Run it while nothing is writing to either log.
+    return the number of records converted.
+    """
+    days = {}
+    converted = 0
+    with open(path.join(directory, f'{name}.txt'), 'r') as stream:
+        date_time, lines = None, []
+        for line in stream:
+            line = line.rstrip('\n')
+            if date_time is None:
+                if line.startswith('[') and line.endswith(']'):
+                    date_time = line[1:-1]
+                continue
+            # Values may span several lines, e.g. whole JSON objects. A blank line ends the record.
+            if line:
+                lines.append(line)
+                continue
+            try:
+                timestamp = mktime(strptime(date_time, '%m-%d-%Y %H:%M:%S'))
+            except ValueError:
+                print_thread(f'{name}: Skipping record with invalid date {date_time}')
+            else:
+                value = '\n'.join(lines)
+                numbers, strings = days.setdefault(strftime('%Y-%m-%d', localtime(timestamp)), ([], []))
+                if is_float(value):
+                    numbers.append((timestamp, float(value)))
+                else:
+                    strings.append((timestamp, value))
+                converted += 1
+            date_time, lines = None, []
+    if date_time is not None:
+        print_thread(f'{name}: Skipping unfinished last record at {date_time}')
+    for day, (numbers, strings) in days.items():
+        merge_log_day(name, day, numbers, strings, directory)
+    text_path = path.join(directory, f'{name}.txt')
+    replace(text_path, f'{text_path}.converted')
+    try:
+        remove(path.join(directory, f'{name}.idx'))
+    except FileNotFoundError:
+        pass
+    return converted
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'convert':
+        names = sys.argv[2:] or [filename[:-4] for filename in listdir('logs') if filename.endswith('.txt')]
+        for name in names:
+            print_thread(f'{name}: Converted {convert_text_log(name)} records')
+    else:
+        print_thread('Usage: python logs.py convert [name ...]')
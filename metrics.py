@@ -0,0 +1,208 @@
+# γTicker instrumentation for ticker_api.py, functions.py, engine.py, classes.py, and daemon.py
+# Metrics, MetricsServer, Histogram
+#
+# With the "metrics_port" global setting, metrics are served on http://127.0.0.1:<port>/metrics
+# in the Prometheus text format:
+#
+#     yticker_request_seconds{url}           Histogram of request latency, until the body is read.
+#     yticker_parse_seconds{url}             Histogram of json.loads time.
+#     yticker_match_seconds{row}             Histogram of TickerAPI.match_value time.
+#     yticker_timer_drift_seconds            Histogram of how late scheduled fetches started.
+#     yticker_response_bytes_total{url}      Body bytes received.
+#     yticker_errors_total{url, error}       Invalid URL, Invalid API, and Throttled responses.
+#     yticker_row_age_seconds{row, url}      Seconds since a row last got a valid response.
+#     yticker_fetch_<count>_total            network.fetch_stats counters.
+
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Lock, Thread
+from time import time
+from settings import settings, print_thread
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class Histogram:
+    """Counts of observations at or below each of the fixed BUCKETS, with their sum.
+    """
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, fraction):
+        """Estimate a quantile as the upper bound of the bucket it falls in.
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return BUCKETS[-1]
+
+
+def label_text(labels):
+    """Prometheus label set, e.g. (('url', 'https://...'),) -> '{url="https://..."}'.
+    """
+    if not labels:
+        return ''
+
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    pairs = ','.join(f'{key}="{escape(value)}"' for key, value in labels)
+    return '{' + pairs + '}'
+
+
+class Metrics:
+    """Thread-safe histograms, counters, and per-row timestamps recorded while fetching.
+
+    Labels are given as keyword arguments:
+
+        metrics.observe('yticker_request_seconds', 0.123, url=url)
+        metrics.add('yticker_errors_total', url=url, error='Invalid URL')
+        metrics.fresh('Bitcoin', 'https://api.coinbase.com/v2/prices/BTC-USD/spot')
+        metrics.forget('Bitcoin', 'https://api.coinbase.com/v2/prices/BTC-USD/spot')
+        metrics.render()
+    """
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.last_success = {}
+        self.lock = Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def add(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def fresh(self, row, url, timestamp=None):
+        """Note that a row got a valid response, for yticker_row_age_seconds.
+        Rows are keyed by name and URL, since names alone needn't be unique.
+        """
+        with self.lock:
+            self.last_success[(row, url)] = timestamp if timestamp else time()
+
+    def forget(self, row, url):
+        """Stop reporting the age of a row which was deleted, renamed, or given a new URL.
+        """
+        with self.lock:
+            self.last_success.pop((row, url), None)
+
+    def render(self):
+        """return every metric in the Prometheus text exposition format.
+        """
+        from network import fetch_stats
+
+        lines = []
+        typed = set()
+        with self.lock:
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {name} histogram')
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{label_text(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{label_text(labels)} {histogram.total!r}')
+                lines.append(f'{name}_count{label_text(labels)} {histogram.count}')
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {name} counter')
+                lines.append(f'{name}{label_text(labels)} {value}')
+            now = time()
+            lines.append('# TYPE yticker_row_age_seconds gauge')
+            for (row, url), timestamp in sorted(self.last_success.items()):
+                lines.append(f'yticker_row_age_seconds{label_text((("row", row), ("url", url)))} {now - timestamp:.3f}')
+        for key, value in fetch_stats.snapshot().items():
+            if key != 'hit_rate':
+                lines.append(f'yticker_fetch_{key}_total {value}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """return rows for the stats window: per URL request count, errors, mean and p95 latency,
+        and bytes, and per (row, url) the seconds since its last valid response.
+        """
+        with self.lock:
+            urls = {}
+            for (name, labels), histogram in self.histograms.items():
+                if name == 'yticker_request_seconds':
+                    url = dict(labels)['url']
+                    urls[url] = {'requests': histogram.count, 'mean': histogram.total / histogram.count,
+                                 'p95': histogram.quantile(0.95), 'errors': 0, 'bytes': 0}
+            for (name, labels), value in self.counters.items():
+                url = dict(labels).get('url')
+                if url is None:
+                    continue
+                stats = urls.setdefault(url, {'requests': 0, 'mean': 0.0, 'p95': 0.0, 'errors': 0, 'bytes': 0})
+                if name == 'yticker_errors_total':
+                    stats['errors'] += value
+                elif name == 'yticker_response_bytes_total':
+                    stats['bytes'] += value
+            now = time()
+            ages = {key: now - timestamp for key, timestamp in self.last_success.items()}
+            drift = self.histograms.get(('yticker_timer_drift_seconds', ()))
+            drift = (drift.total / drift.count, drift.quantile(0.95)) if drift and drift.count else (0.0, 0.0)
+        return urls, ages, drift
+
+
+metrics = Metrics()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Serve metrics.render() on http://127.0.0.1:<port>/metrics from a background thread.
+
+    Started by Ticker and Daemon when the "metrics_port" global setting is set.
+    """
+    def __init__(self, port=None, host='127.0.0.1'):
+        self.port = port if port else settings.dictionary['global'].get('metrics_port', 0)
+        self.server = None
+        if self.port:
+            try:
+                self.server = ThreadingHTTPServer((host, self.port), MetricsHandler)
+            except OSError as error:
+                print_thread(f'Error -- Metrics server not started on port {self.port}: {error}')
+                return
+            self.server.daemon_threads = True
+            Thread(target=self.server.serve_forever, daemon=True).start()
+            print_thread(f'Serving metrics on http://{host}:{self.port}/metrics')
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
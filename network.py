@@ -0,0 +1,266 @@
+# γTicker networking objects for classes.py and ticker_api.py
+# SessionPool, RateLimiter, FetchCache, FetchStats
+
+from threading import Lock
+from concurrent.futures import Future
+from time import monotonic, time
+from random import uniform
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from settings import settings
+from functions import normalize_url
+
+
+class SessionPool:
+    """Shared, per-host pool of keep-alive HTTP sessions used by every TickerAPI object.
+
+    Each host gets its own requests.Session with an HTTPAdapter holding up to pool_size
+    connections, so repeated requests to the same exchange reuse an open TCP/TLS connection
+    instead of doing a fresh DNS lookup and handshake every refresh.
+
+    Owned by Ticker and closed in Ticker.on_close(). requests is imported by the first session(),
+    so it isn't loaded before the window is shown.
+
+        pool = SessionPool()
+        response = pool.get('https://api.example.com/price')
+        pool.close()
+    """
+    def __init__(self, pool_size=None, keep_alive=None, timeout=None):
+        global_settings = settings.dictionary['global']
+        self.pool_size = pool_size if pool_size is not None else global_settings.get('pool_size', 10)
+        self.keep_alive = keep_alive if keep_alive is not None else global_settings.get('keep_alive', True)
+        self.timeout = timeout if timeout is not None else global_settings.get('timeout', 10)
+        self.sessions = {}
+        self.lock = Lock()
+
+    def session(self, url):
+        """Return the requests.Session for the host of a given URL, creating it if needed.
+        """
+        parts = urlsplit(url)
+        host = f'{parts.scheme}://{parts.netloc}'
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                from requests import Session
+                from requests.adapters import HTTPAdapter
+                session = Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount(f'{parts.scheme}://', adapter)
+                if not self.keep_alive:
+                    session.headers['Connection'] = 'close'
+                self.sessions[host] = session
+        return session
+
+    def get(self, url, **kwargs):
+        """Send a GET request through the pooled session for the URL's host.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session(url).get(url, **kwargs)
+
+    def close(self):
+        """Close every pooled session and its open connections.
+        """
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+class RateLimiter:
+    """Per-host token buckets with exponential backoff, shared by every TickerAPI object.
+
+    With a "rate_limit" global setting, each host refills that many requests per second up to a
+    burst of "rate_burst". Requests beyond it are given the next token to come, and are rescheduled
+    for when it's refilled, so rows are served in the order they asked and none of them starve.
+    It's off with the default of 0.
+
+    After a 429/503 the host is paused for its Retry-After, and after other failures for
+    "backoff_base" * 2 ** (failures - 1) seconds with full jitter, capped at "backoff_max".
+    Requests to a paused host are refused.
+
+    reserve() never waits, so a busy host can't hold up the shared workers fetching other hosts.
+
+        wait = rate_limiter.reserve(url)
+        if wait == 0:
+            ...
+            rate_limiter.success(url)    # or rate_limiter.failure(url, retry_after)
+        elif wait is not None:
+            ...                          # Send after wait seconds, without reserving again.
+    """
+    def __init__(self, rate=None, burst=None, backoff_base=None, backoff_max=None):
+        global_settings = settings.dictionary['global']
+        self.rate = rate if rate is not None else global_settings.get('rate_limit', 0)
+        self.burst = burst if burst else global_settings.get('rate_burst', 5)
+        self.backoff_base = backoff_base if backoff_base else global_settings.get('backoff_base', 2)
+        self.backoff_max = backoff_max if backoff_max else global_settings.get('backoff_max', 300)
+        self.hosts = {}
+        self.lock = Lock()
+
+    def host(self, url):
+        """return the state of the host of a URL: [tokens, last refill, failures, paused until].
+        Called with the lock held.
+        """
+        host = urlsplit(url).netloc
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = [float(self.burst), monotonic(), 0, 0.0]
+        return state
+
+    def reserve(self, url):
+        """Take a token for the URL's host without waiting, borrowing from the refill to come when
+        there's none left.
+
+        return the seconds until the request may be sent: 0 for now, more when the token was
+        borrowed, or None when the host is backing off.
+        """
+        with self.lock:
+            state = self.host(url)
+            now = monotonic()
+            if now < state[3]:
+                return None
+            if not self.rate:
+                return 0.0
+            state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+            state[1] = now
+            state[0] -= 1
+            return 0.0 if state[0] >= 0 else -state[0] / self.rate
+
+    def paused(self, url):
+        """return True while the URL's host is backing off.
+        """
+        with self.lock:
+            return monotonic() < self.host(url)[3]
+
+    def success(self, url):
+        with self.lock:
+            self.host(url)[2] = 0
+
+    def failure(self, url, retry_after=None):
+        """Pause the URL's host after a failed request.
+
+        retry_after is a Retry-After header, either seconds or an HTTP date, which is honored
+        as given. Otherwise the pause grows exponentially with each consecutive failure.
+        return the pause in seconds.
+        """
+        delay = self.retry_after(retry_after)
+        with self.lock:
+            state = self.host(url)
+            state[2] += 1
+            if delay is None:
+                delay = uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (state[2] - 1)))
+            state[3] = max(state[3], monotonic() + delay)
+        return delay
+
+    @staticmethod
+    def retry_after(header):
+        """return the seconds in a Retry-After header, or None when missing or invalid.
+        """
+        if not header:
+            return None
+        header = header.strip()
+        if header.isdigit():
+            return float(header)
+        try:
+            return max(0.0, parsedate_to_datetime(header).timestamp() - time())
+        except (TypeError, ValueError):
+            return None
+
+
+rate_limiter = RateLimiter()
+
+
+class FetchCache:
+    """Responses shared between rows requesting the same URL, keyed by normalize_url().
+
+    A row whose refresh is due gets the cached response if it's younger than "cache_ttl" seconds
+    and its own refresh interval, and only fetches it otherwise. Rows asking for a URL which is
+    already being fetched wait on that request's Future instead of sending their own.
+
+    Stale responses are kept so their validators can be sent with the next request.
+
+        response = fetch_cache.get(url, request, max_age=60)
+    """
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else settings.dictionary['global'].get('cache_ttl', 5)
+        self.entries = {}
+        self.inflight = {}
+        self.lock = Lock()
+
+    def get(self, url, fetch, max_age=None):
+        """return a response for a URL, calling fetch(previous) when there isn't a fresh one.
+
+        previous is the last cached response, or None. Responses with an "error" aren't cached.
+        """
+        key = normalize_url(url)
+        max_age = self.ttl if max_age is None else min(self.ttl, max_age)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and monotonic() - entry[0] <= max_age:
+                fetch_stats.add('cache_hits')
+                return entry[1]
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.inflight[key] = Future()
+        if not owner:
+            fetch_stats.add('coalesced')
+            return future.result()
+        try:
+            response = fetch(entry[1] if entry is not None else None)
+        except BaseException as error:
+            with self.lock:
+                del self.inflight[key]
+            future.set_exception(error)
+            raise
+        with self.lock:
+            del self.inflight[key]
+            if not response.get('error'):
+                self.entries[key] = (monotonic(), response)
+        future.set_result(response)
+        return response
+
+    def forget(self, url):
+        """Drop the cached response for a URL, e.g. when no row requests it anymore.
+        """
+        with self.lock:
+            self.entries.pop(normalize_url(url), None)
+
+
+fetch_cache = FetchCache()
+
+
+class FetchStats:
+    """Thread-safe counters of how many fetches were served from the FetchCache, answered by
+    conditional requests, or returned an unchanged body, and the bandwidth and parsing that saved.
+
+        requests      -- responses received
+        cache_hits    -- fetches served by a fresh response in the FetchCache
+        coalesced     -- fetches which waited on another row's request for the same URL
+        not_modified  -- 304 Not Modified responses
+        throttled     -- requests refused by the RateLimiter or answered with 429/503
+        unchanged     -- 200 responses with the same body as last time, not parsed again
+        bytes         -- body bytes received
+        bytes_saved   -- body bytes not sent thanks to 304 responses
+    """
+    def __init__(self):
+        self.counts = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'not_modified': 0, 'throttled': 0,
+                       'unchanged': 0, 'bytes': 0, 'bytes_saved': 0}
+        self.lock = Lock()
+
+    def add(self, key, amount=1):
+        with self.lock:
+            self.counts[key] += amount
+
+    def snapshot(self):
+        """return a copy of the counts with the share of fetches that skipped downloading or parsing.
+        """
+        with self.lock:
+            counts = dict(self.counts)
+        shared = counts['cache_hits'] + counts['coalesced']
+        skipped = shared + counts['not_modified'] + counts['unchanged']
+        fetches = shared + counts['requests']
+        counts['hit_rate'] = skipped / fetches if fetches else 0.0
+        return counts
+
+
+fetch_stats = FetchStats()
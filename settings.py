@@ -1,6 +1,9 @@
 # γTicker Settings object used in classes.py, classes_other.py, alarms.py, and functions.py
 
 from json import loads, dumps
+from os import replace, fsync
+from threading import Thread, RLock, Condition
+from time import monotonic
 from util import dir_path
 
 
@@ -8,9 +11,25 @@ from util import dir_path
 class Settings:
     """Create/edit/manage the settings dictionary containing global settings and API data,
     saved/retrieved to/from settings file within directory.
+
+    Frequent changes, e.g. toggling or triggering alarms and reordering rows, should call
+    mark_dirty() rather than save(). A background writer coalesces them into one write once
+    changes have stopped for "save_delay" seconds, or at most every "save_max_delay" seconds.
     """
     def __init__(self):
-        self.dictionary = {'global': {'text': 'Medium', 'foreground': False, 'geometry': '285x310'}, 'apis': []}
+        self.dictionary = {'global': {'text': 'Medium', 'foreground': False, 'geometry': '350x310',
+                                      'pool_size': 10, 'keep_alive': True, 'timeout': 10,
+                                      'stream_json': False, 'log_format': 'text',
+                                      'history_size': 1000, 'cache_ttl': 5, 'metrics_port': 0,
+                                      'rate_limit': 0, 'rate_burst': 5, 'backoff_base': 2, 'backoff_max': 300,
+                                      'startup_stagger': 2, 'snapshot_interval': 60},
+                           'apis': []}
+        self.lock = RLock()
+        self.condition = Condition(self.lock)
+        self.dirty = False
+        self.first_dirty = None
+        self.last_dirty = None
+        self.writer = None
         self.get()
 
     def get(self):
@@ -28,14 +47,66 @@ class Settings:
 
     def save(self):
         """Attempt to write Settings.settings to settings file using json.dumps()
+
+        Written to a temporary file which then replaces the settings file, so a crash
+        mid-write can't leave a torn file behind.
         """
-        try:
-            with open(dir_path('settings'), 'w') as stream:
-                stream.write(dumps(self.dictionary))
-        except Exception as error:
-            print_thread(f'Settings not saved: {error}')
-        else:
-            print_thread('Settings saved successfully.')
+        with self.lock:
+            self.dirty = False
+            try:
+                contents = dumps(self.dictionary)
+                temp_path = dir_path('settings.tmp')
+                with open(temp_path, 'w') as stream:
+                    stream.write(contents)
+                    stream.flush()
+                    fsync(stream.fileno())
+                replace(temp_path, dir_path('settings'))
+            except Exception as error:
+                print_thread(f'Settings not saved: {error}')
+                # e.g. the dictionary changed size while being serialized. Try again shortly.
+                if self.writer is not None:
+                    self.dirty = True
+                    self.first_dirty = self.last_dirty = monotonic()
+            else:
+                print_thread('Settings saved successfully.')
+
+    def mark_dirty(self):
+        """Note that the settings dictionary has changed and should be saved soon. Thread-safe.
+        """
+        with self.lock:
+            now = monotonic()
+            if not self.dirty:
+                self.dirty = True
+                self.first_dirty = now
+            self.last_dirty = now
+            if self.writer is None:
+                self.writer = Thread(target=self.write_loop, daemon=True)
+                self.writer.start()
+            self.condition.notify()
+
+    def write_loop(self):
+        """Background writer started by the first mark_dirty().
+        """
+        with self.lock:
+            while True:
+                if not self.dirty:
+                    self.condition.wait()
+                    continue
+                global_settings = self.dictionary['global']
+                deadline = min(self.last_dirty + global_settings.get('save_delay', 1),
+                               self.first_dirty + global_settings.get('save_max_delay', 5))
+                now = monotonic()
+                if now < deadline:
+                    self.condition.wait(deadline - now)
+                    continue
+                self.save()
+
+    def flush(self):
+        """Save now if there are unsaved changes. Called when γTicker is closed.
+        """
+        with self.lock:
+            if self.dirty:
+                self.save()
 
 
 def print_thread(string):
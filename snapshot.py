@@ -0,0 +1,102 @@
+# γTicker last-value snapshot for classes.py and daemon.py
+# Snapshot
+#
+# The last value of every row is saved to the "snapshot" file on close and every "snapshot_interval"
+# seconds, and restored when rows are created, so rows show their last-known values before the first fetch:
+#
+#     {"version": 1, "rows": {"<name>\n<url>\n<term>": [value, value_formatted, change, timestamp, time, truncated]}}
+
+from json import loads, dumps
+from os import replace
+from threading import Lock
+from settings import print_thread
+from util import dir_path
+
+VERSION = 1
+
+
+class Snapshot:
+    """Last value, formatted value, change arrow, and time of every TickerAPI, saved between runs.
+
+    The whole file is read once by load(), after which restore() is a dictionary lookup per row.
+    Rows are keyed by name, URL, and term, so a row whose URL or term has changed starts blank.
+
+        snapshot.load()
+        snapshot.restore(api_object)
+        snapshot.save(api_objects)
+    """
+    def __init__(self, file_name='snapshot'):
+        self.path = dir_path(file_name)
+        self.rows = {}
+        self.lock = Lock()
+
+    @staticmethod
+    def key(api_object):
+        return f'{api_object.name}\n{api_object.url}\n{api_object.term}'
+
+    def load(self):
+        """Read every row of the snapshot file with one read. A missing or invalid file leaves no rows.
+        """
+        self.rows = {}
+        try:
+            with open(self.path, 'r') as stream:
+                dictionary = loads(stream.read())
+        except FileNotFoundError:
+            return
+        except Exception as error:
+            print_thread(f'Error -- Invalid snapshot file: {error}')
+            return
+        if isinstance(dictionary, dict) and dictionary.get('version') == VERSION:
+            self.rows = dictionary.get('rows', {})
+
+    def restore(self, api_object):
+        """Set the last saved value of a TickerAPI.
+
+        return True if there was one.
+        """
+        try:
+            value, value_formatted, change, timestamp, time, truncated = self.rows[self.key(api_object)]
+        except (KeyError, TypeError, ValueError):
+            return False
+        api_object.value = value
+        api_object.value_formatted = value_formatted
+        api_object.change = change
+        api_object.timestamp = timestamp
+        api_object.time = time
+        api_object.truncated = truncated
+        if isinstance(value, float) and timestamp:
+            api_object.history.append(timestamp, value)
+        return True
+
+    def collect(self, api_objects):
+        """return snapshot rows for TickerAPI objects with a value. Cheap enough to run on the mainloop.
+
+        Values other than numbers and strings, e.g. a whole API dictionary, are left out,
+        keeping only their formatted value.
+        """
+        rows = {}
+        for api_object in api_objects:
+            if api_object is None or api_object.value_formatted is None:
+                continue
+            value = api_object.value if isinstance(api_object.value, (float, str)) else None
+            rows[self.key(api_object)] = [value, api_object.value_formatted, api_object.change,
+                                          api_object.timestamp, api_object.time, api_object.truncated]
+        return rows
+
+    def write(self, rows):
+        """Write snapshot rows with one write to a temporary file, which then replaces the snapshot file.
+        """
+        with self.lock:
+            temporary = self.path + '.tmp'
+            try:
+                with open(temporary, 'w') as stream:
+                    stream.write(dumps({'version': VERSION, 'rows': rows}, separators=(',', ':')))
+                replace(temporary, self.path)
+            except Exception as error:
+                print_thread(f'Error -- Failed to save snapshot: {error}')
+
+    def save(self, api_objects):
+        self.write(self.collect(api_objects))
+
+
+snapshot = Snapshot()
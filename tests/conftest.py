@@ -0,0 +1,9 @@
+# γTicker test configuration
+# Settings and snapshot files are written to a temporary directory instead of next to the modules.
+
+from os import path
+from tempfile import mkdtemp
+import util
+
+SETTINGS_DIRECTORY = mkdtemp(prefix='yticker-tests-')
+util.dir_path = lambda file_name: path.join(SETTINGS_DIRECTORY, file_name)
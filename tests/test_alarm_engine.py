@@ -0,0 +1,97 @@
+# γTicker tests for alarm_engine.py
+# AlarmSet, RollingWindow, describe_alarm
+
+from alarm_engine import AlarmSet, RollingWindow, describe_alarm
+
+
+def percent_alarm(percent=50.0, window=3, inequality='>'):
+    return {'enabled': True, 'inequality': inequality, 'value': percent, 'type': 'percent', 'window': window}
+
+
+def threshold_alarm(inequality, value, enabled=True):
+    return {'enabled': enabled, 'inequality': inequality, 'value': value}
+
+
+def test_threshold_alarms():
+    above = [threshold_alarm('>', value) for value in (110.0, 100.0, 120.0)]
+    below = [threshold_alarm('<', value) for value in (90.0, 80.0)]
+    alarm_set = AlarmSet(above + below + [threshold_alarm('>', 50.0, enabled=False)])
+    assert len(alarm_set) == 5
+    assert alarm_set.check(95.0) == []
+    assert alarm_set.check(110.0) == [above[1], above[0]]
+    # Triggered alarms are removed, as they are disabled once triggered.
+    assert alarm_set.check(110.0) == []
+    assert alarm_set.check(85.0) == [below[0]]
+    assert alarm_set.check(80.0) == [below[1]]
+    assert len(alarm_set) == 1
+    assert alarm_set.check(130.0) == [above[2]]
+
+
+def test_invalid_alarms_are_skipped_without_evaluating():
+    alarm_set = AlarmSet([threshold_alarm('>', "__import__('os').system('exit 1')"),
+                          threshold_alarm('>', None), threshold_alarm('>', '100')])
+    assert len(alarm_set) == 1
+    assert alarm_set.check(100.0) == [threshold_alarm('>', '100')]
+
+
+def test_describe_alarm():
+    assert describe_alarm(threshold_alarm('>', 120.0)) == '>= 120.0'
+    assert describe_alarm(percent_alarm(5.0, 10, '<')) == 'fell 5.0% within 10 refreshes'
+
+
+def test_rolling_window():
+    window = RollingWindow(3)
+    for i, value in enumerate([1.0, 2.0, 3.0, 4.0]):
+        window.push(value, float(i))
+    assert window.full()
+    assert window.latest() == 4.0
+    assert window.oldest() == (2.0, 1.0)
+    assert window.mean() == 3.0
+    assert window.previous_mean == 2.0
+
+
+def test_percent_alarm():
+    alarm = percent_alarm()
+    alarm_set = AlarmSet([alarm])
+    assert alarm_set.check(100.0, 1.0) == []
+    assert alarm_set.check(120.0, 2.0) == []
+    assert alarm_set.check(160.0, 3.0) == [alarm]
+    assert alarm_set.check(300.0, 4.0) == []
+
+
+def test_moving_average_cross():
+    alarm = {'enabled': True, 'inequality': '>', 'value': 0, 'type': 'ma_cross', 'window': 3}
+    alarm_set = AlarmSet([alarm])
+    assert [alarm_set.check(value) for value in (10.0, 9.0, 8.0, 7.0)] == [[], [], [], []]
+    assert alarm_set.check(12.0) == [alarm]
+
+
+def test_velocity_alarm():
+    alarm = {'enabled': True, 'inequality': '<', 'value': 1.0, 'type': 'velocity', 'window': 2}
+    alarm_set = AlarmSet([alarm])
+    assert alarm_set.check(100.0, 0.0) == []
+    assert alarm_set.check(99.5, 1.0) == []
+    assert alarm_set.check(90.0, 2.0) == [alarm]
+
+
+def test_reenabled_alarm_uses_recent_values():
+    alarm = percent_alarm()
+    alarm_set = AlarmSet([alarm])
+    for timestamp in range(3):
+        alarm_set.check(100.0, float(timestamp))
+    alarm['enabled'] = False
+    alarm_set.load([alarm])
+    assert alarm_set
+    for timestamp in range(3, 10):
+        alarm_set.check(200.0, float(timestamp))
+    alarm['enabled'] = True
+    alarm_set.load([alarm])
+    assert alarm_set.check(200.0, 10.0) == []
+
+
+def test_windows_of_deleted_alarms_are_dropped():
+    alarm_set = AlarmSet([percent_alarm(window=3), percent_alarm(window=5)])
+    alarm_set.load([percent_alarm(window=5)])
+    assert list(alarm_set.windows) == [5]
+    alarm_set.load([])
+    assert not alarm_set
@@ -0,0 +1,17 @@
+# γTicker tests for daemon.py
+# DaemonRow
+
+import ticker_api
+from daemon import DaemonRow
+
+
+def test_unchanged_responses_count_towards_alarm_windows(monkeypatch):
+    alarm = {'enabled': True, 'inequality': '>', 'value': 50.0, 'type': 'percent', 'window': 3}
+    row = DaemonRow({'name': 'Bitcoin', 'url': 'https://api.example.com/price', 'term': 'price',
+                     'decimals': None, 'log': False, 'refresh': 10, 'alarms': [alarm]}, None)
+    responses = [{'api_dict': {'price': price}} for price in ('100', '120', '160')]
+    # 120 is seen three times in a row, so within 3 refreshes the value only rose from 120 to 160.
+    for response in [responses[0], responses[1], responses[1], responses[1], responses[2]]:
+        monkeypatch.setattr(ticker_api.fetch_cache, 'get', lambda url, fetch, max_age=None: response)
+        row.fetch()
+    assert alarm['enabled']
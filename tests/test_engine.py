@@ -0,0 +1,82 @@
+# γTicker tests for engine.py
+# FetchEngine
+
+from threading import Event
+from time import monotonic, sleep
+import pytest
+from engine import FetchEngine
+
+
+@pytest.fixture
+def engine():
+    engine = FetchEngine(lambda function: function(), concurrency=2)
+    yield engine
+    engine.close()
+
+
+def test_engine_repeats_until_cancelled(engine):
+    calls = []
+    called = Event()
+
+    def function():
+        calls.append(1)
+        if len(calls) == 3:
+            called.set()
+
+    handle = engine.schedule(0.02, function)
+    assert called.wait(2)
+    handle.cancel()
+
+
+def test_engine_retries_once_when_asked(engine):
+    calls = []
+    retried = Event()
+
+    def function():
+        calls.append(monotonic())
+        if len(calls) == 1:
+            return 0.05
+        retried.set()
+
+    engine.schedule(10, function)
+    assert retried.wait(1)
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.04
+
+
+def test_engine_jitters_periodic_calls():
+    engine = FetchEngine(lambda function: function(), concurrency=1, jitter=0.1)
+    try:
+        assert all(0 <= engine.offset(10) <= 1 for _ in range(100))
+        assert all(0 <= engine.offset(3600) <= 5 for _ in range(100))
+        assert 0 <= engine.schedule(10, lambda: None, delay=60).jitter <= 1
+        assert engine.schedule(None, lambda: None, delay=60).jitter == 0
+    finally:
+        engine.close()
+
+
+def test_engine_first_call_is_not_jittered():
+    engine = FetchEngine(lambda function: function(), concurrency=1, jitter=1)
+    called = Event()
+    try:
+        start = monotonic()
+        engine.schedule(1, called.set)
+        assert called.wait(0.5)
+        assert monotonic() - start < 0.5
+    finally:
+        engine.close()
+
+
+def test_engine_close_cancels_every_call():
+    engine = FetchEngine(lambda function: function(), concurrency=2)
+    calls = []
+    handles = [engine.schedule(0.02, lambda: calls.append(1)) for _ in range(20)]
+    sleep(0.1)
+    engine.close()
+    engine.thread.join(2)
+    assert not engine.thread.is_alive()
+    assert all(handle.cancelled for handle in handles)
+    assert engine.handles == set()
+    total = len(calls)
+    sleep(0.1)
+    assert len(calls) == total
@@ -0,0 +1,320 @@
+# γTicker tests for functions.py
+# Scheduler, UpdateQueue, compile_path, path_get, dict_search, stream_search, RowOrder, UrlIndex, batch_url, batch_item
+
+from threading import Event
+from time import sleep, monotonic
+import pytest
+from functions import Scheduler, UpdateQueue, compile_path, path_get, dict_search, stream_search, RowOrder, UrlIndex, batch_url, \
+    batch_item
+
+
+class FakeAPI:
+    def __init__(self, url, batch_value=None):
+        self.url = url
+        self.batch = {'url': 'https://api.example.com/price', 'param': 'symbols', 'value': batch_value} if batch_value else None
+        self.request_url = None
+        self.shared = False
+
+
+class FakeRow:
+    def __init__(self, api_object=None, name=None):
+        self.api_object = api_object
+        self.api_settings = {'name': name}
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler(workers=2, jitter=0)
+    yield scheduler
+    scheduler.close()
+
+
+def test_scheduler_offset_is_capped():
+    scheduler = Scheduler(workers=1, jitter=0.1)
+    try:
+        assert all(0 <= scheduler.offset(10) <= 1 for _ in range(100))
+        assert all(0 <= scheduler.offset(3600) <= 5 for _ in range(100))
+    finally:
+        scheduler.close()
+
+
+def test_scheduler_repeats_until_cancelled(scheduler):
+    calls = []
+    called = Event()
+
+    def function():
+        calls.append(1)
+        if len(calls) == 3:
+            called.set()
+
+    call = scheduler.schedule(0.02, function, delay=0)
+    assert called.wait(2)
+    call.cancel()
+    sleep(0.1)
+    total = len(calls)
+    sleep(0.1)
+    assert len(calls) == total
+
+
+def test_scheduler_first_call_waits_one_period(scheduler):
+    called = Event()
+    scheduler.schedule(0.3, called.set)
+    assert not called.wait(0.1)
+    assert called.wait(1)
+
+
+def test_scheduler_retries_once_when_asked(scheduler):
+    calls = []
+    retried = Event()
+
+    def function():
+        calls.append(monotonic())
+        if len(calls) == 1:
+            return 0.05
+        retried.set()
+
+    scheduler.schedule(10, function, delay=0)
+    assert retried.wait(1)
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.04
+
+
+class FakeWindow:
+    """Stand-in for the tkinter window, whose after() calls are run by hand.
+    """
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, milliseconds, function):
+        self.scheduled.append((milliseconds, function))
+
+
+class FakeDisplay:
+    def __init__(self, drawn):
+        self.drawn = drawn
+        self.value = None
+
+    def display(self):
+        self.drawn.append(self.value)
+
+
+def test_update_queue_coalesces_repeated_updates():
+    window = FakeWindow()
+    queue = UpdateQueue(window, redraws=4)
+    assert window.scheduled == [(250, queue.drain)]
+    drawn = []
+    first, second = FakeDisplay(drawn), FakeDisplay(drawn)
+    for value in range(3):
+        first.value = value
+        queue.put(first.display)
+        queue.put(second.display)
+    # Drawn once each, in the order they were last put, with the latest value.
+    queue.put(first.display)
+    queue.drain()
+    assert drawn == [None, 2]
+    assert len(window.scheduled) == 2
+    queue.drain()
+    assert drawn == [None, 2]
+
+
+def test_update_queue_keeps_draining_after_errors():
+    window = FakeWindow()
+    queue = UpdateQueue(window, redraws=10)
+    drawn = []
+    queue.put(lambda: 1 / 0)
+    queue.put(lambda: drawn.append(1))
+    queue.drain()
+    assert drawn == [1]
+    assert window.scheduled[-1] == (100, queue.drain)
+
+
+def test_compile_path():
+    assert compile_path('data.0.price') == ('data', 0, 'price')
+    assert compile_path('data.-1') == ('data', -1)
+    assert compile_path('price') is None
+    assert compile_path(None) is None
+
+
+def test_path_get():
+    data = {'data': [{'price': 1}, {'price': 2}], '0': {'price': 3}}
+    assert path_get(data, ('data', 1, 'price')) == 2
+    assert path_get(data, ('data', -1, 'price')) == 2
+    assert path_get(data, (0, 'price')) == 3
+    assert path_get(data, ('data', 5, 'price')) is None
+    assert path_get(data, ('data', 'price')) is None
+
+
+def test_dict_search_return_path():
+    data = {'name': 'Bitcoin', 'data': [{'volume': 1}, {'prices': {'usd': 2}}]}
+    path = dict_search(data, 'price', return_path=True)
+    assert path == ('data', 1, 'prices')
+    assert path_get(data, path) == dict_search(data, 'price') == {'usd': 2}
+    assert dict_search(data, 'price', exact_match=True, return_path=True) is None
+
+
+def test_stream_search_across_chunks():
+    chunks = ['{"name": "Bitcoin", "pri', 'ce": {"usd": [1', '9000.5, 2]}, "volume": 3}']
+    assert stream_search(chunks, 'price') == ('price', {'usd': [19000.5, 2]})
+
+
+def test_stream_search_partial_and_exact_match():
+    text = '{"prices": 1, "price": 2}'
+    assert stream_search([text], 'price') == ('prices', 1)
+    assert stream_search([text], 'price', exact_match=True) == ('price', 2)
+
+
+def test_stream_search_skips_strings_and_nested_keys():
+    text = '{"note": "\\"price\\": 0", "data": {"price": 1}, "price": 2}'
+    assert stream_search([text], 'price', exact_match=True) == ('price', 1)
+    assert stream_search([text], 'price', exact_match=True, top_level=True) == ('price', 2)
+    assert stream_search([text], 'missing') is None
+
+
+def test_stream_search_stops_reading_after_match():
+    def chunks():
+        yield '{"price": 5, '
+        yield '"rest": '
+        raise AssertionError('Read past the match')
+
+    assert stream_search(chunks(), 'price') == ('price', 5)
+
+
+def test_row_order_keys_between_neighbours():
+    rows, apis = [], []
+    order = RowOrder(rows, apis)
+    changes = []
+    order.listeners.append(lambda *change: changes.append(change))
+    first, second, third = FakeRow(name='first'), FakeRow(name='second'), FakeRow(name='third')
+    order.insert(first)
+    order.insert(second)
+    order.insert(third, 1)
+    assert rows == [first, third, second]
+    assert apis == [row.api_settings for row in rows]
+    assert first.api_settings['order'] < third.api_settings['order'] < second.api_settings['order']
+    assert [order.index(row) for row in rows] == [0, 1, 2]
+    order.move(first, 2)
+    assert rows == [third, second, first]
+    order.remove(second)
+    assert rows == [third, first]
+    assert changes == [('insert', 0), ('insert', 1), ('insert', 1), ('move', 0, 2), ('delete', 1)]
+
+
+def test_row_order_respaces_when_keys_run_out():
+    rows, apis = [], []
+    order = RowOrder(rows, apis)
+    first, last = FakeRow(name='first'), FakeRow(name='last')
+    order.insert(first)
+    order.insert(last)
+    # Each row goes between the first row and the one inserted before it, halving the gap every time.
+    for i in range(100):
+        order.insert(FakeRow(name=i), 1)
+    keys = [row.api_settings['order'] for row in rows]
+    assert keys == sorted(set(keys))
+    assert rows[0] is first and rows[-1] is last
+    assert [row.api_settings['name'] for row in rows[1:4]] == [99, 98, 97]
+
+
+def test_row_order_sort_gives_keys_to_old_settings():
+    apis = [{'name': 'a', 'sequence': 0}, {'name': 'b', 'sequence': 1}]
+    RowOrder([], apis).sort()
+    assert [api['order'] for api in apis] == [1.0, 2.0]
+    assert all('sequence' not in api for api in apis)
+
+
+def test_url_index_marks_shared_urls():
+    index = UrlIndex()
+    first = FakeRow(FakeAPI('https://API.example.com/price?b=2&a=1'))
+    second = FakeRow(FakeAPI('https://api.example.com/price?a=1&b=2#top'))
+    index.add(first)
+    assert not first.api_object.shared
+    index.add(second)
+    assert first.api_object.shared and second.api_object.shared
+    index.remove(second)
+    assert not first.api_object.shared
+
+
+def test_url_index_combines_batch_groups():
+    index = UrlIndex()
+    btc = FakeRow(FakeAPI('https://api.example.com/price?symbols=BTC', 'BTC'))
+    eth = FakeRow(FakeAPI('https://api.example.com/price?symbols=ETH', 'ETH'))
+    index.add(btc)
+    assert btc.api_object.request_url is None
+    index.add(eth)
+    assert btc.api_object.request_url == eth.api_object.request_url == 'https://api.example.com/price?symbols=BTC,ETH'
+    assert btc.api_object.shared and eth.api_object.shared
+
+
+def test_url_index_resets_rows_leaving_a_batch_group():
+    index = UrlIndex()
+    rows = [FakeRow(FakeAPI(f'https://api.example.com/price?symbols={value}', value)) for value in ('BTC', 'ETH', 'LTC')]
+    for row in rows:
+        index.add(row)
+    btc, eth, ltc = (row.api_object for row in rows)
+
+    # Batch settings cleared in properties.
+    ltc.batch = None
+    index.update(rows[2])
+    assert ltc.request_url is None
+    assert btc.request_url == eth.request_url == 'https://api.example.com/price?symbols=BTC,ETH'
+
+    # Left alone in the group.
+    index.remove(rows[1])
+    assert eth.request_url is None
+    assert btc.request_url is None
+    assert not btc.shared
+    assert index.indexed[btc] == 'https://api.example.com/price?symbols=BTC'
+
+
+def test_url_index_releases_unused_urls():
+    index = UrlIndex()
+    released = []
+    index.listeners.append(released.append)
+    first, second = FakeRow(FakeAPI('https://api.example.com/price')), FakeRow(FakeAPI('https://api.example.com/price'))
+    index.add(first)
+    index.add(second)
+    index.remove(first)
+    assert released == []
+    second.api_object.url = 'https://api.example.com/volume'
+    index.update(second)
+    assert released == ['https://api.example.com/price']
+    index.remove(second)
+    assert released == ['https://api.example.com/price', 'https://api.example.com/volume']
+
+
+def test_url_index_aligns_batch_groups():
+    index = UrlIndex()
+    rows = [FakeRow(FakeAPI(f'https://api.example.com/price?symbols={value}', value)) for value in ('BTC', 'ETH')]
+    for row in rows:
+        index.add(row)
+    btc, eth = (row.api_object for row in rows)
+    lone = FakeAPI('https://api.example.com/volume')
+    index.add(FakeRow(lone))
+    assert index.align(lone, 10, monotonic() + 3) is None
+
+    first = monotonic() + 3
+    assert index.align(btc, 10, first) == first
+    # Rows joining later fetch on the group's next deadline rather than their own.
+    assert index.align(eth, 10, first + 4.5) == first
+    assert index.align(eth, 30, first + 4.5) == first + 4.5
+    index.anchors[(index.batched[btc], 10)] -= 25
+    assert index.align(eth, 10, first + 4.5) == pytest.approx(first + 5)
+
+    # A group formed again starts over.
+    index.remove(rows[0])
+    index.remove(rows[1])
+    assert index.anchors == {}
+
+
+def test_batch_url():
+    assert batch_url('https://api.example.com/price?currency=usd', 'symbols', ['ETH', 'BTC', 'ETH']) == \
+           'https://api.example.com/price?currency=usd&symbols=BTC,ETH'
+    assert batch_url('https://api.example.com/price#top', 'ids', ['a b', 'c'], '|') == \
+           'https://api.example.com/price?ids=a+b|c'
+
+
+def test_batch_item():
+    assert batch_item({'BTC': {'price': 1}, 'ETH': {'price': 2}}, 'ETH') == {'price': 2}
+    data = {'data': [{'symbol': 'BTC', 'price': 1}, {'symbol': 'ETH', 'price': 2}]}
+    assert batch_item(data, 'ETH', split='symbol') == {'symbol': 'ETH', 'price': 2}
+    assert batch_item(data, 'LTC', split='symbol') is None
+    assert batch_item({'a': {'b': {'c': {'BTC': 1}}}}, 'BTC', depth=1) is None
@@ -0,0 +1,35 @@
+# γTicker tests for history.py
+# ValueHistory
+
+from array import array
+from history import ValueHistory
+
+
+def test_history_wraps_around():
+    history = ValueHistory(3)
+    assert list(history.last(5)) == []
+    for timestamp in range(1, 6):
+        history.append(float(timestamp), timestamp * 10.0)
+    assert len(history) == 3
+    assert history.appended == 5
+    assert history.last(5) == array('d', [30.0, 40.0, 50.0])
+    assert list(history.last(2)) == [40.0, 50.0]
+
+
+def test_history_replaces_values_with_the_same_timestamp():
+    history = ValueHistory(2)
+    history.append(1.0, 10.0)
+    history.append(2.0, 20.0)
+    # The latest value is at the end of the buffer, just before it wraps.
+    history.append(2.0, 25.0)
+    assert list(history.last(2)) == [10.0, 25.0]
+    assert history.appended == 2
+
+
+def test_history_clear():
+    history = ValueHistory(2)
+    history.append(1.0, 10.0)
+    history.clear()
+    assert len(history) == 0
+    history.append(1.0, 15.0)
+    assert list(history.last(2)) == [15.0]
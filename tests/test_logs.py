@@ -0,0 +1,112 @@
+# γTicker tests for logs.py
+# LogWriter, LogIndex, read_log, convert_text_log
+
+from os import listdir, path
+from time import mktime, strptime
+from logs import LogWriter, LogIndex, read_log, read_binary_log, convert_text_log
+
+
+def epoch(date_time):
+    return mktime(strptime(date_time, '%m-%d-%Y %H:%M:%S'))
+
+
+def write_text_log(directory, name, records):
+    with open(path.join(directory, f'{name}.txt'), 'w') as stream:
+        for date_time, value in records:
+            stream.write(f'[{date_time}]\n{value}\n\n')
+
+
+def test_binary_log_round_trip(tmp_path):
+    directory = str(tmp_path)
+    records = [(epoch('01-02-2024 10:00:00'), 1.5),
+               (epoch('01-02-2024 10:00:30'), 'Invalid API'),
+               (epoch('01-02-2024 10:01:00'), 2.5),
+               (epoch('01-03-2024 09:00:00'), 3.0)]
+    writer = LogWriter(directory)
+    for timestamp, value in records:
+        writer.write_value('Bitcoin', timestamp, value)
+    writer.close()
+    assert list(read_log('Bitcoin', directory=directory)) == records
+    assert list(read_binary_log('Bitcoin', records[1][0], records[2][0], directory)) == records[1:3]
+
+
+def test_log_writer_writes_after_close(tmp_path):
+    writer = LogWriter(str(tmp_path))
+    writer.write('Bitcoin.txt', 'first\n')
+    writer.close()
+    writer.write('Bitcoin.txt', 'second\n')
+    assert writer.thread is None
+    assert (tmp_path / 'Bitcoin.txt').read_text() == 'first\nsecond\n'
+
+
+def test_text_log_is_read_between_timestamps(tmp_path):
+    directory = str(tmp_path)
+    write_text_log(directory, 'Bitcoin', [('01-02-2024 10:00:00', 1.5), ('01-02-2024 11:00:00', 2.5),
+                                          ('01-02-2024 12:00:00', 3.5)])
+    start, end = epoch('01-02-2024 10:30:00'), epoch('01-02-2024 11:30:00')
+    assert list(read_log('Bitcoin', start, end, directory)) == [(epoch('01-02-2024 11:00:00'), 2.5)]
+
+
+def test_log_index_update_and_offset(tmp_path):
+    directory = str(tmp_path)
+    write_text_log(directory, 'Bitcoin', [('01-02-2024 10:00:00', 1.5), ('01-02-2024 10:30:00', 2.5),
+                                          ('01-02-2024 11:00:00', 3.5)])
+    log_path = tmp_path / 'Bitcoin.txt'
+    index = LogIndex('Bitcoin', directory)
+    index.update()
+    assert index.hours == [epoch('01-02-2024 10:00:00'), epoch('01-02-2024 11:00:00')]
+    eleven = log_path.read_bytes().index(b'[01-02-2024 11')
+    assert index.offset(epoch('01-02-2024 09:00:00')) == 0
+    assert index.offset(epoch('01-02-2024 10:45:00')) == 0
+    assert index.offset(epoch('01-02-2024 11:15:00')) == eleven
+
+    # Only appended records are scanned, and a line still being written waits for the next update.
+    with open(log_path, 'a') as stream:
+        stream.write('[01-02-2024 12:00:00]\n4.5\n\n[01-02-2024 13:00')
+    index.update()
+    assert len(index.hours) == 3
+    twelve = log_path.read_bytes().index(b'[01-02-2024 12')
+    assert index.offset(epoch('01-02-2024 13:30:00')) == twelve
+    with open(log_path, 'a') as stream:
+        stream.write(':00]\n5.5\n\n')
+    index.update()
+    assert len(index.hours) == 4
+
+    # Saved for the next reader, and rebuilt when the log is replaced.
+    assert LogIndex('Bitcoin', directory).offsets == index.offsets
+    write_text_log(directory, 'Bitcoin', [('01-03-2024 10:00:00', 1.5)])
+    index.update()
+    assert index.hours == [epoch('01-03-2024 10:00:00')]
+
+
+def test_converted_log_is_read_once(tmp_path):
+    directory = str(tmp_path)
+    records = [('01-02-2024 10:00:00', 1.5), ('01-02-2024 10:01:00', '{"a": 1,\n "b": 2}'),
+               ('01-02-2024 10:02:00', 2.5)]
+    write_text_log(directory, 'Bitcoin', records)
+    expected = [(epoch(date_time), value) for date_time, value in records]
+    assert list(read_log('Bitcoin', directory=directory)) == expected
+    assert path.exists(path.join(directory, 'Bitcoin.idx'))
+
+    assert convert_text_log('Bitcoin', directory) == 3
+    assert list(read_log('Bitcoin', directory=directory)) == expected
+    assert sorted(listdir(directory)) == ['Bitcoin', 'Bitcoin.txt.converted']
+
+
+def test_conversion_keeps_days_sorted(tmp_path):
+    directory = str(tmp_path)
+    # Switched to binary logs at 12:00, after logging text since the morning.
+    writer = LogWriter(directory)
+    binary = [(epoch('01-02-2024 12:00:00'), 3.0), (epoch('01-02-2024 12:30:00'), 'Invalid API')]
+    for timestamp, value in binary:
+        writer.write_value('Bitcoin', timestamp, value)
+    writer.close()
+    text = [('01-02-2024 10:00:00', 1.0), ('01-02-2024 11:00:00', 'Invalid URL'), ('01-02-2024 11:30:00', 2.0)]
+    write_text_log(directory, 'Bitcoin', text)
+
+    assert convert_text_log('Bitcoin', directory) == 3
+    expected = sorted([(epoch(date_time), value) for date_time, value in text] + binary)
+    assert list(read_log('Bitcoin', directory=directory)) == expected
+    start = epoch('01-02-2024 11:15:00')
+    assert list(read_binary_log('Bitcoin', start, float('inf'), directory)) == [
+        record for record in expected if record[0] >= start]
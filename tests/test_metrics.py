@@ -0,0 +1,47 @@
+# γTicker tests for metrics.py
+# Metrics, Histogram, label_text
+
+from metrics import Metrics, Histogram, label_text
+
+URL = 'https://api.example.com/price'
+
+
+def test_histogram_quantile():
+    histogram = Histogram()
+    assert histogram.quantile(0.95) == 0.0
+    for value in (0.001, 0.02, 0.02, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.025
+    assert histogram.quantile(1) == 5.0
+
+
+def test_label_text_is_escaped():
+    assert label_text(()) == ''
+    assert label_text((('row', 'a "b"\n'), ('url', URL))) == f'{{row="a \\"b\\"\\n",url="{URL}"}}'
+
+
+def test_render():
+    metrics = Metrics()
+    metrics.observe('yticker_request_seconds', 0.2, url=URL)
+    metrics.observe('yticker_request_seconds', 7.0, url=URL)
+    metrics.add('yticker_errors_total', url=URL, error='Invalid API')
+    metrics.add('yticker_errors_total', url=URL, error='Invalid API')
+    metrics.fresh('Bitcoin', URL)
+    lines = metrics.render().splitlines()
+    assert '# TYPE yticker_request_seconds histogram' in lines
+    assert f'yticker_request_seconds_bucket{{url="{URL}",le="0.25"}} 1' in lines
+    assert f'yticker_request_seconds_bucket{{url="{URL}",le="+Inf"}} 2' in lines
+    assert f'yticker_request_seconds_count{{url="{URL}"}} 2' in lines
+    assert f'yticker_errors_total{{error="Invalid API",url="{URL}"}} 2' in lines
+    assert any(line.startswith(f'yticker_row_age_seconds{{row="Bitcoin",url="{URL}"}} 0.') for line in lines)
+    assert 'yticker_fetch_requests_total' in ' '.join(lines)
+
+
+def test_forgotten_rows_are_not_rendered():
+    metrics = Metrics()
+    metrics.fresh('Bitcoin', URL)
+    metrics.fresh('Ethereum', URL)
+    metrics.forget('Bitcoin', URL)
+    metrics.forget('Bitcoin', URL)
+    assert list(metrics.last_success) == [('Ethereum', URL)]
+    assert 'row="Bitcoin"' not in metrics.render()
@@ -0,0 +1,213 @@
+# γTicker tests for network.py
+# SessionPool, RateLimiter, FetchCache
+
+from heapq import heapify, heappop, heappush
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from random import Random
+from threading import Event, Thread
+from time import sleep
+import pytest
+import network
+from network import SessionPool, RateLimiter, FetchCache
+
+URL = 'https://api.example.com/price'
+
+
+class Clock:
+    """Stand-in for time.monotonic() which only moves when told to.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers every GET with the client's port, so tests can tell when a connection is reused.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = str(self.client_address[1]).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    pytest.importorskip('requests')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_pool_reuses_connections(server):
+    pool = SessionPool(pool_size=2, keep_alive=True, timeout=2)
+    try:
+        ports = {pool.get(f'{server}/price?i={i}').text for i in range(5)}
+        assert len(ports) == 1
+        assert pool.session(f'{server}/volume') is pool.session(server)
+        assert len(pool.sessions) == 1
+    finally:
+        pool.close()
+    assert pool.sessions == {}
+
+
+def test_session_pool_without_keep_alive(server):
+    pool = SessionPool(pool_size=2, keep_alive=False, timeout=2)
+    try:
+        ports = {pool.get(f'{server}/price').text for _ in range(3)}
+        assert len(ports) == 3
+    finally:
+        pool.close()
+
+
+def test_rate_limiter_is_off_by_default():
+    limiter = RateLimiter(rate=0)
+    assert all(limiter.reserve(URL) == 0 for _ in range(100))
+
+
+def test_rate_limiter_token_bucket(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(network, 'monotonic', clock)
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter.reserve(URL) == 0
+    assert limiter.reserve(URL) == 0
+    # Later requests borrow the tokens to come, in the order they asked.
+    assert limiter.reserve(URL) == pytest.approx(0.1)
+    assert limiter.reserve(URL) == pytest.approx(0.2)
+    # Other hosts have their own bucket.
+    assert limiter.reserve('https://other.example.com/price') == 0
+    # Three tokens refilled, two of which were borrowed.
+    clock.now = 0.3
+    assert limiter.reserve(URL) == 0
+    assert limiter.reserve(URL) == pytest.approx(0.1)
+
+
+def test_rate_limiter_serves_every_row(monkeypatch):
+    """20 rows on one host refreshing every 10 seconds, against 1 request per second with a burst of 5.
+    Rows without a token retry when theirs is refilled and skip their periodic fetches until then.
+    """
+    clock = Clock()
+    monkeypatch.setattr(network, 'monotonic', clock)
+    limiter = RateLimiter(rate=1, burst=5)
+    jitter = Random(0)
+    rows, refresh, cycles = 20, 10, 50
+    sent = [0] * rows
+    reserved = [False] * rows
+    events = [(2 * i / rows + jitter.uniform(0, 1), i, 'tick') for i in range(rows)]
+    heapify(events)
+    while events:
+        clock.now, row, kind = heappop(events)
+        if kind == 'tick':
+            if clock.now + refresh < refresh * cycles:
+                heappush(events, (clock.now + refresh, row, 'tick'))
+            if reserved[row]:
+                continue
+        if kind == 'retry':
+            reserved[row] = False
+            sent[row] += 1
+            continue
+        wait = limiter.reserve(URL)
+        if wait == 0:
+            sent[row] += 1
+        else:
+            reserved[row] = True
+            heappush(events, (clock.now + wait, row, 'retry'))
+    assert sum(sent) >= refresh * cycles - refresh
+    assert min(sent) >= 0.8 * sum(sent) / rows
+
+
+def test_rate_limiter_honors_retry_after():
+    limiter = RateLimiter(rate=0)
+    assert limiter.failure(URL, '60') == 60.0
+    assert limiter.reserve(URL) is None
+    assert limiter.paused(URL)
+    assert limiter.reserve('https://other.example.com/price') == 0
+
+
+def test_rate_limiter_backoff_is_capped():
+    limiter = RateLimiter(rate=0, backoff_base=2, backoff_max=5)
+    delays = [limiter.failure(URL) for _ in range(10)]
+    assert all(0 <= delay <= 5 for delay in delays)
+    assert delays[0] <= 2
+
+
+def test_retry_after_parsing():
+    assert RateLimiter.retry_after('120') == 120.0
+    assert RateLimiter.retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert RateLimiter.retry_after('soon') is None
+    assert RateLimiter.retry_after(None) is None
+
+
+def test_fetch_cache_shares_fresh_responses():
+    cache = FetchCache(ttl=60)
+    calls = []
+
+    def fetch(previous):
+        calls.append(previous)
+        return {'api_dict': {'price': len(calls)}}
+
+    first = cache.get(URL, fetch)
+    assert cache.get(URL + '#top', fetch) is first
+    assert calls == [None]
+    # A row refreshing faster than the cached response's age fetches again, passing the stale one.
+    sleep(0.05)
+    assert cache.get(URL, fetch, max_age=0.01) is not first
+    assert calls == [None, first]
+
+
+def test_fetch_cache_does_not_cache_errors():
+    cache = FetchCache(ttl=60)
+    calls = []
+
+    def fetch(previous):
+        calls.append(previous)
+        return {'error': 'Invalid API'}
+
+    cache.get(URL, fetch)
+    cache.get(URL, fetch)
+    assert len(calls) == 2
+
+
+def test_fetch_cache_coalesces_concurrent_requests():
+    cache = FetchCache(ttl=60)
+    started, release = Event(), Event()
+    calls = []
+    results = []
+
+    def fetch(previous):
+        calls.append(previous)
+        started.set()
+        release.wait(2)
+        return {'api_dict': {}}
+
+    owner = Thread(target=lambda: results.append(cache.get(URL, fetch)))
+    owner.start()
+    assert started.wait(2)
+    waiters = [Thread(target=lambda: results.append(cache.get(URL, fetch))) for _ in range(4)]
+    for waiter in waiters:
+        waiter.start()
+    sleep(0.05)
+    release.set()
+    for thread in [owner] + waiters:
+        thread.join(2)
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
+
+
+def test_fetch_cache_forgets_urls():
+    cache = FetchCache(ttl=60)
+    cache.get(URL, lambda previous: {'api_dict': {}})
+    cache.forget(URL + '#top')
+    assert cache.entries == {}
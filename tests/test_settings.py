@@ -0,0 +1,55 @@
+# γTicker tests for settings.py
+# Settings
+
+from json import loads
+from time import sleep
+from util import dir_path
+from settings import Settings
+
+
+def counted(settings_object):
+    saves = []
+    save = settings_object.save
+
+    def counting_save():
+        saves.append(1)
+        save()
+    settings_object.save = counting_save
+    return saves
+
+
+def test_changes_are_coalesced_into_one_write():
+    settings_object = Settings()
+    settings_object.dictionary['global'].update({'save_delay': 0.1, 'save_max_delay': 5})
+    saves = counted(settings_object)
+    for i in range(10):
+        settings_object.dictionary['global']['marker'] = i
+        settings_object.mark_dirty()
+        sleep(0.01)
+    assert saves == []
+    sleep(0.3)
+    assert saves == [1]
+    assert not settings_object.dirty
+    assert loads(open(dir_path('settings')).read())['global']['marker'] == 9
+
+
+def test_constant_changes_are_written_by_the_max_delay():
+    settings_object = Settings()
+    settings_object.dictionary['global'].update({'save_delay': 0.1, 'save_max_delay': 0.3})
+    saves = counted(settings_object)
+    for _ in range(25):
+        settings_object.mark_dirty()
+        sleep(0.02)
+    assert len(saves) >= 1
+
+
+def test_flush_saves_pending_changes():
+    settings_object = Settings()
+    settings_object.dictionary['global'].update({'save_delay': 60, 'save_max_delay': 60})
+    saves = counted(settings_object)
+    settings_object.flush()
+    assert saves == []
+    settings_object.mark_dirty()
+    settings_object.flush()
+    assert saves == [1]
+    assert not settings_object.dirty
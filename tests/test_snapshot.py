@@ -0,0 +1,40 @@
+# γTicker tests for snapshot.py
+# Snapshot
+
+from snapshot import Snapshot
+from ticker_api import TickerAPI
+
+
+def api(url='https://api.example.com/price', term='price'):
+    return TickerAPI('Bitcoin', url, term, 2, False)
+
+
+def test_snapshot_restores_last_values(tmp_path):
+    saved = Snapshot()
+    saved.path = str(tmp_path / 'snapshot')
+    api_object = api()
+    api_object.value, api_object.value_formatted, api_object.change = 19000.0, '19000.00', 'up'
+    api_object.timestamp, api_object.time = 1606935672.0, '14:01:12'
+    saved.save([api_object, api(term='volume'), None])
+
+    loaded = Snapshot()
+    loaded.path = saved.path
+    loaded.load()
+    restored = api()
+    assert loaded.restore(restored)
+    assert (restored.value, restored.value_formatted, restored.change, restored.timestamp, restored.time) == \
+           (19000.0, '19000.00', 'up', 1606935672.0, '14:01:12')
+    assert list(restored.history.last(1)) == [19000.0]
+    # Rows without a value aren't saved, and rows whose URL has changed start blank.
+    assert not loaded.restore(api(term='volume'))
+    assert not loaded.restore(api(url='https://api.example.com/other'))
+
+
+def test_snapshot_ignores_invalid_files(tmp_path):
+    loaded = Snapshot()
+    loaded.path = str(tmp_path / 'snapshot')
+    loaded.load()
+    assert loaded.rows == {}
+    (tmp_path / 'snapshot').write_text('{"version": 1, "rows"')
+    loaded.load()
+    assert loaded.rows == {}
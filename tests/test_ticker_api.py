@@ -0,0 +1,115 @@
+# γTicker tests for ticker_api.py
+# TickerAPI.scrape_api, TickerAPI.match_value, TickerAPI.stream_api
+
+from json import loads
+import pytest
+import ticker_api
+from ticker_api import TickerAPI
+
+
+def scrape(monkeypatch, api_object, response):
+    monkeypatch.setattr(ticker_api.fetch_cache, 'get', lambda url, fetch, max_age=None: response)
+    api_object.scrape_api()
+    if not api_object.unchanged:
+        api_object.match_value()
+
+
+def test_unchanged_response_is_still_observed(monkeypatch):
+    api_object = TickerAPI('Bitcoin', 'https://api.example.com/price', 'price', 2, False)
+    response = {'api_dict': {'price': '19000'}}
+    scrape(monkeypatch, api_object, response)
+    api_object.timestamp = 1606935672.0
+    api_object.history.clear()
+    api_object.history.append(api_object.timestamp, api_object.value)
+    api_object.change = 'up'
+
+    scrape(monkeypatch, api_object, response)
+    assert api_object.unchanged and not api_object.throttled
+    assert api_object.timestamp != 1606935672.0
+    assert len(api_object.history) == 2
+    assert api_object.change == 'up'
+
+
+def test_throttled_request_keeps_last_observation(monkeypatch):
+    api_object = TickerAPI('Bitcoin', 'https://api.example.com/price', 'price', 2, False)
+    scrape(monkeypatch, api_object, {'api_dict': {'price': '19000'}})
+    times = api_object.time, api_object.date_time, api_object.timestamp
+    scrape(monkeypatch, api_object, {'error': 'Throttled'})
+    assert api_object.unchanged and api_object.throttled
+    assert (api_object.time, api_object.date_time, api_object.timestamp) == times
+    assert api_object.value == 19000.0
+    assert len(api_object.history) == 1
+
+
+def match(term, api_dict):
+    api_object = TickerAPI('Bitcoin', 'https://api.example.com/price', term, None, False)
+    api_object.api_dict = api_dict
+    api_object.match_value()
+    return api_object
+
+
+def test_dotted_terms_follow_their_path():
+    api_object = match('data.1.price', {'data': [{'price': '1'}, {'price': '2'}], 'price': '3'})
+    assert api_object.value == 2.0
+    assert api_object.resolved_path is None
+
+
+def test_dotted_terms_fall_back_to_searching():
+    api_object = match('price.usd', {'data': {'price.usd': '5'}})
+    assert api_object.value == 5.0
+    assert api_object.resolved_path == ('data', 'price.usd')
+    api_object.api_dict = {'data': {'price.usd': '6'}}
+    api_object.match_value()
+    assert api_object.value == 6.0
+
+
+def test_search_path_is_cached():
+    api_object = match('price', {'data': {'prices': '5'}})
+    assert api_object.resolved_path == ('data', 'prices')
+    api_object.api_dict = {'data': {'prices': '6'}}
+    api_object.match_value()
+    assert api_object.value == 6.0
+
+
+class StreamedResponse:
+    """Stand-in for a streamed requests.Response.
+    """
+    encoding = 'utf-8'
+
+    def __init__(self, body, chunk_size=7):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('term, body', [
+    ('price', '{"data": {"price": 1}, "price": 2}'),
+    ('price', '{"data": {"prices": 1}, "volume": 2}'),
+    ('price', '{"price": null, "data": {"price": 3}}'),
+    ('data.price', '{"data": {"price": 4}, "price": 5}'),
+    ('price.usd', '{"data": {"price.usd": 6}}'),
+    ('missing', '{"data": {"price": 7}}'),
+])
+def test_streamed_match_is_the_same_as_parsed(term, body):
+    parsed = match(term, loads(body))
+    streamed = TickerAPI('Bitcoin', 'https://api.example.com/price', term, None, False)
+    response = StreamedResponse(body.encode())
+    streamed.api_dict = streamed.stream_api(response)
+    streamed.match_value()
+    assert streamed.value == parsed.value
+    assert response.closed
+
+
+def test_streaming_stops_after_a_top_level_match():
+    api_object = TickerAPI('Bitcoin', 'https://api.example.com/price', 'price', None, False)
+    response = StreamedResponse(('{"price": 1, "rest": [' + '0, ' * 1000 + '0]}').encode())
+    assert api_object.stream_api(response) == {'price': 1}
+    assert response.read < len(response.chunks)
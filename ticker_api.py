@@ -0,0 +1,371 @@
+# γTicker API fetching for classes.py and daemon.py, kept free of tkinter
+# TickerAPI
+
+from json import loads
+from codecs import getincrementaldecoder
+from hashlib import blake2b
+from time import time, perf_counter
+from settings import settings
+from network import fetch_stats, rate_limiter, fetch_cache
+from metrics import metrics
+from logs import log_writer, log_name
+from history import ValueHistory
+from functions import (is_float, dict_search, compile_path, path_get, stream_search, batch_item, get_time,
+                       print_thread)
+
+
+class TickerAPI:
+    """Object to fetch, store, and log values from APIs.
+    """
+    def __init__(self, name, url, term, decimals, log, session_pool=None, batch=None):
+        self.name = name
+        self.url = url
+        self.term = term
+        self.decimals = decimals
+        self.log = log
+        self.log_name = log_name(name)
+        self.value = None
+        self.value_old = None
+        self.value_formatted = None
+        self.change = None
+        self.time = None
+        self.date_time = None
+        self.timestamp = None
+        self.truncated = False
+        self.api_dict = {}
+        # Recent numeric values, drawn by the row's Sparkline.
+        self.history = ValueHistory()
+        # True when another row has the same URL. Set by functions.UrlIndex.
+        self.shared = False
+        # Batch group from settings and the combined URL requested for it, set by UrlIndex.
+        self.batch = batch
+        self.request_url = None
+        # Shared SessionPool owned by Ticker. Falls back to a bare requests.get without one.
+        self.session_pool = session_pool
+        self.term_path = None
+        self.resolved_path = None
+        self.compile_term()
+        # The last response used, from request(). unchanged is True when the last scrape
+        # returned the same response as the one before it, or was skipped while backing off,
+        # in which case throttled is True as well.
+        self.response = None
+        self.unchanged = False
+        self.throttled = False
+        # Seconds until a token borrowed from network.rate_limiter is refilled, when the last request
+        # was throttled for it. The next request uses that token rather than taking another.
+        self.retry = None
+        self.reserved = False
+
+    def compile_term(self):
+        """Compile a dotted term, e.g. "data.0.price", into a path and forget any cached match path.
+
+        Called on creation and whenever the term or URL is changed in TickerAPIProperties.
+        """
+        self.term_path = compile_path(self.term)
+        self.resolved_path = None
+
+    def forget_response(self):
+        """Forget the last response so the next one is matched even if it's the same.
+
+        Called when the URL is changed and when a scrape fails.
+        """
+        self.response = None
+        self.unchanged = False
+        self.throttled = False
+
+    def get_times(self):
+        """Get the time, date+time, and epoch timestamp. Called immediately before an API scrape.
+        """
+        self.time, self.date_time = get_time(), get_time(date=True)
+        self.timestamp = time()
+
+    def scrape_api(self, max_age=None):
+        """Retrieve and store a dictionary from an API URL.
+
+        Responses come from network.fetch_cache, which only calls request() when no other row has
+        fetched the same URL within max_age seconds, usually the row's refresh rate. When the
+        "stream_json" global setting is on and no other rows share the URL, the response is
+        streamed by request() directly instead.
+
+        When the response is the same one as last time, whether from the cache, a 304 Not Modified,
+        or an identical body, self.unchanged is set so that matching and alarms can be skipped.
+        The value is still observed again by observe(): its time, history, and log entry.
+        Requests skipped while the host is backing off or out of tokens set self.throttled as well
+        and keep the time of the last observation, so their row isn't redrawn. When a token was
+        borrowed for the request, self.retry is the seconds after which to scrape again.
+
+        Rows in a batch group request the group's combined URL and keep only their own item.
+        A row left alone in its group has no request_url and requests its own URL like any other row.
+        """
+        times = self.time, self.date_time, self.timestamp
+        self.get_times()
+        self.unchanged = self.throttled = False
+        self.retry = None
+        streaming = (settings.dictionary['global'].get('stream_json', False) and self.term is not None
+                     and not self.shared and not self.request_url and not (self.term_path and isinstance(self.term_path[0], int)))
+        if streaming:
+            response = self.request(self.response, streaming=True)
+        else:
+            response = fetch_cache.get(self.request_url or self.url, self.request, max_age)
+        error = response.get('error')
+        if not error:
+            metrics.fresh(self.name, self.url, self.timestamp)
+        if error == 'Throttled':
+            self.unchanged = self.throttled = True
+            self.retry = response.get('retry')
+            self.time, self.date_time, self.timestamp = times
+            if self.retry is None:
+                print_thread(f'{self.name}: Backing off')
+            else:
+                print_thread(f'{self.name}: Rate Limited, Retrying in {self.retry:.1f}s')
+        elif error:
+            self.forget_response()
+            self.value = self.value_formatted = error
+            print_thread(f'{self.name}: {error}')
+        elif response is self.response:
+            self.unchanged = True
+            print_thread(f'{self.name}: Unchanged')
+            self.observe()
+        elif self.batch and self.request_url:
+            self.api_dict = batch_item(response['api_dict'], str(self.batch['value']), self.batch.get('split'))
+            if self.api_dict is None:
+                self.api_dict = {}
+                print_thread(f'{self.name}: {self.batch["value"]} Missing From Batch')
+            self.response = response
+        else:
+            self.api_dict = response['api_dict']
+            self.response = response
+
+    def request(self, previous=None, streaming=False):
+        """Send a request to the API URL and return the response as a dictionary:
+
+            {'api_dict': {...}, 'body_hash': bytes, 'body_size': int, 'etag': str, 'last_modified': str}
+
+        The request_url of a batch group is requested instead of the row's own URL when there is one.
+
+        Scraped with requests library, through the shared SessionPool when there is one, once
+        network.rate_limiter has a token for the host. Converted to a dictionary with json.loads,
+        or streamed with stream_api().
+
+        previous is the last response from the URL. Its ETag/Last-Modified validators are sent as
+        conditional headers, and it's returned again on a 304 Not Modified or an identical body
+        without parsing it. Counted in network.fetch_stats, and timed in metrics.metrics.
+
+        Failures return {'error': 'Invalid URL'}, {'error': 'Invalid API'}, or {'error': 'Throttled'}.
+        Requests given a later token return {'error': 'Throttled', 'retry': seconds} instead, and the
+        next request sends with that token.
+        """
+        url = self.request_url or self.url
+        print_thread(f'{self.name}: Requesting at {self.time}')
+        headers = {}
+        if previous is not None:
+            if previous['etag']:
+                headers['If-None-Match'] = previous['etag']
+            if previous['last_modified']:
+                headers['If-Modified-Since'] = previous['last_modified']
+        if self.reserved:
+            self.reserved = False
+            wait = None if rate_limiter.paused(url) else 0.0
+        else:
+            wait = rate_limiter.reserve(url)
+        if wait is None or wait > 0:
+            fetch_stats.add('throttled')
+            metrics.add('yticker_errors_total', url=url, error='Throttled')
+            if wait is None:
+                return {'error': 'Throttled'}
+            self.reserved = True
+            return {'error': 'Throttled', 'retry': wait}
+        start = perf_counter()
+        try:
+            if self.session_pool is not None:
+                request_results = self.session_pool.get(url, headers=headers, stream=streaming)
+            else:
+                from requests import get as requests_get
+                request_results = requests_get(url, headers=headers, stream=streaming)
+        except Exception:
+            rate_limiter.failure(url)
+            metrics.add('yticker_errors_total', url=url, error='Invalid URL')
+            return {'error': 'Invalid URL'}
+        fetch_stats.add('requests')
+        status = request_results.status_code
+        if status == 429 or status >= 500:
+            # Rows keep showing their last value while the host is backing off.
+            delay = rate_limiter.failure(url, request_results.headers.get('Retry-After'))
+            request_results.close()
+            if status in (429, 503):
+                fetch_stats.add('throttled')
+            metrics.observe('yticker_request_seconds', perf_counter() - start, url=url)
+            metrics.add('yticker_errors_total', url=url, error='Throttled')
+            print_thread(f'{self.name}: HTTP {status}, backing off {delay:.1f}s')
+            return {'error': 'Throttled'}
+        rate_limiter.success(url)
+        if status == 304 and previous is not None:
+            metrics.observe('yticker_request_seconds', perf_counter() - start, url=url)
+            fetch_stats.add('not_modified')
+            fetch_stats.add('bytes_saved', previous['body_size'])
+            print_thread(f'{self.name}: Not Modified')
+            return previous
+        response = {'api_dict': {}, 'body_hash': None, 'body_size': 0,
+                    'etag': request_results.headers.get('ETag'),
+                    'last_modified': request_results.headers.get('Last-Modified')}
+        try:
+            if streaming:
+                response['api_dict'] = self.stream_api(request_results)
+                metrics.observe('yticker_request_seconds', perf_counter() - start, url=url)
+            else:
+                body = request_results.content
+                metrics.observe('yticker_request_seconds', perf_counter() - start, url=url)
+                metrics.add('yticker_response_bytes_total', len(body), url=url)
+                fetch_stats.add('bytes', len(body))
+                body_hash = blake2b(body, digest_size=16).digest()
+                if previous is not None and body_hash == previous['body_hash']:
+                    fetch_stats.add('unchanged')
+                    return previous
+                parse_start = perf_counter()
+                response['api_dict'] = loads(body)
+                metrics.observe('yticker_parse_seconds', perf_counter() - parse_start, url=url)
+                response['body_hash'] = body_hash
+                response['body_size'] = len(body)
+        except Exception:
+            metrics.add('yticker_errors_total', url=url, error='Invalid API')
+            return {'error': 'Invalid API'}
+        return response
+
+    def stream_api(self, response):
+        """Read a streamed response in chunks and parse it incrementally with stream_search(),
+        closing the connection as soon as the term has been found.
+
+        Only the top-level key which match_value() looks at first is searched for: the term, or the first
+        key of a dotted term. When it's missing or null, the rest of the body is read and parsed in full,
+        so that match_value() falls back to searching exactly as it does without streaming.
+
+        return a dictionary holding only the matched key, which match_value() reads like the full one,
+        or the whole API dictionary.
+        """
+        decoder = getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        received = []
+
+        def chunks():
+            for chunk in response.iter_content(chunk_size=65536):
+                received.append(decoder.decode(chunk))
+                yield received[-1]
+
+        stream = chunks()
+        try:
+            key = self.term_path[0] if self.term_path is not None else self.term
+            found = stream_search(stream, key, exact_match=True, top_level=True)
+            if found is None or found[1] is None:
+                for _ in stream:
+                    pass
+                received.append(decoder.decode(b'', final=True))
+                return loads(''.join(received))
+        finally:
+            response.close()
+        key, value = found
+        return {key: value}
+
+    def match_value(self):
+        """Retrieve and store a desired value from an API dictionary.
+
+        Attempt to match a value with a given term, otherwise
+        the value will be the entire json object.
+
+        Format and log value.
+        Determine if numeric value has changed for self.change (arrow).
+        """
+        start = perf_counter()
+        # Reset truncation in the event that a long, truncated value is replaced by a short one
+        # so that there will be no tooltip dialogue.
+        self.truncated = False
+
+        # Get the old value before new value is retrieved to determine if it has risen/fallen.
+        if self.value is not None:
+            self.value_old = self.value
+        self.value = None
+
+        # Attempt to match the value with the given term.
+        # Dotted terms are followed directly. Otherwise, e.g. for other terms or keys which contain
+        # a dot, the path cached from the first successful search is followed, and searching is
+        # only the fallback for when that path stops matching.
+        if self.term is not None:
+            try:
+                if self.term_path is not None:
+                    self.value = path_get(self.api_dict, self.term_path)
+                if self.value is None and self.resolved_path is not None:
+                    self.value = path_get(self.api_dict, self.resolved_path)
+                if self.value is None:
+                    if isinstance(self.api_dict, dict) and self.api_dict.get(self.term) is not None:
+                        self.resolved_path = (self.term,)
+                    else:
+                        self.resolved_path = dict_search(self.api_dict, self.term, return_path=True)
+                    if self.resolved_path is not None:
+                        self.value = path_get(self.api_dict, self.resolved_path)
+            except Exception as error:
+                print_thread(f'Error -- Recursive API Value Matching Failed: {error}')
+                self.value = None
+        # If there isn't a given term, assign json dictionary to value.
+        elif self.term is None and self.api_dict:
+            self.value = self.api_dict
+
+        if self.value is not None:
+            if is_float(self.value):
+                self.value = float(self.value)
+                self.history.append(self.timestamp or time(), self.value)
+                # Format value. Keep original and formatted value separate for precise alarm matching/inequalities.
+                if self.decimals is not None:
+                    try:
+                        self.value_formatted = format(self.value, f'.{self.decimals}f')
+                        if len(str(self.value_formatted)) > 32:
+                            self.value_formatted = str(self.value_formatted)[:29].strip()+'...'
+                            self.truncated = True
+                    except Exception as error:
+                        print_thread(f'Error -- Value Formatting Failed: {error}')
+                        self.value_formatted = str(self.value)
+                else:
+                    self.value_formatted = str(self.value)
+                print_thread(f'{self.name}: {self.value_formatted}')
+                # Determine if value has risen/fallen/stayed the same.
+                if is_float(self.value_old):
+                    try:
+                        if self.value > self.value_old:
+                            self.change = 'up'
+                        elif self.value < self.value_old:
+                            self.change = 'down'
+                        else:
+                            self.change = 'same'
+                    except Exception as error:
+                        print_thread(f'Error -- Change Arrow Not Determinable: {error}')
+            # If the value isn't floatable, format it as a string.
+            else:
+                self.value_formatted = str(self.value)
+                # Truncate long values.
+                if len(str(self.value)) > 32:
+                    self.value_formatted = str(self.value)[:29].strip()+'...'
+                    self.truncated = True
+                print_thread(f'{self.name}: {self.value_formatted}')
+            # Log data
+            if self.log:
+                self.logger(self.value)
+        metrics.observe('yticker_match_seconds', perf_counter() - start, row=self.name)
+
+    def observe(self):
+        """Record the value of an unchanged response again without matching it: a history sample,
+        and a log entry when logging. The arrow keeps showing the last change.
+        """
+        if isinstance(self.value, float):
+            self.history.append(self.timestamp, self.value)
+        if self.log and self.value is not None:
+            self.logger(self.value)
+
+    def logger(self, value):
+        """Log data as it is retrieved to the log directory.
+
+        Individual values are logged separately from one another and can be separated by days.
+
+        Values are queued for the background LogWriter, which appends them to files.
+        With the "log_format": "binary" global setting, values go to compact day files instead.
+        """
+        if settings.dictionary['global'].get('log_format') == 'binary':
+            log_writer.write_value(self.log_name, self.timestamp, value)
+        else:
+            log_writer.write(f'{self.log_name}.txt', f'[{self.date_time}]\n{value}\n\n')